@@ -7,21 +7,32 @@ from datetime import datetime, timedelta
 import threading
 import time
 import os
-from automation.scheduler import SimpleScheduler
-from services.batch_service import BatchService
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from services.route_cache import get_route_cache
+from services.icao_client import get_icao_client
+from services.icao_emissions import get_icao_emissions, parse_icao_response
+from services.airport_registry import get_airport_registry
+from services.csv_stream import clean_csv_header, count_csv_lines, read_csv_header
+from services.distance import great_circle_km, great_circle_km_batch, haversine_degrees_km, fallback_emissions_batch
+from services.progress import TERMINAL_STATUSES, get_progress_tracker
+from services.batch_jobs import BatchJobStore
+from services.airport_dataset import load_airports_data
+from services.airport_search import get_airport_search_index
+from services.http_cache import get_airports_list_cache
+from services.results_pagination import fetch_results_page
+from database.schema import add_missing_columns, mark_schema_current, schema_is_current
+from services.change_feed import (
+    CHANGE_RESET, DEFAULT_FEED_LIMIT, current_sequence, delete_calculations, get_cursor_tracker, prune_changes_if_due,
+    read_changes, record_changes, track_model
+)
+from sqlalchemy import create_engine, text, select, false
+from sqlalchemy.orm import sessionmaker, joinedload, aliased
 import logging
 import json
 from datetime import timedelta
 from flask import Flask, request, jsonify, render_template, current_app
-import pandas as pd
 import io
-from flask import send_file
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
+import csv
+from flask import send_file, Response, stream_with_context
 import sqlite3
 from werkzeug.utils import secure_filename
 
@@ -69,6 +80,7 @@ config_manager.load_config()
 # Set database URI from config
 app.config['SQLALCHEMY_DATABASE_URI'] = config_manager.config.database.connection_string
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = getattr(config_manager.config.database, 'engine_options', {})
 
 # Enable CORS for all routes
 CORS(app, origins=["http://localhost:3000", "http://127.0.0.1:3000"], supports_credentials=True)
@@ -109,7 +121,7 @@ try:
     
     # Use the SAME connection string for both databases
     enhanced_connection_string = config_manager.config.database.connection_string
-    enhanced_engine = create_engine(enhanced_connection_string)
+    enhanced_engine = create_engine(enhanced_connection_string, **getattr(config_manager.config.database, 'engine_options', {}))
     EnhancedSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=enhanced_engine)
     
     # For SQL Server, we need to handle identity columns
@@ -129,16 +141,30 @@ except ImportError as e:
 
 # SINGLE DATABASE INITIALIZATION BLOCK
 with app.app_context():
+    # Schema checks are skipped when the database is stamped with the current version
+    basic_schema_current = schema_is_current(db.engine)
+    
     # Basic database (SQLite) - using models.py
-    db.create_all()
-    print("✅ Basic database tables created")
+    if not basic_schema_current:
+        db.create_all()
+        print("✅ Basic database tables created")
     
     # Enhanced database (SQLite or SQL Server) - using database.models
     if ENHANCED_FEATURES_AVAILABLE:
         try:
-            # This will create tables only if they don't exist
-            Base.metadata.create_all(bind=enhanced_engine)
-            print("✅ Enhanced database tables checked/created")
+            if not schema_is_current(enhanced_engine):
+                # This will create tables only if they don't exist
+                Base.metadata.create_all(bind=enhanced_engine)
+                # create_all skips indexes on tables that already exist
+                for index in EnhancedFlightCalc.__table__.indexes:
+                    index.create(bind=enhanced_engine, checkfirst=True)
+                for column in add_missing_columns(enhanced_engine, Base.metadata.sorted_tables):
+                    print(f"✅ Added column: {column}")
+                mark_schema_current(enhanced_engine)
+                print("✅ Enhanced database tables checked/created")
+            
+            # ORM inserts and deletes feed the change log behind /api/check-updates
+            track_model(EnhancedFlightCalc)
         except Exception as e:
             print(f"⚠️ Enhanced database table creation: {e}")
             ENHANCED_FEATURES_AVAILABLE = False
@@ -180,13 +206,26 @@ def get_enhanced_db():
 # =============================================================================
 
 try:
-    from shared_airports import airports as AIRPORTS_DATA
+    AIRPORTS_DATA = load_airports_data()
     print(f"✅ Successfully loaded {len(AIRPORTS_DATA)} airports from shared file")
 except ImportError as e:
     print(f"❌ Could not import airports from shared_airports.py: {e}")
     print("⚠️  Creating empty airports list - airport relationships may not work")
     AIRPORTS_DATA = []
 
+# Index every airport once so lookups never hit the database or scan the list
+airport_registry = get_airport_registry()
+if ENHANCED_FEATURES_AVAILABLE:
+    try:
+        with next(get_enhanced_db()) as registry_db:
+            airport_registry.load(registry_db, AIRPORTS_DATA)
+    except Exception as e:
+        print(f"⚠️ Could not load airports from database into registry: {e}")
+        airport_registry.load(airports_data=AIRPORTS_DATA)
+else:
+    airport_registry.load(airports_data=AIRPORTS_DATA)
+print(f"✅ Airport registry ready with {len(airport_registry)} airports")
+
 # =============================================================================
 # UPDATED ICAO CALCULATION FUNCTIONS WITH BETTER ERROR HANDLING
 # =============================================================================
@@ -230,7 +269,9 @@ def update_sqlite_schema():
 
 # Call schema update after db creation
 with app.app_context():
-    update_sqlite_schema()
+    if not basic_schema_current:
+        update_sqlite_schema()
+        mark_schema_current(db.engine)
     
 # =============================================================================
 # AUTOMATION SCHEDULER SETUP
@@ -238,31 +279,47 @@ with app.app_context():
 
 # Initialize automation scheduler
 automation_scheduler = None
+automation_started = False
+automation_start_lock = threading.Lock()
 
-if ENHANCED_FEATURES_AVAILABLE:
-    def init_automation():
-        global automation_scheduler
-        try:
-            # Get a database session
-            with next(get_enhanced_db()) as db:
-                automation_scheduler = SimpleScheduler(db)
-                # Start with daily schedule at 2 AM as default
-                automation_scheduler.start_daily(hour=2, minute=0)
-                automation_scheduler.start_scheduler()
-                print("✅ Automation scheduler started successfully")
-        except Exception as e:
-            print(f"❌ Failed to start automation scheduler: {e}")
+def init_automation():
+    global automation_scheduler
+    try:
+        from automation.scheduler import SimpleScheduler
+        # Get a database session
+        with next(get_enhanced_db()) as db:
+            automation_scheduler = SimpleScheduler(db, session_factory=EnhancedSessionLocal)
+            # Start with daily schedule at 2 AM as default
+            automation_scheduler.start_daily(hour=2, minute=0)
+            automation_scheduler.start_scheduler()
+            print("✅ Automation scheduler started successfully")
+    except Exception as e:
+        print(f"❌ Failed to start automation scheduler: {e}")
+
+def start_automation(delay_seconds=5):
+    """
+    Start the scheduler and watcher in a background thread. Called from the
+    entry point rather than on import, and only once per process, so importing
+    this module never starts a second scheduler.
+    """
+    global automation_started
+    if not ENHANCED_FEATURES_AVAILABLE:
+        print("⚠️  Enhanced features not available - automation disabled")
+        return False
+    with automation_start_lock:
+        if automation_started:
+            return False
+        automation_started = True
     
-    # Start automation in a background thread (with delay to let app fully initialize)
+    # Delay to let the app fully initialize
     def delayed_automation_start():
-        time.sleep(5)  # Wait 5 seconds for app to be fully ready
+        time.sleep(delay_seconds)
         init_automation()
     
-    automation_thread = threading.Thread(target=delayed_automation_start)
+    automation_thread = threading.Thread(target=delayed_automation_start, name='automation-start')
     automation_thread.daemon = True
     automation_thread.start()
-else:
-    print("⚠️  Enhanced features not available - automation disabled")
+    return True
 
 # =============================================================================
 # CORE CALCULATION ENDPOINTS (KEEP THESE - THEY'RE ESSENTIAL)
@@ -386,8 +443,12 @@ def automation_status():
         'scheduler_running': automation_scheduler and getattr(automation_scheduler, 'is_running', False),
         'enhanced_features': ENHANCED_FEATURES_AVAILABLE,
         'last_run': getattr(automation_scheduler, 'last_run_time', 'Never') if automation_scheduler else 'No scheduler',
-        'files_processed': 0
+        'files_processed': 0,
+        'route_cache': get_route_cache().stats(),
+        'icao_client': get_icao_client().stats()
     }
+    status['icao_circuit'] = status['icao_client']['circuit_breaker']['state']
+    status['icao_current_rps'] = status['icao_client']['rate_limiter']['current_rps']
     
     # Count files in directories
     for dir_type in ['scheduled', 'processed', 'errors']:
@@ -400,6 +461,32 @@ def automation_status():
     
     return jsonify(status)
 
+@app.route('/api/v2/automation/jobs', methods=['GET'])
+def list_batch_jobs():
+    """Recent batch jobs with their checkpoints"""
+    if not ENHANCED_FEATURES_AVAILABLE:
+        return jsonify({'error': 'Enhanced features not available'}), 400
+    
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 200)
+    with next(get_enhanced_db()) as db:
+        return jsonify([job.to_dict() for job in BatchJobStore(db).recent(limit)])
+
+@app.route('/api/v2/emissions-model', methods=['GET'])
+def emissions_model_summary():
+    """Offline emissions model coverage and its error on held-out ICAO answers"""
+    from services.emissions_model import get_emissions_model
+    return jsonify(get_emissions_model().summary())
+
+@app.route('/api/v2/emissions-model/refit', methods=['POST'])
+def refit_emissions_model():
+    """Refit the offline emissions model on the current route cache"""
+    from services.emissions_model import fit_emissions_model
+    try:
+        return jsonify(fit_emissions_model().summary())
+    except Exception as e:
+        logger.error(f"❌ Emissions model refit failed: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/force-refresh', methods=['POST'])
 def force_refresh():
     """Force frontend to refresh data"""
@@ -417,17 +504,102 @@ def force_refresh():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+CHANGE_STREAM_POLL_SECONDS = 1.0
+CHANGE_STREAM_HEARTBEAT_SECONDS = 15.0
+
+def parse_change_sequence(value):
+    """Parse a since/Last-Event-ID sequence, None when absent or invalid"""
+    try:
+        return max(0, int(value)) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
 @app.route('/api/check-updates')
 def check_updates():
-    """Check if there are new calculations"""
-    count = FlightCalculation.query.count()
-    latest = FlightCalculation.query.order_by(FlightCalculation.created_at.desc()).first()
+    """
+    Check for changed calculations. With ?since=<seq> only the ids inserted
+    or deleted after that sequence are returned; pass back "seq" next time.
+    Pass a stable ?client= id so the feed is kept until that client reads it.
+    """
+    if not ENHANCED_FEATURES_AVAILABLE:
+        return jsonify({'error': 'Enhanced features not available'}), 400
+    
+    since = parse_change_sequence(request.args.get('since'))
+    limit = min(max(request.args.get('limit', DEFAULT_FEED_LIMIT, type=int), 1), DEFAULT_FEED_LIMIT)
+    client = request.args.get('client') or request.remote_addr
+    
+    with next(get_enhanced_db()) as db:
+        prune_changes_if_due(db)
+        if since is None:
+            # First poll: hand out the current position to continue from
+            seq = current_sequence(db)
+            get_cursor_tracker().touch(client, seq)
+            count = db.query(EnhancedFlightCalculation).count()
+            latest = db.query(EnhancedFlightCalculation.created_at)\
+                .order_by(EnhancedFlightCalculation.created_at.desc()).first()
+            return jsonify({
+                'seq': seq,
+                'total_calculations': count,
+                'latest_timestamp': latest[0].isoformat() if latest and latest[0] else None,
+                'needs_refresh': True
+            })
+        
+        # The client has read up to since; changes after it stay until it confirms them
+        get_cursor_tracker().touch(client, since)
+        changes = read_changes(db, since, limit)
     
-    return jsonify({
-        'total_calculations': count,
-        'latest_timestamp': latest.created_at.isoformat() if latest else None,
-        'needs_refresh': True  # Always return true for now
-    })
+    changes['needs_refresh'] = bool(changes['inserted'] or changes['deleted'] or changes['reset'])
+    return jsonify(changes)
+
+@app.route('/api/check-updates/stream')
+def stream_updates():
+    """
+    Server-Sent Events stream of the change feed. Each connection ends after
+    stream_max_seconds so it never holds a worker thread for good; the
+    browser reconnects with Last-Event-ID and continues where it left off.
+    """
+    if not ENHANCED_FEATURES_AVAILABLE:
+        return jsonify({'error': 'Enhanced features not available'}), 400
+    
+    since = parse_change_sequence(request.headers.get('Last-Event-ID') or request.args.get('since'))
+    if since is None:
+        with next(get_enhanced_db()) as db:
+            since = current_sequence(db)
+    
+    def generate():
+        tracker = get_cursor_tracker()
+        client = object()
+        seq = since
+        started = last_sent = time.time()
+        # Every message carries the position, so a reconnect resumes from it
+        yield f"retry: {int(CHANGE_STREAM_POLL_SECONDS * 1000)}\nid: {seq}\n\n"
+        try:
+            while time.time() - started < config_manager.config.change_feed.stream_max_seconds:
+                tracker.touch(client, seq)
+                with next(get_enhanced_db()) as db:
+                    prune_changes_if_due(db)
+                    changes = read_changes(db, seq)
+                
+                if changes['seq'] != seq or changes['reset']:
+                    seq = changes['seq']
+                    last_sent = time.time()
+                    yield f"id: {seq}\nevent: changes\ndata: {json.dumps(changes)}\n\n"
+                    if changes['has_more']:
+                        continue
+                elif time.time() - last_sent >= CHANGE_STREAM_HEARTBEAT_SECONDS:
+                    # Also how a closed connection is noticed: the write fails and the generator is closed
+                    last_sent = time.time()
+                    yield f"id: {seq}\n: keep-alive\n\n"
+                
+                time.sleep(CHANGE_STREAM_POLL_SECONDS)
+        finally:
+            tracker.release(client)
+    
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/api/v2/automation/cancel', methods=['POST'])
 def cancel_processing():
@@ -513,47 +685,48 @@ def force_process_automation():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/v2/automation/progress')
-def get_batch_progress():
-    """Get current batch processing progress - SIMPLIFIED VERSION"""
-    # For now, return idle status
-    # You can enhance this later to track actual progress
-    return jsonify({
-        'status': 'idle',
-        'message': 'No active processing'
-    })
+PROGRESS_STREAM_HEARTBEAT_SECONDS = 15.0
+PROGRESS_STREAM_RETRY_SECONDS = 2.0
 
 @app.route('/api/v2/automation/progress', methods=['GET'])
 def get_automation_progress():
     """Get current batch processing progress"""
-    try:
-        # Get the batch service from current_app
-        if hasattr(current_app, 'batch_service') and current_app.batch_service:
-            progress = current_app.batch_service.current_progress
-            print(f"📊 Progress API returning: {progress['status']} - {progress.get('message', '')}")
-            return jsonify(progress)
-        else:
-            # Fallback if no batch service available
-            return jsonify({
-                'status': 'idle',
-                'message': 'Batch service not initialized',
-                'current_row': 0,
-                'total_rows': 0,
-                'processed_rows': 0,
-                'error_rows': 0,
-                'progress_percent': 0
-            })
-    except Exception as e:
-        print(f"❌ Error getting progress: {e}")
-        return jsonify({
-            'status': 'error',
-            'message': f'Error getting progress: {str(e)}',
-            'current_row': 0,
-            'total_rows': 0,
-            'processed_rows': 0,
-            'error_rows': 0,
-            'progress_percent': 0
-        }), 500
+    return jsonify(get_progress_tracker().snapshot())
+
+@app.route('/api/v2/automation/progress/stream')
+def stream_automation_progress():
+    """
+    Server-Sent Events stream of batch progress, pushed as it changes.
+    The stream ends once the batch finishes or after progress_stream_max_seconds,
+    so an open tab never holds a worker thread for good; the browser
+    reconnects after the retry interval if it still wants updates.
+    """
+    tracker = get_progress_tracker()
+    max_seconds = config_manager.config.batch.progress_stream_max_seconds
+    
+    def generate():
+        started = time.monotonic()
+        snapshot = tracker.snapshot()
+        version = snapshot['version']
+        yield (f"retry: {int(PROGRESS_STREAM_RETRY_SECONDS * 1000)}\n"
+               f"id: {version}\nevent: progress\ndata: {json.dumps(snapshot)}\n\n")
+        while snapshot['status'] not in TERMINAL_STATUSES:
+            remaining = max_seconds - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            snapshot = tracker.wait_for_change(version, min(PROGRESS_STREAM_HEARTBEAT_SECONDS, remaining))
+            if snapshot['version'] == version:
+                # Also how a closed connection is noticed: the write fails and the generator is closed
+                yield f"id: {version}\n: keep-alive\n\n"
+                continue
+            version = snapshot['version']
+            yield f"id: {version}\nevent: progress\ndata: {json.dumps(snapshot)}\n\n"
+    
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 # =============================================================================
 # AUTOMATION DEBUG ENDPOINTS
@@ -653,38 +826,44 @@ def upload_csv_for_processing():
             original_name = secure_filename(file.filename)
             filename = f"{timestamp}_{original_name}"
             file_path = os.path.join(scheduled_dir, filename)
+            # Written under a name the watcher ignores, then renamed into place once valid
+            upload_path = file_path + '.part'
             
             # Save the file
-            file.save(file_path)
+            file.save(upload_path)
             
-            # Validate CSV structure
+            # Validate CSV structure from the header line only
             try:
-                import pandas as pd
-                df = pd.read_csv(file_path)
+                header = read_csv_header(upload_path) or []
+                columns = clean_csv_header(header)
                 required_columns = ['departure_iata', 'destination_iata']
                 
-                if not all(col in df.columns for col in required_columns):
+                if not all(col in columns for col in required_columns):
                     # Clean up invalid file
-                    os.remove(file_path)
+                    os.remove(upload_path)
                     return jsonify({
-                        'error': f'CSV must contain columns: {required_columns}. Found: {list(df.columns)}'
+                        'error': f'CSV must contain columns: {required_columns}. Found: {header}'
                     }), 400
                 
-                row_count = len(df)
+                row_count = max(count_csv_lines(upload_path) - 1, 0)
+                os.replace(upload_path, file_path)
                 
+                # Straight onto the worker queue; the watcher sees the same file but it is only queued once
+                queued = bool(automation_scheduler and automation_scheduler.enqueue_file(file_path))
                 return jsonify({
                     'success': True,
                     'message': f'File {original_name} uploaded successfully with {row_count} routes',
                     'file_path': file_path,
                     'filename': filename,
                     'row_count': row_count,
-                    'next_processing': 'Will be processed within 1 minute by automation'
+                    'next_processing': 'Queued for processing' if queued
+                                       else f"Will be processed at the next scheduled run ({automation_scheduler.next_run_time if automation_scheduler else 'not scheduled'})"
                 })
                 
             except Exception as csv_error:
                 # Clean up invalid file
-                if os.path.exists(file_path):
-                    os.remove(file_path)
+                if os.path.exists(upload_path):
+                    os.remove(upload_path)
                 return jsonify({'error': f'Invalid CSV file: {str(csv_error)}'}), 400
             
         else:
@@ -779,6 +958,7 @@ def process_csv_manual():
             return jsonify({'error': 'File path is required'}), 400
         
         # Use the get_enhanced_db function
+        from services.batch_service import BatchService
         with next(get_enhanced_db()) as db:
             batch_service = BatchService(db)
             result = batch_service.process_flight_csv(file_path)
@@ -890,74 +1070,24 @@ def get_airport_by_iata_enhanced(iata_code):
     if not validate_airport_code(iata_code):
         return None
     
-    iata_code = iata_code.upper().strip()
-    
-    # First try enhanced database
-    if ENHANCED_FEATURES_AVAILABLE:
-        try:
-            with next(get_enhanced_db()) as db:
-                airport = db.query(Airport).filter(Airport.iata_code == iata_code).first()
-                if airport:
-                    return airport
-        except Exception as e:
-            print(f"❌ Database error getting airport {iata_code}: {e}")
-    
-    # Fallback to AIRPORTS_DATA
-    for airport in AIRPORTS_DATA:
-        if airport.get('code') == iata_code:
-            # Create a simple airport object
-            class SimpleAirport:
-                def __init__(self, data):
-                    self.iata_code = data.get('code')
-                    self.name = data.get('name', 'Unknown Airport')
-                    self.city = data.get('city', 'Unknown')
-                    self.country = data.get('country', 'Unknown')
-                    self.latitude = data.get('latitude')
-                    self.longitude = data.get('longitude')
-            
-            return SimpleAirport(airport)
-    
-    print(f"❌ Airport not found in database: {iata_code}")
-    return None
+    airport = get_airport_registry().get(iata_code)
+    if not airport:
+        print(f"❌ Airport not found in database: {iata_code.upper().strip()}")
+    return airport
 
 # =============================================================================
 # HELPER FUNCTIONS
 # =============================================================================
 
 def get_airport_by_iata(iata_code):
-    """Get airport by IATA code from database or airports data"""
+    """Get airport by IATA code from the airport registry"""
     if not iata_code or iata_code == 'Unknown':
         return None
     
-    iata_code = iata_code.upper().strip()
-    
-    # First try enhanced database
-    if ENHANCED_FEATURES_AVAILABLE:
-        try:
-            with next(get_enhanced_db()) as db:
-                airport = db.query(Airport).filter(Airport.iata_code == iata_code).first()
-                if airport:
-                    return airport
-        except Exception as e:
-            print(f"❌ Database error getting airport {iata_code}: {e}")
-    
-    # Fallback to AIRPORTS_DATA
-    for airport in AIRPORTS_DATA:
-        if airport.get('code') == iata_code:
-            # Create a simple airport object
-            class SimpleAirport:
-                def __init__(self, data):
-                    self.iata_code = data.get('code')
-                    self.name = data.get('name', 'Unknown Airport')
-                    self.city = data.get('city', 'Unknown')
-                    self.country = data.get('country', 'Unknown')
-                    self.latitude = data.get('latitude')
-                    self.longitude = data.get('longitude')
-            
-            return SimpleAirport(airport)
-    
-    print(f"❌ Airport not found: {iata_code}")
-    return None
+    airport = get_airport_registry().get(iata_code)
+    if not airport:
+        print(f"❌ Airport not found: {iata_code.upper().strip()}")
+    return airport
 
 def calculate_distance(lat1, lon1, lat2, lon2):
     """Calculate great circle distance between two points using Haversine formula"""
@@ -972,21 +1102,7 @@ def calculate_distance(lat1, lon1, lat2, lon2):
         if lat1 == 0 and lon1 == 0 or lat2 == 0 and lon2 == 0:
             return 0
         
-        # Haversine formula
-        R = 6371  # Earth's radius in kilometers
-        
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_lon = math.radians(lon2 - lon1)
-        
-        a = (math.sin(delta_lat/2) * math.sin(delta_lat/2) + 
-             math.cos(lat1_rad) * math.cos(lat2_rad) * 
-             math.sin(delta_lon/2) * math.sin(delta_lon/2))
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-        
-        distance_km = R * c
-        return distance_km
+        return haversine_degrees_km(lat1, lon1, lat2, lon2)
         
     except Exception as e:
         print(f"❌ Distance calculation error: {e}")
@@ -1019,16 +1135,8 @@ def extract_airport_code(text):
 def get_icao_emissions_with_session(departure, destination, passengers, round_trip, cabin_class):
     """Alternative approach using session to maintain cookies"""
     
-    ICAO_API_URL = "https://icec.icao.int/Home/PassengerCompute"
-    
     try:
-        # Create a session to handle cookies
-        session = requests.Session()
-        
-        # First, visit the calculator page to get session cookies
-        print("🔄 Getting session cookies from ICAO...")
-        session.get("https://icec.icao.int/calculator", timeout=10)
-        
+        # The shared client primes and refreshes session cookies itself
         # Prepare request data
         icao_data = {
             "AirportCodeDeparture": departure.upper(),
@@ -1040,17 +1148,8 @@ def get_icao_emissions_with_session(departure, destination, passengers, round_tr
             "NumberOfPassenger": passengers
         }
         
-        headers = {
-            "Content-Type": "application/json; charset=UTF-8",
-            "Accept": "application/json, text/javascript, */*; q=0.01",
-            "X-Requested-With": "XMLHttpRequest",
-            "Origin": "https://icec.icao.int",
-            "Referer": "https://icec.icao.int/calculator",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        
         print(f"🔍 Calling ICAO API for {departure} -> {destination}")
-        response = session.post(ICAO_API_URL, json=icao_data, headers=headers, timeout=30)
+        response = get_icao_client().compute(icao_data)
         
         print(f"📡 ICAO API Response Status: {response.status_code}")
         
@@ -1070,120 +1169,253 @@ def get_icao_emissions_with_session(departure, destination, passengers, round_tr
 # AUTOMATION ENDPOINTS FOR FRONTEND
 # =============================================================================
 
+def results_query(db):
+    """Calculations newest first with both airport codes loaded through one joined query"""
+    return db.query(EnhancedFlightCalculation)\
+        .options(
+            joinedload(EnhancedFlightCalculation.departure_airport).load_only(Airport.iata_code),
+            joinedload(EnhancedFlightCalculation.destination_airport).load_only(Airport.iata_code)
+        )\
+        .order_by(EnhancedFlightCalculation.created_at.desc(), EnhancedFlightCalculation.id.desc())
+
 @app.route('/api/v2/automation/results', methods=['GET'])
 def get_automation_results():
-    """Get automation results - works with both SQLite and SQL Server - FIXED VERBOSE LOGGING"""
+    """
+    Get automation results - works with both SQLite and SQL Server.
+    Results come in keyset pages, newest first: ?limit= sets the page size
+    (capped at RESULTS_MAX_PAGE_SIZE) and ?cursor= takes the next_cursor of
+    the previous page.
+    """
     try:
         if not ENHANCED_FEATURES_AVAILABLE:
             return jsonify({"error": "Enhanced features not available", "results": []}), 400
+        
+        limit = request.args.get('limit', type=int)
+        cursor = request.args.get('cursor')
             
         with next(get_enhanced_db()) as db:
-            # Use the same FlightCalculation model for both databases
-            calculations = db.query(EnhancedFlightCalculation)\
-                .order_by(EnhancedFlightCalculation.created_at.desc())\
-                .all()
-            
-            # Only log on first call or when count changes significantly
-            static_count = getattr(get_automation_results, '_last_count', 0)
-            if len(calculations) != static_count:
-                print(f"🔍 Found {len(calculations)} calculations in automation database")
-                get_automation_results._last_count = len(calculations)
-            
-            results = []
-            for calc in calculations:
-                try:
-                    # Use the model's to_dict method (works for both schemas)
-                    result = calc.to_dict()
-                    results.append(result)
-                    # REMOVED: The verbose "✅ Processed: X -> Y" logging for each calculation
-                    
-                except Exception as e:
-                    print(f"❌ Error processing calculation {calc.id}: {e}")
-                    continue
+            try:
+                calculations, limit, next_cursor = fetch_results_page(results_query(db), limit, cursor)
+            except ValueError as e:
+                return jsonify({"error": str(e), "results": []}), 400
             
-            # Only log success message occasionally
-            import random
-            if random.random() < 0.1:  # 10% chance to log
-                print(f"🎯 Successfully processed {len(results)} calculations for API response")
-                
-            return jsonify(results)
+            return jsonify({
+                'results': [calc.to_dict() for calc in calculations],
+                'limit': limit,
+                'has_more': next_cursor is not None,
+                'next_cursor': next_cursor
+            })
             
     except Exception as e:
         print(f"💥 Error in automation results: {e}")
         return jsonify({"error": str(e), "results": []}), 500
     
+@app.route('/api/v2/airports/search', methods=['GET'])
+def search_airports_endpoint():
+    """Typeahead airport search answered from the in-memory index, never the database"""
+    query = request.args.get('q', '').strip()
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
+
+    matches = get_airport_search_index().search(query, limit) if query else []
+    return jsonify({
+        'success': True,
+        'query': query,
+        'count': len(matches),
+        'airports': [dict(record.to_dict(), rank=rank) for rank, record in matches]
+    })
+
+def query_airports_list(db):
+    """Every airport as a dict, ordered by IATA code - works with both SQLite and SQL Server"""
+    try:
+        # Try to use the Airport model
+        airports = db.query(Airport).order_by(Airport.iata_code).all()
+        return [airport.to_dict() for airport in airports]
+        
+    except Exception as model_error:
+        print(f"⚠️ Model query failed, trying raw SQL: {model_error}")
+        # Fallback to raw SQL
+        try:
+            # Detect database type and use appropriate query
+            if 'sqlite' in str(db.bind.url).lower():
+                result = db.execute(text("""
+                    SELECT iata_code, name, city, country, latitude, longitude
+                    FROM airports 
+                    ORDER BY iata_code
+                """))
+            else:
+                # SQL Server
+                result = db.execute(text("""
+                    SELECT iata_code, name, city, country, latitude, longitude, search_field
+                    FROM airports 
+                    ORDER BY iata_code
+                """))
+            
+            airports_list = []
+            for row in result:
+                if len(row) >= 6:  # SQLite has 6 columns
+                    airport_data = {
+                        'iata_code': row[0],
+                        'name': row[1] or f"{row[0]} Airport",
+                        'city': row[2] or 'Unknown',
+                        'country': row[3] or 'Unknown',
+                        'latitude': row[4],
+                        'longitude': row[5],
+                        'search': f"{row[2] or 'Unknown'}, {row[3] or 'Unknown'} ({row[0]})"
+                    }
+                else:  # SQL Server has more columns
+                    airport_data = {
+                        'iata_code': row[0],
+                        'name': row[1] or f"{row[0]} Airport",
+                        'city': row[2] or 'Unknown',
+                        'country': row[3] or 'Unknown',
+                        'latitude': row[4],
+                        'longitude': row[5],
+                        'search': row[6] or f"{row[2] or 'Unknown'}, {row[3] or 'Unknown'} ({row[0]})"
+                    }
+                airports_list.append(airport_data)
+            return airports_list
+                
+        except Exception as sql_error:
+            raise RuntimeError(f'Both model and SQL queries failed: {sql_error}') from sql_error
+
 @app.route('/api/v2/automation/airports-list', methods=['GET'])
 def get_automation_airports_list():
-    """Get airports list - works with both SQLite and SQL Server"""
+    """
+    Get airports list. The serialized body is cached against the airport
+    registry version with gzip/brotli variants; repeat loads get a 304.
+    """
     try:
         if not ENHANCED_FEATURES_AVAILABLE:
             return jsonify({'error': 'Enhanced features not available'}), 400
-            
-        with next(get_enhanced_db()) as db:
-            try:
-                # Try to use the Airport model
-                airports = db.query(Airport).order_by(Airport.iata_code).all()
-                airports_list = [airport.to_dict() for airport in airports]
-                
-            except Exception as model_error:
-                print(f"⚠️ Model query failed, trying raw SQL: {model_error}")
-                # Fallback to raw SQL
-                try:
-                    # Detect database type and use appropriate query
-                    if 'sqlite' in str(db.bind.url).lower():
-                        result = db.execute(text("""
-                            SELECT iata_code, name, city, country, latitude, longitude
-                            FROM airports 
-                            ORDER BY iata_code
-                        """))
-                    else:
-                        # SQL Server
-                        result = db.execute(text("""
-                            SELECT iata_code, name, city, country, latitude, longitude, search_field
-                            FROM airports 
-                            ORDER BY iata_code
-                        """))
-                    
-                    airports_list = []
-                    for row in result:
-                        if len(row) >= 6:  # SQLite has 6 columns
-                            airport_data = {
-                                'iata_code': row[0],
-                                'name': row[1] or f"{row[0]} Airport",
-                                'city': row[2] or 'Unknown',
-                                'country': row[3] or 'Unknown',
-                                'latitude': row[4],
-                                'longitude': row[5],
-                                'search': f"{row[2] or 'Unknown'}, {row[3] or 'Unknown'} ({row[0]})"
-                            }
-                        else:  # SQL Server has more columns
-                            airport_data = {
-                                'iata_code': row[0],
-                                'name': row[1] or f"{row[0]} Airport",
-                                'city': row[2] or 'Unknown',
-                                'country': row[3] or 'Unknown',
-                                'latitude': row[4],
-                                'longitude': row[5],
-                                'search': row[6] or f"{row[2] or 'Unknown'}, {row[3] or 'Unknown'} ({row[0]})"
-                            }
-                        airports_list.append(airport_data)
-                        
-                except Exception as sql_error:
-                    return jsonify({'error': f'Both model and SQL queries failed: {sql_error}'}), 500
-            
-            return jsonify({
+        
+        def build_payload():
+            with next(get_enhanced_db()) as db:
+                airports_list = query_airports_list(db)
+            return app.json.dumps({
                 'success': True,
                 'total_airports': len(airports_list),
                 'airports': airports_list
-            })
+            }).encode('utf-8')
+        
+        payload = get_airports_list_cache().get(get_airport_registry().version, build_payload)
+        return payload.respond(request, max_age=config_manager.config.airports.list_max_age_seconds)
                 
     except Exception as e:
         print(f"❌ Error in automation airports list: {e}")
         return jsonify({'error': str(e)}), 500
 
+def apply_calculation_filters(query, filters):
+    """Apply export/delete filters to a FlightCalculation query or select()"""
+    model = EnhancedFlightCalculation
+    
+    if filters.get('date_range'):
+        start_date = filters['date_range'].get('start')
+        end_date = filters['date_range'].get('end')
+        if start_date:
+            query = query.filter(model.created_at >= start_date)
+        if end_date:
+            query = query.filter(model.created_at <= end_date)
+    
+    if filters.get('cabin_class'):
+        query = query.filter(model.cabin_class == filters['cabin_class'])
+    
+    if filters.get('data_source'):
+        query = query.filter(model.calculation_method == filters['data_source'])
+    
+    # Airport codes resolve to ids through the registry, so no join is needed
+    registry = get_airport_registry()
+    for key, column in (('departure', model.departure_airport_id), ('destination', model.destination_airport_id)):
+        if filters.get(key):
+            airport_id = registry.get_id(filters[key])
+            if airport_id is None:
+                # An unknown code matches nothing; comparing with None would select rows with no airport
+                return query.filter(false())
+            query = query.filter(column == airport_id)
+    
+    return query
+
+EXPORT_CSV_COLUMNS = [
+    'id', 'departure', 'destination', 'passengers', 'round_trip', 'cabin_class',
+    'distance_km', 'distance_miles', 'fuel_burn_kg', 'total_co2_kg', 'co2_per_passenger_kg',
+    'co2_tonnes', 'calculation_method', 'data_source', 'flight_info', 'created_at',
+    'departure_airport_id', 'destination_airport_id', 'export_timestamp', 'batch_parameters'
+]
+EXPORT_STREAM_CHUNK_ROWS = 1000
+
+def stream_export_csv(filters, batch_params):
+    """Stream filtered calculations as CSV straight from a server-side cursor"""
+    model = EnhancedFlightCalculation
+    departure_airport = aliased(Airport)
+    destination_airport = aliased(Airport)
+    
+    statement = select(
+        model.id, departure_airport.iata_code, destination_airport.iata_code,
+        model.passengers, model.round_trip, model.cabin_class,
+        model.distance_km, model.distance_miles, model.fuel_burn_kg, model.total_co2_kg,
+        model.co2_per_passenger_kg, model.co2_tonnes, model.calculation_method,
+        model.flight_info, model.created_at, model.departure_airport_id, model.destination_airport_id
+    )\
+        .outerjoin(departure_airport, model.departure_airport_id == departure_airport.id)\
+        .outerjoin(destination_airport, model.destination_airport_id == destination_airport.id)\
+        .order_by(model.created_at.desc(), model.id.desc())
+    statement = apply_calculation_filters(statement, filters)
+    
+    export_timestamp = datetime.now().isoformat()
+    batch_parameters = json.dumps(batch_params)
+    
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        
+        # Add metadata header
+        buffer.write("# Flight CO2 Calculator - Export Data\n")
+        buffer.write(f"# Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        buffer.write(f"# Batch Parameters: {json.dumps(batch_params, indent=2)}\n")
+        buffer.write(f"# Filters Applied: {json.dumps(filters, indent=2)}\n")
+        buffer.write("# \n")
+        writer.writerow(EXPORT_CSV_COLUMNS)
+        
+        with next(get_enhanced_db()) as db:
+            result = db.execute(statement.execution_options(stream_results=True, yield_per=EXPORT_STREAM_CHUNK_ROWS))
+            for rows in result.partitions():
+                for (calc_id, departure, destination, passengers, round_trip, cabin_class,
+                     distance_km, distance_miles, fuel_burn_kg, total_co2_kg, co2_per_passenger_kg,
+                     co2_tonnes, calculation_method, flight_info, created_at,
+                     departure_airport_id, destination_airport_id) in rows:
+                    departure = departure or 'Unknown'
+                    destination = destination or 'Unknown'
+                    writer.writerow([
+                        calc_id, departure, destination, passengers, round_trip, cabin_class,
+                        distance_km, distance_miles, fuel_burn_kg, total_co2_kg, co2_per_passenger_kg,
+                        co2_tonnes, calculation_method, model.data_source_for(calculation_method),
+                        flight_info or f"{departure} to {destination} - {distance_km}km",
+                        created_at.isoformat() if created_at else None,
+                        departure_airport_id, destination_airport_id, export_timestamp, batch_parameters
+                    ])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        
+        if buffer.tell():
+            yield buffer.getvalue()
+    
+    filename = f'flight_emissions_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
 @app.route('/api/v2/automation/export', methods=['POST', 'OPTIONS'])
 def export_automation_results():
-    """Export automation results in various formats"""
+    """
+    Export automation results in various formats.
+    With "mode": "server" the rows are read from the database using
+    "filters" instead of being posted back by the client.
+    """
     if request.method == 'OPTIONS':
         return '', 200
         
@@ -1194,10 +1426,19 @@ def export_automation_results():
         filters = data.get('filters', {})
         batch_params = data.get('batchParams', {})
         
+        if data.get('mode') == 'server':
+            if not ENHANCED_FEATURES_AVAILABLE:
+                return jsonify({'error': 'Enhanced features not available'}), 400
+            if export_format != 'csv':
+                return jsonify({'error': 'Server-side export supports csv only'}), 400
+            return stream_export_csv(filters, batch_params)
+        
         if not results_data:
             return jsonify({'error': 'No data to export'}), 400
         
         # Convert to DataFrame for easier manipulation
+        # pandas (and reportlab/openpyxl below) load on the first export, not at startup
+        import pandas as pd
         df = pd.DataFrame(results_data)
         
         # Add metadata columns
@@ -1250,6 +1491,7 @@ def export_csv(df, filters, batch_params):
 def export_excel(df, filters, batch_params):
     """Export results as Excel file"""
     try:
+        import pandas as pd
         output = io.BytesIO()
         
         # Create Excel writer
@@ -1304,6 +1546,10 @@ def export_excel(df, filters, batch_params):
 def export_single_page_pdf(df, filters, batch_params):
     """Export results as PDF report with full data table"""
     try:
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter)
         elements = []
@@ -1473,6 +1719,10 @@ def export_single_page_pdf(df, filters, batch_params):
 def export_pdf(df, filters, batch_params):
     """Export results as PDF report with full data table and pagination"""
     try:
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter)
         elements = []
@@ -1642,11 +1892,11 @@ def delete_multiple_calculations():
         with next(get_enhanced_db()) as db:
             from database.models import FlightCalculation as EnhancedFlightCalculation
             
-            # Delete calculations
-            delete_count = db.query(EnhancedFlightCalculation)\
-                .filter(EnhancedFlightCalculation.id.in_(calculation_ids))\
-                .delete(synchronize_session=False)
+            existing_ids = [calc_id for (calc_id,) in db.query(EnhancedFlightCalculation.id)
+                            .filter(EnhancedFlightCalculation.id.in_(calculation_ids))]
             
+            # Delete calculations
+            delete_count = delete_calculations(db, existing_ids)
             db.commit()
             
             logger.info(f"✅ Successfully deleted {delete_count} calculations")
@@ -1679,8 +1929,9 @@ def delete_all_calculations():
             # Get count before deletion for reporting
             total_count = db.query(EnhancedFlightCalculation).count()
             
-            # Delete all calculations
+            # Delete all calculations; the feed gets a single reset marker
             delete_count = db.query(EnhancedFlightCalculation).delete()
+            record_changes(db, None, CHANGE_RESET)
             db.commit()
             
             logger.info(f"✅ Successfully deleted {delete_count} calculations (of {total_count} total)")
@@ -1711,31 +1962,14 @@ def delete_by_filters():
             return jsonify({'error': 'Enhanced features not available'}), 400
             
         with next(get_enhanced_db()) as db:
-            from database.models import FlightCalculation as EnhancedFlightCalculation
-            from sqlalchemy import and_, or_
-            
-            query = db.query(EnhancedFlightCalculation)
+            query = apply_calculation_filters(db.query(EnhancedFlightCalculation), filters)
             
-            # Apply filters
-            if filters.get('date_range'):
-                start_date = filters['date_range'].get('start')
-                end_date = filters['date_range'].get('end')
-                if start_date:
-                    query = query.filter(EnhancedFlightCalculation.created_at >= start_date)
-                if end_date:
-                    query = query.filter(EnhancedFlightCalculation.created_at <= end_date)
-            
-            if filters.get('cabin_class'):
-                query = query.filter(EnhancedFlightCalculation.cabin_class == filters['cabin_class'])
-            
-            if filters.get('data_source'):
-                query = query.filter(EnhancedFlightCalculation.calculation_method == filters['data_source'])
-            
-            # Get count before deletion
-            count_before = query.count()
+            # Get matching ids before deletion
+            matched_ids = [calc_id for (calc_id,) in query.with_entities(EnhancedFlightCalculation.id)]
+            count_before = len(matched_ids)
             
             # Perform deletion
-            delete_count = query.delete(synchronize_session=False)
+            delete_count = delete_calculations(db, matched_ids)
             db.commit()
             
             logger.info(f"✅ Successfully deleted {delete_count} calculations with filters")
@@ -1772,16 +2006,13 @@ def delete_older_than():
             
             cutoff_date = datetime.utcnow() - timedelta(days=days)
             
-            # Get count before deletion
-            count_before = db.query(EnhancedFlightCalculation)\
-                .filter(EnhancedFlightCalculation.created_at < cutoff_date)\
-                .count()
+            # Get matching ids before deletion
+            matched_ids = [calc_id for (calc_id,) in db.query(EnhancedFlightCalculation.id)
+                           .filter(EnhancedFlightCalculation.created_at < cutoff_date)]
+            count_before = len(matched_ids)
             
             # Perform deletion
-            delete_count = db.query(EnhancedFlightCalculation)\
-                .filter(EnhancedFlightCalculation.created_at < cutoff_date)\
-                .delete(synchronize_session=False)
-            
+            delete_count = delete_calculations(db, matched_ids)
             db.commit()
             
             logger.info(f"✅ Successfully deleted {delete_count} calculations older than {days} days")
@@ -1800,6 +2031,7 @@ def delete_older_than():
 
 def format_date_for_pdf(date_value):
     """Helper function to format dates for PDF display"""
+    import pandas as pd
     if not date_value or pd.isna(date_value):
         return 'N/A'
     
@@ -1818,81 +2050,43 @@ def format_date_for_pdf(date_value):
     except:
         return str(date_value)[:10]
 
+SQL_EXPORT_COLUMNS = [
+    'id', 'departure', 'destination', 'passengers', 'round_trip', 'cabin_class',
+    'fuel_burn_kg', 'total_co2_kg', 'co2_per_passenger_kg', 'co2_tonnes',
+    'distance_km', 'distance_miles', 'flight_info', 'created_at',
+    'calculation_method', 'data_source'
+]
+
 def export_sql_server(df, filters, batch_params):
-    """Export results as SQL Server INSERT statements"""
+    """Export results as a streamed SQL Server INSERT script"""
     try:
-        # Generate SQL Server INSERT statements from the DataFrame
-        insert_statements = []
+        from services.sql_script import iter_sql_script
         table_name = "flight_calculations"
-        
-        # SQL Server compatible column mapping
-        column_mapping = {
-            'id': 'id',
-            'departure': 'departure',
-            'destination': 'destination', 
-            'passengers': 'passengers',
-            'round_trip': 'round_trip',
-            'cabin_class': 'cabin_class',
-            'fuel_burn_kg': 'fuel_burn_kg',
-            'total_co2_kg': 'total_co2_kg',
-            'co2_per_passenger_kg': 'co2_per_passenger_kg',
-            'co2_tonnes': 'co2_tonnes',
-            'distance_km': 'distance_km',
-            'distance_miles': 'distance_miles',
-            'flight_info': 'flight_info',
-            'created_at': 'created_at',
-            'calculation_method': 'calculation_method',
-            'data_source': 'data_source'
-        }
-        
-        for _, row in df.iterrows():
-            values = []
-            columns_used = []
-            
-            for df_col, sql_col in column_mapping.items():
-                if df_col in row:
-                    value = row[df_col]
-                    columns_used.append(f"[{sql_col}]")
-                    
-                    if pd.isna(value) or value is None:
-                        values.append("NULL")
-                    elif isinstance(value, str):
-                        # Escape single quotes for SQL
-                        escaped_value = value.replace("'", "''")
-                        values.append(f"'{escaped_value}'")
-                    elif isinstance(value, (int, float)):
-                        values.append(str(value))
-                    elif isinstance(value, bool):
-                        values.append("1" if value else "0")
-                    else:
-                        # Convert any other type to string
-                        values.append(f"'{str(value)}'")
-            
-            columns_str = ", ".join(columns_used)
-            values_str = ", ".join(values)
-            
-            insert_stmt = f"INSERT INTO [{table_name}] ({columns_str}) VALUES ({values_str});"
-            insert_statements.append(insert_stmt)
-        
-        # Generate the complete SQL file content
+        columns = [column for column in SQL_EXPORT_COLUMNS if column in df.columns]
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        sql_content = generate_sql_file_content(insert_statements, len(df), filters, batch_params, timestamp)
         
-        return jsonify({
-            'sql_content': sql_content,
-            'filename': f'flight_calculations_sql_server_{timestamp}.sql',
-            'row_count': len(insert_statements),
-            'timestamp': timestamp
-        })
+        # Missing values become NULL instead of NaN
+        rows = df[columns].astype(object).where(df[columns].notna(), None).itertuples(index=False, name=None)
+        script = iter_sql_script(
+            table_name, columns, rows,
+            header=sql_file_header(len(df), filters, batch_params, timestamp),
+            footer=sql_file_footer(),
+            identity_insert='id' in columns
+        )
+        
+        return Response(
+            script,
+            mimetype='application/sql',
+            headers={'Content-Disposition': f'attachment; filename=flight_calculations_sql_server_{timestamp}.sql'}
+        )
         
     except Exception as e:
         logger.error(f"❌ SQL Server export error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-def generate_sql_file_content(insert_statements, row_count, filters, batch_params, timestamp):
-    """Generate complete SQL file with headers and metadata"""
-    
-    sql_content = f"""-- SQL Server INSERT statements for table: flight_calculations
+def sql_file_header(row_count, filters, batch_params, timestamp):
+    """Metadata header for the results SQL export"""
+    return f"""-- SQL Server INSERT statements for table: flight_calculations
 -- Generated by Flight CO2 Calculator
 -- Export Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 -- Total Rows: {row_count}
@@ -1900,20 +2094,11 @@ def generate_sql_file_content(insert_statements, row_count, filters, batch_param
 -- Filters Applied: {json.dumps(filters, indent=2)}
 -- File Generated: {timestamp}
 
--- Enable identity insert to preserve original IDs (if needed)
-SET IDENTITY_INSERT [flight_calculations] ON;
-
--- Insert statements
 """
 
-    # Add all INSERT statements
-    for stmt in insert_statements:
-        sql_content += stmt + "\n"
-
-    sql_content += """
--- Disable identity insert after import
-SET IDENTITY_INSERT [flight_calculations] OFF;
-
+def sql_file_footer():
+    """Verification query appended to the results SQL export"""
+    return """
 -- Verification query
 SELECT 
     COUNT(*) as TotalRows,
@@ -1924,90 +2109,60 @@ FROM [flight_calculations];
 -- Export completed successfully
 """
 
-    return sql_content
-
 # Optional: Add direct SQLite to SQL Server export endpoint
 @app.route('/api/v2/automation/export-sqlite-to-sqlserver', methods=['POST', 'OPTIONS'])
 def export_sqlite_to_sqlserver():
-    """Export directly from SQLite database to SQL Server INSERT scripts"""
+    """Stream the SQLite flight_calculations table as a SQL Server migration script"""
     if request.method == 'OPTIONS':
         return '', 200
         
     try:
+        from services.sql_script import iter_cursor_rows, iter_sql_script
         # Get the SQLite database path from config
         sqlite_db_path = 'flight_calculator.db'  # Adjust path as needed
         
         if not os.path.exists(sqlite_db_path):
             return jsonify({'error': 'SQLite database not found'}), 404
         
-        # Connect to SQLite database
+        # Read the table structure up front so errors still return JSON
         sqlite_conn = sqlite3.connect(sqlite_db_path)
-        sqlite_cursor = sqlite_conn.cursor()
+        try:
+            columns_info = sqlite_conn.execute("PRAGMA table_info(flight_calculations)").fetchall()
+            row_count = sqlite_conn.execute("SELECT COUNT(*) FROM flight_calculations").fetchone()[0]
+        finally:
+            sqlite_conn.close()
         
-        # Get table structure
-        sqlite_cursor.execute("PRAGMA table_info(flight_calculations)")
-        columns_info = sqlite_cursor.fetchall()
         columns = [row[1] for row in columns_info]
-        
-        # Get all data
-        sqlite_cursor.execute("SELECT * FROM flight_calculations")
-        rows = sqlite_cursor.fetchall()
-        
-        # Generate SQL Server INSERT statements
-        insert_statements = []
-        table_name = "flight_calculations"
-        
-        for row in rows:
-            values = []
-            for i, value in enumerate(row):
-                col_name = columns[i]
-                
-                if value is None:
-                    values.append("NULL")
-                elif isinstance(value, str):
-                    escaped_value = value.replace("'", "''")
-                    values.append(f"'{escaped_value}'")
-                elif isinstance(value, int):
-                    values.append(str(value))
-                elif isinstance(value, float):
-                    values.append(str(value))
-                elif isinstance(value, datetime):
-                    values.append(f"'{value.isoformat()}'")
-                elif isinstance(value, bool):
-                    values.append("1" if value else "0")
-                else:
-                    values.append(f"'{str(value)}'")
-            
-            columns_str = ", ".join([f"[{col}]" for col in columns])
-            values_str = ", ".join(values)
-            
-            insert_stmt = f"INSERT INTO [{table_name}] ({columns_str}) VALUES ({values_str});"
-            insert_statements.append(insert_stmt)
-        
-        sqlite_conn.close()
-        
-        # Generate complete SQL file
+        has_identity = any(col[5] > 0 for col in columns_info if col[1] == 'id')
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        sql_content = generate_complete_sql_export(insert_statements, len(rows), columns_info, timestamp)
+        
+        def generate():
+            conn = sqlite3.connect(sqlite_db_path)
+            try:
+                cursor = conn.execute("SELECT * FROM flight_calculations")
+                yield from iter_sql_script(
+                    'flight_calculations', columns, iter_cursor_rows(cursor),
+                    header=complete_sql_export_header(row_count, timestamp),
+                    footer=complete_sql_export_footer(row_count),
+                    identity_insert=has_identity
+                )
+            finally:
+                conn.close()
         
         # Return as downloadable file
-        return send_file(
-            io.BytesIO(sql_content.encode('utf-8')),
+        return Response(
+            generate(),
             mimetype='application/sql',
-            as_attachment=True,
-            download_name=f'sqlserver_export_complete_{timestamp}.sql'
+            headers={'Content-Disposition': f'attachment; filename=sqlserver_export_complete_{timestamp}.sql'}
         )
         
     except Exception as e:
         logger.error(f"❌ SQLite to SQL Server export error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-def generate_complete_sql_export(insert_statements, row_count, columns_info, timestamp):
-    """Generate complete SQL export with metadata and summary"""
-    
-    has_identity = any(col[5] > 0 for col in columns_info if col[1] == 'id')
-    
-    sql_content = f"""-- SQL Server Migration Script
+def complete_sql_export_header(row_count, timestamp):
+    """Metadata and CREATE TABLE header for the SQLite migration script"""
+    return f"""-- SQL Server Migration Script
 -- Flight CO2 Calculator Database Export
 -- Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 -- Source: SQLite database
@@ -2035,24 +2190,14 @@ CREATE TABLE [flight_calculations] (
     [calculation_method] NVARCHAR(50),
     [data_source] NVARCHAR(50)
 );
+GO
 
+-- Data insertion
 """
 
-    if has_identity:
-        sql_content += "-- Enable identity insert to preserve original IDs\n"
-        sql_content += "SET IDENTITY_INSERT [flight_calculations] ON;\n\n"
-
-    # Add INSERT statements
-    sql_content += "-- Data insertion\n"
-    for stmt in insert_statements:
-        sql_content += stmt + "\n"
-
-    if has_identity:
-        sql_content += "\n-- Disable identity insert\n"
-        sql_content += "SET IDENTITY_INSERT [flight_calculations] OFF;\n"
-
-    # Add verification and summary
-    sql_content += f"""
+def complete_sql_export_footer(row_count):
+    """Verification and summary queries for the SQLite migration script"""
+    return f"""
 -- Verification and summary
 SELECT 
     'Migration Summary' as Info,
@@ -2073,7 +2218,31 @@ GROUP BY cabin_class;
 -- Migration completed successfully
 """
 
-    return sql_content
+@app.route('/api/v2/automation/replicate', methods=['POST', 'OPTIONS'])
+def replicate_to_sql_server():
+    """Copy rows added since the last run from SQLite to the replication target"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        replication_config = config_manager.config.replication
+        from services.replication import replicate_exclusive
+        stats = replicate_exclusive(
+            target_url=data.get('target_url') or replication_config.target_url,
+            source_path=replication_config.source_path,
+            chunk_size=data.get('chunk_size') or replication_config.chunk_size
+        )
+        if stats is None:
+            return jsonify({'error': 'Replication already in progress'}), 409
+        
+        return jsonify({'success': True, **stats})
+    
+    except (ValueError, FileNotFoundError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"❌ Replication error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/api/v2/automation/cleanup', methods=['POST'])
 def cleanup_automation():
@@ -2118,99 +2287,62 @@ def populate_airports():
                 'error': 'No airports data available. Please check if airports.js is accessible.'
             }), 400
                 
-        with next(get_enhanced_db()) as db:
-            airport_service = AirportService(db)
-            
-            airports_created = 0
-            airports_updated = 0
-            airports_skipped = 0
-            airports_with_errors = 0
-            
-            for i, airport_data in enumerate(AIRPORTS_DATA):
-                try:
-                    # Validate required fields - use iata_code instead of code
-                    if not airport_data.get('code'):
-                        print(f"⚠️ Skipping airport without code at index {i}")
-                        airports_skipped += 1
-                        continue
-                    
-                    # Check if airport exists using iata_code
-                    existing = airport_service.get_airport_by_code(airport_data['code'])
-                    
-                    # Prepare airport data with correct field names
-                    iata_code = airport_data['code']
-                    name = airport_data.get('name', f"{iata_code} Airport")
-                    city = airport_data.get('city', 'Unknown')
-                    country = airport_data.get('country', 'Unknown')
-                    
-                    # Handle coordinate conversion - convert to float or None
-                    latitude = airport_data.get('latitude')
-                    if latitude is None or latitude == '':
-                        latitude = None  # Use None instead of empty string
-                    else:
-                        try:
-                            latitude = float(latitude)
-                        except (ValueError, TypeError):
-                            latitude = None
-                    
-                    longitude = airport_data.get('longitude')
-                    if longitude is None or longitude == '':
-                        longitude = None  # Use None instead of empty string
-                    else:
-                        try:
-                            longitude = float(longitude)
-                        except (ValueError, TypeError):
-                            longitude = None
-                    
-                    # Use search field or create default
-                    search = airport_data.get('search', f"{city}, {country} ({iata_code})")
-                    
-                    if not existing:
-                        # Create the airport with correct field names
-                        new_airport = Airport(
-                            iata_code=iata_code,
-                            name=name,
-                            city=city,
-                            country=country,
-                            latitude=latitude,
-                            longitude=longitude,
-                            search=search
-                        )
-                        db.add(new_airport)
-                        airports_created += 1
-                        print(f"✅ Created airport: {iata_code}")
-                    else:
-                        # Update existing airport - always update since we want to populate coordinates
-                        existing.name = name
-                        existing.city = city
-                        existing.country = country
-                        existing.latitude = latitude
-                        existing.longitude = longitude
-                        existing.search = search
-                        airports_updated += 1
-                        print(f"🔄 Updated airport: {iata_code}")
-                            
-                except Exception as e:
-                    print(f"❌ Error processing airport {airport_data.get('code', 'Unknown')} at index {i}: {str(e)}")
-                    airports_with_errors += 1
+        airports_skipped = 0
+        airports_with_errors = 0
+        rows = []
+        
+        for i, airport_data in enumerate(AIRPORTS_DATA):
+            try:
+                # Validate required fields - use iata_code instead of code
+                iata_code = airport_data.get('code')
+                if not iata_code:
+                    print(f"⚠️ Skipping airport without code at index {i}")
+                    airports_skipped += 1
                     continue
                 
-                # Commit in batches to avoid memory issues
-                if (airports_created + airports_updated) % 100 == 0:
-                    db.commit()
-                    print(f"🔄 Committed {airports_created + airports_updated} airports so far...")
-            
-            db.commit()
-            
-            return jsonify({
-                'success': True,
-                'message': f'Airports populated: {airports_created} created, {airports_updated} updated, {airports_skipped} skipped, {airports_with_errors} errors',
-                'airports_created': airports_created,
-                'airports_updated': airports_updated,
-                'airports_skipped': airports_skipped,
-                'airports_with_errors': airports_with_errors,
-                'total_processed': len(AIRPORTS_DATA)
-            })
+                city = airport_data.get('city', 'Unknown')
+                country = airport_data.get('country', 'Unknown')
+                
+                # Handle coordinate conversion - convert to float or None
+                coordinates = []
+                for key in ('latitude', 'longitude'):
+                    value = airport_data.get(key)
+                    try:
+                        coordinates.append(None if value is None or value == '' else float(value))
+                    except (ValueError, TypeError):
+                        coordinates.append(None)
+                
+                rows.append({
+                    'iata_code': iata_code,
+                    'name': airport_data.get('name', f"{iata_code} Airport"),
+                    'city': city,
+                    'country': country,
+                    'latitude': coordinates[0],
+                    'longitude': coordinates[1],
+                    # Use search field or create default
+                    'search_field': airport_data.get('search', f"{city}, {country} ({iata_code})")
+                })
+            except Exception as e:
+                print(f"❌ Error processing airport {airport_data.get('code', 'Unknown')} at index {i}: {str(e)}")
+                airports_with_errors += 1
+        
+        with next(get_enhanced_db()) as db:
+            # One read of the existing codes, then bulk upserts of only what changed;
+            # existing airports are always refreshed so coordinates get populated
+            result = AirportService(db).upsert_airports(rows, update_columns=(
+                'name', 'city', 'country', 'latitude', 'longitude', 'search_field'
+            ))
+        
+        return jsonify({
+            'success': True,
+            'message': f'Airports populated: {result.created} created, {result.updated} updated, {result.unchanged} unchanged, {airports_skipped} skipped, {airports_with_errors} errors',
+            'airports_created': result.created,
+            'airports_updated': result.updated,
+            'airports_unchanged': result.unchanged,
+            'airports_skipped': airports_skipped,
+            'airports_with_errors': airports_with_errors,
+            'total_processed': len(AIRPORTS_DATA)
+        })
                 
     except Exception as e:
         print(f"❌ Error in populate_airports: {e}")
@@ -2222,112 +2354,8 @@ def populate_airports():
 # ICAO CALCULATION FUNCTIONS (KEEP THESE)
 # =============================================================================
 
-# WITH NO FALLBACK IF ICAO FAILES
-def get_icao_emissions(departure, destination, passengers, round_trip, cabin_class):
-    """Get real emissions data from ICAO API - STRICT MODE: No fallbacks"""
-    
-    ICAO_API_URL = "https://icec.icao.int/Home/PassengerCompute"
-    
-    try:
-        print(f"🎯 Starting ICAO API call for {departure} -> {destination}")
-        
-        # CORRECTED: Map cabin class to ICAO numeric format
-        cabin_class_mapping = {
-            "economy": 0,        # ICAO uses 0 for Economy
-            "premium_economy": 1, # ICAO uses 1 for Premium Economy
-            "business": 2,        # ICAO uses 2 for Business
-            "first": 3            # ICAO uses 3 for First
-        }
-        
-        icao_cabin_class = cabin_class_mapping.get(cabin_class, 0)
-        
-        # Get airport names from database or use fallback
-        dep_airport = get_airport_by_iata(departure)
-        dest_airport = get_airport_by_iata(destination)
-        
-        departure_name = f"{departure.upper()} Airport"
-        destination_name = f"{destination.upper()} Airport"
-        
-        if dep_airport and hasattr(dep_airport, 'name') and dep_airport.name:
-            departure_name = dep_airport.name
-        if dest_airport and hasattr(dest_airport, 'name') and dest_airport.name:
-            destination_name = dest_airport.name
-        
-        # CORRECTED: Prepare proper ICAO API payload
-        icao_data = {
-            "AirportCodeDeparture": departure.upper(),
-            "AirportCodeDestination": [destination.upper()],
-            "CabinClass": icao_cabin_class,  # Now sending numeric value
-            "Departure": departure_name,      # Full airport name
-            "Destination": [destination_name], # Full airport name in array
-            "IsRoundTrip": round_trip,
-            "NumberOfPassenger": passengers
-        }
-
-        print(f"📤 Payload: {icao_data}")
-        
-        # Headers that match what the ICAO website sends
-        headers = {
-            "Content-Type": "application/json; charset=UTF-8",
-            "Accept": "application/json, text/javascript, */*; q=0.01",
-            "X-Requested-With": "XMLHttpRequest",
-            "Origin": "https://icec.icao.int",
-            "Referer": "https://icec.icao.int/calculator",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36",
-            "Sec-Ch-Ua": '"Google Chrome";v="141", "Not?A_Brand";v="8", "Chromium";v="141"',
-            "Sec-Ch-Ua-Mobile": "?0",
-            "Sec-Ch-Ua-Platform": '"Windows"',
-            "Sec-Fetch-Dest": "empty",
-            "Sec-Fetch-Mode": "cors", 
-            "Sec-Fetch-Site": "same-origin"
-        }
-        
-        print("🔄 Sending request to ICAO API...")
-        
-        response = requests.post(
-            ICAO_API_URL, 
-            json=icao_data, 
-            headers=headers,
-            timeout=30
-        )
-        
-        print(f"📡 ICAO API Response Status: {response.status_code}")
-        
-        if response.status_code == 200:
-            # Check if response is HTML instead of JSON
-            if response.text.strip().startswith('<!DOCTYPE html>') or response.text.strip().startswith('<html'):
-                print(f"❌ ICAO API returned HTML instead of JSON for {departure}->{destination}")
-                print(f"📄 Response preview: {response.text[:200]}...")
-                # STRICT MODE: Don't fallback, raise exception
-                raise Exception(f"ICAO API returned HTML instead of JSON")
-            
-            try:
-                icao_result = response.json()
-                print("✅ ICAO API call successful, parsing response...")
-                return parse_icao_response(icao_result, departure, destination, passengers, round_trip, cabin_class)
-            except json.JSONDecodeError as e:
-                print(f"❌ JSON decode error for {departure}->{destination}: {e}")
-                print(f"📄 Response text: {response.text[:500]}...")
-                # STRICT MODE: Don't fallback, raise exception
-                raise Exception(f"ICAO API returned invalid JSON: {e}")
-        else:
-            print(f"❌ ICAO API returned status {response.status_code}")
-            print(f"Response text: {response.text[:500]}...")
-            # STRICT MODE: Don't fallback, raise exception
-            raise Exception(f"ICAO API returned status {response.status_code}")
-            
-    except requests.exceptions.Timeout:
-        print("❌ ICAO API timeout")
-        raise Exception("ICAO API timeout - no fallback calculation performed")
-    except requests.exceptions.ConnectionError:
-        print("❌ ICAO API connection error")
-        raise Exception("ICAO API connection error - no fallback calculation performed")
-    except Exception as e:
-        print(f"❌ ICAO API error: {e}")
-        import traceback
-        print(f"Full traceback: {traceback.format_exc()}")
-        # STRICT MODE: Re-raise the exception instead of falling back
-        raise
+# get_icao_emissions and the ICAO response parsing live in services/icao_emissions.py,
+# where the batch workers can reach them without importing this module
 
 # # WITH FALLBACK IF ICAO FAILES
 # def get_icao_emissions(departure, destination, passengers, round_trip, cabin_class):
@@ -2432,155 +2460,53 @@ def get_icao_emissions(departure, destination, passengers, round_trip, cabin_cla
 #         print(f"Full traceback: {traceback.format_exc()}")
 #         return get_fallback_icao_data(departure, destination, passengers, round_trip, cabin_class)
 
-def parse_icao_response(icao_response, departure, destination, passengers, round_trip, cabin_class):
-    """Parse the ICAO API response into our format"""
-    
-    print("🔍 Parsing ICAO API response...")
-    
-    # Find the correct result based on cabin class
-    cabin_class_mapping = {
-        "economy": 0,
-        "premium_economy": 1, 
-        "business": 2,
-        "first": 3
-    }
-
-    icao_cabin_class = cabin_class_mapping.get(cabin_class, 0)
-
-    # Find the result for our cabin class
-    result_summary = None
-    for summary in icao_response.get('resultSummary', []):
-        if summary.get('cabinClass') == icao_cabin_class and summary.get('isClassFound', False):
-            result_summary = summary
-            break
-    
-    # If exact cabin class not found, use economy (class 0) as fallback
-    if not result_summary:
-        for summary in icao_response.get('resultSummary', []):
-            if summary.get('cabinClass') == 0 and summary.get('isClassFound', False):
-                result_summary = summary
-                break
-    
-    if not result_summary:
-        print("❌ No valid results found in ICAO response")
-        raise ValueError("No valid results found in ICAO response")
-    
-    print(f"✅ Found result summary for cabin class {icao_cabin_class}")
-    
-    # Calculate totals from legs
-    total_co2 = 0
-    total_fuel = 0
-    total_distance = 0
-    
-    for leg in result_summary.get('details', []):
-        total_co2 += leg.get('co2', 0)
-        total_fuel += leg.get('avgFuel', 0)
-        total_distance += leg.get('tripDistance', 0)
-    
-    print(f"📊 Raw totals - CO2: {total_co2}, Fuel: {total_fuel}, Distance: {total_distance}")
-    
-    # ICAO gives per-passenger CO2 directly in their API response
-    co2_per_passenger = total_co2
-    total_co2_for_passengers = co2_per_passenger * passengers
-    
-    # Calculate fuel allocation per passenger (derived from CO2)
-    fuel_per_passenger = total_co2 / 3.16  # Convert CO2 back to fuel using ICAO factor
-    total_fuel_for_passengers = fuel_per_passenger * passengers
-
-    print(f"🎯 Final calculation - CO2 per passenger: {co2_per_passenger}, Fuel per passenger: {fuel_per_passenger}")
-
-    result = {
-        'fuel_burn_kg': round(total_fuel_for_passengers),
-        'total_co2_kg': round(total_co2_for_passengers),
-        'co2_per_passenger_kg': round(co2_per_passenger),
-        'co2_tonnes': round(total_co2_for_passengers / 1000, 3),
-        'distance_km': round(total_distance),
-        'distance_miles': round(total_distance * 0.621371),
-        'cabin_class': cabin_class,
-        'data_source': 'ICAO_API',
-        'aircraft_fuel_total_kg': round(total_fuel),
-        'aircraft_co2_total_kg': round(total_co2 * 3.16),
-        'avg_seats': result_summary['details'][0].get('avgSeats', 242) if result_summary.get('details') else 242,
-        'fleet': result_summary['details'][0].get('fleet', '') if result_summary.get('details') else ''
-    }
-    
-    print(f"✅ Parsed result: {result}")
-    return result
-
 def get_fallback_icao_data(departure, destination, passengers, round_trip, cabin_class):
     """Fallback calculation when ICAO API is unavailable"""
-    # Use our previous accurate calculation as fallback
-    distance_km = calculate_great_circle_distance(departure, destination)
-    
-    if distance_km == 0:
-        # Use average distance if calculation fails
-        distance_km = 1000
-    
-    CO2_PER_KG_FUEL = 3.16
-    BASE_FUEL_PER_PAX_KM = 0.01766
-    
-    cabin_multipliers = {
-        "economy": 1.0,
-        "premium_economy": 1.3,
-        "business": 1.8,
-        "first": 2.5
-    }
-    
-    multiplier = cabin_multipliers.get(cabin_class.lower(), 1.0)
-    
-    fuel_per_passenger_one_way = distance_km * BASE_FUEL_PER_PAX_KM * multiplier
-    
-    if round_trip:
-        fuel_per_passenger_total = fuel_per_passenger_one_way * 2
-        co2_per_passenger = fuel_per_passenger_total * CO2_PER_KG_FUEL
-    else:
-        fuel_per_passenger_total = fuel_per_passenger_one_way
-        co2_per_passenger = fuel_per_passenger_one_way * CO2_PER_KG_FUEL
-    
-    total_co2 = co2_per_passenger * passengers
-    total_fuel = fuel_per_passenger_total * passengers
-
-    return {
-        'fuel_burn_kg': round(total_fuel),
-        'total_co2_kg': round(total_co2),
-        'co2_per_passenger_kg': round(co2_per_passenger),
-        'co2_tonnes': round(total_co2 / 1000, 3),
-        'distance_km': round(distance_km),
-        'distance_miles': round(distance_km * 0.621371),
-        'cabin_class': cabin_class,
-        'data_source': 'FALLBACK_CALCULATION'
-    }
+    return get_fallback_icao_data_batch([{
+        'departure': departure,
+        'destination': destination,
+        'passengers': passengers,
+        'round_trip': round_trip,
+        'cabin_class': cabin_class
+    }])[0]
+
+def get_fallback_icao_data_batch(routes):
+    """Fallback calculation for a whole batch of routes in one vectorized pass"""
+    if not routes:
+        return []
+    
+    distances = great_circle_km_batch(
+        [extract_route_code(route['departure']) for route in routes],
+        [extract_route_code(route['destination']) for route in routes]
+    )
+    
+    # Use average distance if calculation fails
+    distances[distances == 0] = 1000
+    
+    return fallback_emissions_batch(
+        distances,
+        [route['passengers'] for route in routes],
+        [route['round_trip'] for route in routes],
+        [route['cabin_class'] for route in routes],
+        'FALLBACK_CALCULATION'
+    )
+
+def extract_route_code(airport):
+    """Extract airport codes (handle cases like "JFK" or "New York (JFK)")"""
+    airport = airport.upper()
+    return airport.rstrip(')')[-3:] if '(' in airport else airport
 
 def calculate_great_circle_distance(departure, destination):
     """Calculate great circle distance between airports in km using Haversine formula"""
     try:
-        # Extract airport codes (handle cases like "JFK" or "New York (JFK)")
-        dep_code = departure.upper()[-3:] if '(' in departure else departure.upper()
-        dest_code = destination.upper()[-3:] if '(' in destination else destination.upper()
+        dep_code = extract_route_code(departure)
+        dest_code = extract_route_code(destination)
         
-        # Get coordinates
-        lat1, lon1 = get_airport_coordinates(dep_code)
-        lat2, lon2 = get_airport_coordinates(dest_code)
+        distance_km = great_circle_km(dep_code, dest_code)
         
         # If coordinates not found, return 0
-        if lat1 == 0 and lon1 == 0 or lat2 == 0 and lon2 == 0:
+        if distance_km == 0:
             print(f"Warning: Coordinates not found for {dep_code} or {dest_code}")
-            return 0
-        
-        # Haversine formula
-        R = 6371  # Earth's radius in km
-        
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_lon = math.radians(lon2 - lon1)
-        
-        a = (math.sin(delta_lat/2) * math.sin(delta_lat/2) + 
-             math.cos(lat1_rad) * math.cos(lat2_rad) * 
-             math.sin(delta_lon/2) * math.sin(delta_lon/2))
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-        
-        distance_km = R * c
         return distance_km
         
     except Exception as e:
@@ -2588,24 +2514,8 @@ def calculate_great_circle_distance(departure, destination):
         return 0
 
 def get_airport_coordinates(airport_code):
-    """Get airport coordinates from ICAO database or fallback"""
-    # First try to get from your enhanced database
-    if ENHANCED_FEATURES_AVAILABLE:
-        try:
-            with next(get_enhanced_db()) as db:
-                airport_service = AirportService(db)
-                airport = airport_service.get_airport_by_code(airport_code)
-                if airport and airport.latitude and airport.longitude:
-                    return (airport.latitude, airport.longitude)
-        except:
-            pass
-    
-    # Fallback to our airports data
-    for airport in AIRPORTS_DATA:
-        if airport['code'] == airport_code.upper():
-            return (airport['latitude'], airport['longitude'])
-    
-    return (0, 0)
+    """Get airport coordinates from the airport registry"""
+    return get_airport_registry().coordinates(airport_code) or (0, 0)
 
 # =============================================================================
 # BASIC TEST ENDPOINTS (KEEP THESE)
@@ -2784,4 +2694,8 @@ def home():
     return jsonify({'message': 'Flight CO₂ Calculator API - ICAO Methodology'})
     
 if __name__ == '__main__':
+    # The debug reloader re-runs this file in a child process that does the serving;
+    # only that child starts automation, so the watching parent never processes files
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_automation()
     app.run(debug=True, port=8080, host='0.0.0.0')
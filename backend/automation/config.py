@@ -18,6 +18,14 @@ class SchedulerConfig:
     # File patterns
     CSV_PATTERN = "*.csv"
     
+    # Files processed in parallel; each worker has its own DB session
+    WORKERS = int(os.getenv('SCHEDULER_WORKERS', '2'))
+    
+    # Start files as soon as they land in SCHEDULED_DIR instead of waiting for the schedule
+    WATCH_ENABLED = os.getenv('SCHEDULER_WATCH', 'true').lower() == 'true'
+    WATCH_SETTLE_SECONDS = float(os.getenv('SCHEDULER_WATCH_SETTLE_SECONDS', '0.5'))
+    WATCH_POLL_SECONDS = float(os.getenv('SCHEDULER_WATCH_POLL_SECONDS', '2'))
+    
     @classmethod
     def ensure_directories(cls):
         """Create all required directories"""
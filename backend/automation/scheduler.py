@@ -1,14 +1,18 @@
-import schedule
 import time
 import threading
 import logging
 import os
+import queue
 import shutil
 from datetime import datetime
 from glob import glob
-from sqlalchemy.orm import Session
+from itertools import count
+from sqlalchemy.orm import Session, sessionmaker
 from services.batch_service import DirectBatchService as BatchService
+from services.csv_stream import estimate_csv_rows
+from services.progress import ProgressTracker, get_progress_tracker
 from .config import SchedulerConfig
+from .watcher import DirectoryWatcher
 
 logger = logging.getLogger(__name__)
 
@@ -17,12 +21,25 @@ class SimpleScheduler:
     Simple scheduler for processing CSV files on daily, weekly, or monthly basis
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, session_factory=None, workers: int = None):
         self.db = db
         self.batch_service = BatchService(db)
+        # Workers never share a session; each file gets its own from the factory
+        self.session_factory = session_factory or sessionmaker(bind=db.get_bind())
+        self.workers = max(1, workers or SchedulerConfig.WORKERS)
+        self.active_progress = {}  # filename -> ProgressTracker of files being processed
+        self.run_totals = None
+        self.run_totals_lock = threading.Lock()  # Guards run_totals, active_progress and queued_files
+        # Long-lived workers take files from one queue, smallest first, wherever they were queued from
+        self.file_queue = queue.PriorityQueue()
+        self.queue_sequence = count()
+        self.queued_files = set()  # Absolute paths waiting in the queue or being processed
+        self.worker_threads = []
+        self.workers_stop = threading.Event()
         self.is_running = False
         self.scheduler_thread = None
-        self.processing_lock = threading.Lock()  # Add lock to prevent concurrent processing
+        self.stop_event = threading.Event()
+        self.watcher = None
         self.processed_files_cache = set()  # Track processed files to prevent reprocessing
         self.last_run_time = None
         self.next_run_time = None
@@ -55,44 +72,142 @@ class SimpleScheduler:
             logger.error(f"❌ Failed to move file {source_path}: {e}")
             return False
 
-    def process_pending_files(self, force_process=False):
-        """Process all CSV files in the scheduled directory - UPDATED WITH FORCE PROCESS"""
-        # Use lock to prevent concurrent processing
-        if not self.processing_lock.acquire(blocking=False):
-            logger.info("Processing already in progress, skipping...")
-            return
-            
+    def process_pending_files(self, force_process=False, wait=False):
+        """Queue all CSV files in the scheduled directory for the workers - UPDATED WITH FORCE PROCESS"""
+        pattern = os.path.join(SchedulerConfig.SCHEDULED_DIR, SchedulerConfig.CSV_PATTERN)
+        csv_files = glob(pattern)
+        
+        # Files still being written are left for the watcher to release
+        if self.watcher:
+            settling = self.watcher.settling()
+            csv_files = [f for f in csv_files if os.path.abspath(f) not in settling]
+        
+        if force_process:
+            logger.info("🔄 Force processing all files (ignoring cache)")
+        
+        queued = sum(1 for path in csv_files if self.enqueue_file(path, force_process=force_process))
+        if queued:
+            logger.info(f"Queued {queued} new CSV file(s) for processing")
+        else:
+            logger.debug("No new CSV files to process")
+        
+        if wait:
+            self.file_queue.join()
+        
+        with self.run_totals_lock:
+            pending = len(self.queued_files)
+        return {'queued_files': queued, 'pending_files': pending}
+    
+    def enqueue_file(self, file_path, force_process=False):
+        """
+        Hand one CSV file to the worker pool. Files already queued or being
+        processed are skipped, as are files processed this session unless
+        force_process is set. Returns True if the file was queued.
+        """
+        file_path = os.path.abspath(file_path)
+        filename = os.path.basename(file_path)
+        if not force_process and filename in self.processed_files_cache:
+            return False
         try:
-            pattern = os.path.join(SchedulerConfig.SCHEDULED_DIR, SchedulerConfig.CSV_PATTERN)
-            csv_files = glob(pattern)
-            
-            if not csv_files:
-                logger.debug("No CSV files found to process")
-                return
-            
-            # If force_process is True, process ALL files regardless of cache
-            if force_process:
-                logger.info("🔄 Force processing all files (ignoring cache)")
-                new_csv_files = csv_files
-            else:
-                # Filter out files that have already been processed in this session
-                new_csv_files = [f for f in csv_files if os.path.basename(f) not in self.processed_files_cache]
-            
-            if not new_csv_files:
-                logger.debug("No new CSV files to process (all files already processed)")
+            size = os.path.getsize(file_path)
+        except OSError:
+            return False
+        # Sampled from the head of the file; the exact count comes from the workers as they read
+        rows = estimate_csv_rows(file_path)
+        
+        with self.run_totals_lock:
+            if file_path in self.queued_files:
+                return False
+            self.queued_files.add(file_path)
+            self.processed_files_cache.discard(filename)
+            new_run = self.run_totals is None
+            if new_run:
+                self.run_totals = {
+                    'files': 0, 'done_files': 0, 'total_rows': 0,
+                    'processed_rows': 0, 'error_rows': 0
+                }
+            self.run_totals['files'] += 1
+            self.run_totals['total_rows'] += rows
+        
+        if new_run:
+            get_progress_tracker().reset()
+        self._publish_run_progress()
+        
+        # Shortest job first, so small files are not stuck behind a huge one
+        self.file_queue.put((size, next(self.queue_sequence), file_path))
+        self._ensure_workers()
+        return True
+    
+    def _ensure_workers(self):
+        with self.run_totals_lock:
+            self.worker_threads = [thread for thread in self.worker_threads if thread.is_alive()]
+            while len(self.worker_threads) < self.workers:
+                thread = threading.Thread(target=self._worker_loop, name=f'batch-worker-{len(self.worker_threads)}', daemon=True)
+                self.worker_threads.append(thread)
+                thread.start()
+    
+    def _worker_loop(self):
+        """Process queued files until the scheduler is stopped"""
+        while not self.workers_stop.is_set():
+            try:
+                _, _, file_path = self.file_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                if os.path.exists(file_path):
+                    self._process_single_file(file_path)
+            except Exception as e:
+                logger.error(f"❌ Worker failed on {file_path}: {e}")
+            finally:
+                with self.run_totals_lock:
+                    self.queued_files.discard(file_path)
+                    # The run ends when the queue drains; taken under the lock so a file queued
+                    # at the same moment starts a new run instead of joining a finished one
+                    finished = self.run_totals if not self.queued_files else None
+                    if finished:
+                        self.run_totals = None
+                if finished:
+                    self._finish_run_progress(finished)
+                    self.last_run_time = datetime.now()
+                self.file_queue.task_done()
+    
+    def _publish_run_progress(self):
+        """Roll the per-file trackers up into the shared progress"""
+        with self.run_totals_lock:
+            if not self.run_totals:
                 return
-            
-            logger.info(f"Found {len(new_csv_files)} new CSV file(s) to process")
-            
-            for csv_file in new_csv_files:
-                self._process_single_file(csv_file)
-                
-            self.last_run_time = datetime.now()
-                
-        except Exception as e:
-            logger.error(f"Error in process_pending_files: {str(e)}")
-        finally:
-            self.processing_lock.release()
+            totals = dict(self.run_totals)
+            active = list(self.active_progress.values())
+        processed_rows = totals['processed_rows']
+        error_rows = totals['error_rows']
+        for tracker in active:
+            counts = tracker.counts()
+            processed_rows += counts['processed_rows']
+            error_rows += counts['error_rows']
+        total_rows = max(totals['total_rows'], processed_rows + error_rows)
+        get_progress_tracker().update(
+            status='processing',
+            current_row=processed_rows + error_rows,
+            total_rows=total_rows,
+            processed_rows=processed_rows,
+            error_rows=error_rows,
+            progress_percent=round((processed_rows + error_rows) / total_rows * 100, 1) if total_rows else 0,
+            message=f"{totals['done_files']}/{totals['files']} files done, {len(active)} in progress, "
+                    f"{totals['files'] - totals['done_files'] - len(active)} queued - "
+                    f"{processed_rows} successful, {error_rows} failed"
+        )
+    
+    def _finish_run_progress(self, totals):
+        processed_rows, error_rows = totals['processed_rows'], totals['error_rows']
+        get_progress_tracker().update(
+            status='completed',
+            current_row=processed_rows + error_rows,
+            total_rows=processed_rows + error_rows,
+            processed_rows=processed_rows,
+            error_rows=error_rows,
+            progress_percent=100,
+            message=f"Processed {totals['files']} file(s): {processed_rows} successful, {error_rows} errors"
+        )
     
     def _process_single_file(self, file_path: str):
         """Process a single CSV file and move it to appropriate directory"""
@@ -102,15 +217,33 @@ class SimpleScheduler:
             logger.info(f"🔄 Processing file: {filename}")
             logger.info(f"📋 Using batch parameters: {self.current_batch_params}")
             
-            # Process the CSV file with batch parameters
-            result = self.batch_service.process_flight_csv(
-                file_path, 
-                batch_params=self.current_batch_params  # PASS BATCH PARAMS
-            )
+            # Each worker owns its session and reports into its own tracker
+            tracker = ProgressTracker(on_publish=self._publish_run_progress)
+            with self.run_totals_lock:
+                self.active_progress[filename] = tracker
+            try:
+                with self.session_factory() as db:
+                    result = BatchService(db, progress=tracker).process_flight_csv(
+                        file_path, 
+                        batch_params=self.current_batch_params  # PASS BATCH PARAMS
+                    )
+            finally:
+                counts = tracker.counts()
+                with self.run_totals_lock:
+                    self.active_progress.pop(filename, None)
+                    if self.run_totals:
+                        self.run_totals['done_files'] += 1
+                        self.run_totals['processed_rows'] += counts['processed_rows']
+                        self.run_totals['error_rows'] += counts['error_rows']
+                self._publish_run_progress()
             
             # Add to processed cache to prevent reprocessing in automated runs
             self.processed_files_cache.add(filename)
             
+            dedup = result.get('dedup')
+            if dedup:
+                logger.info(f"🔁 {filename}: {dedup['route_rows']} routes collapsed to {dedup['unique_routes']} ICAO lookups ({dedup['dedup_ratio']}x)")
+            
             # Determine destination directory based on success rate
             successful = result.get('processed_rows', 0)
             failed = result.get('error_rows', 0)
@@ -191,12 +324,14 @@ class SimpleScheduler:
     
     def start_daily(self, hour: int = 2, minute: int = 0):
         """Start daily processing at specified time"""
+        import schedule
         schedule.every().day.at(f"{hour:02d}:{minute:02d}").do(self.process_pending_files)
         self.next_run_time = f"Daily at {hour:02d}:{minute:02d}"
         logger.info(f"⏰ Daily schedule set for {hour:02d}:{minute:02d}")
     
     def start_weekly(self, day: str = "monday", hour: int = 2, minute: int = 0):
         """Start weekly processing on specified day and time"""
+        import schedule
         getattr(schedule.every(), day).at(f"{hour:02d}:{minute:02d}").do(self.process_pending_files)
         self.next_run_time = f"Weekly on {day} at {hour:02d}:{minute:02d}"
         logger.info(f"⏰ Weekly schedule set for every {day} at {hour:02d}:{minute:02d}")
@@ -207,10 +342,35 @@ class SimpleScheduler:
             if datetime.now().day == day:
                 self.process_pending_files()
         
+        import schedule
         schedule.every().day.at(f"{hour:02d}:{minute:02d}").do(monthly_job)
         self.next_run_time = f"Monthly on day {day} at {hour:02d}:{minute:02d}"
         logger.info(f"⏰ Monthly schedule set for day {day} at {hour:02d}:{minute:02d}")
     
+    def _on_file_ready(self, path):
+        logger.info(f"📥 Upload complete: {os.path.basename(path)}")
+        self.enqueue_file(path)
+    
+    def start_watching(self):
+        """Start processing uploads as soon as they are fully written"""
+        if self.watcher:
+            return
+        self.watcher = DirectoryWatcher(
+            SchedulerConfig.SCHEDULED_DIR,
+            SchedulerConfig.CSV_PATTERN,
+            on_ready=self._on_file_ready,
+            settle_seconds=SchedulerConfig.WATCH_SETTLE_SECONDS,
+            poll_seconds=SchedulerConfig.WATCH_POLL_SECONDS
+        )
+        self.watcher.start()
+    
+    def _seconds_until_next_job(self):
+        import schedule
+        idle = schedule.idle_seconds()
+        if idle is None:
+            return 60
+        return min(max(idle, 1), 60)
+    
     def start_scheduler(self):
         """Start the scheduler thread"""
         if self.is_running:
@@ -218,34 +378,55 @@ class SimpleScheduler:
             return
         
         self.is_running = True
+        self.stop_event.clear()
         
         def run_scheduler():
             logger.info("🔌 Scheduler thread started")
             while self.is_running:
                 try:
+                    import schedule
                     schedule.run_pending()
                 except Exception as e:
                     logger.error(f"❌ Scheduler error: {e}")
-                time.sleep(60)  # Check every minute
+                # Sleep until the next job is due (at most a minute) or the scheduler stops
+                self.stop_event.wait(self._seconds_until_next_job())
         
         self.scheduler_thread = threading.Thread(target=run_scheduler)
         self.scheduler_thread.daemon = True
         self.scheduler_thread.start()
+        self._ensure_workers()
+        
+        if SchedulerConfig.WATCH_ENABLED:
+            self.start_watching()
         
         logger.info("✅ Scheduler started")
     
     def stop_scheduler(self):
         """Stop the scheduler"""
         self.is_running = False
-        if self.scheduler_thread:
-            self.scheduler_thread.join(timeout=10)
+        self.stop_event.set()
+        if self.watcher:
+            self.watcher.stop()
+            self.watcher = None
+        # Workers finish the file in hand; files still queued wait for the next start
+        self.workers_stop.set()
+        for thread in [self.scheduler_thread, *self.worker_threads]:
+            if thread:
+                thread.join(timeout=10)
+        self.worker_threads = []
+        self.workers_stop.clear()
         logger.info("🛑 Scheduler stopped")
     
     def get_cache_info(self):
         """Get information about processed files cache"""
         return {
+            'workers': self.workers,
+            'active_files': {name: tracker.counts() for name, tracker in list(self.active_progress.items())},
+            'queued_files': sorted(os.path.basename(path) for path in list(self.queued_files)
+                                   if os.path.basename(path) not in self.active_progress),
             'cache_size': len(self.processed_files_cache),
             'processed_files': list(self.processed_files_cache),
             'last_run': self.last_run_time.isoformat() if self.last_run_time else 'Never',
-            'next_run': self.next_run_time or 'Not scheduled'
+            'next_run': self.next_run_time or 'Not scheduled',
+            'watcher': self.watcher.status() if self.watcher else None
         }
\ No newline at end of file
@@ -0,0 +1,236 @@
+import ctypes
+import ctypes.util
+import errno
+import fnmatch
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0o2000000)
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+READ_BUFFER_SIZE = 64 * 1024
+
+
+class _Inotify:
+    """Minimal ctypes binding over the Linux inotify API for one directory"""
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f'inotify_add_watch failed for {directory}')
+
+    def read(self, timeout):
+        """(mask, name) pairs received within the timeout"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, READ_BUFFER_SIZE)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return []
+            raise
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            events.append((mask, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class DirectoryWatcher:
+    """
+    Watches a directory for matching files and calls on_ready(path) once each
+    new or rewritten file has stopped changing for settle_seconds. Uses inotify
+    on Linux and falls back to polling the directory everywhere else.
+    """
+
+    def __init__(self, directory, pattern, on_ready, settle_seconds=0.5, poll_seconds=2.0, use_inotify=True):
+        self.directory = os.path.abspath(directory)
+        self.pattern = pattern
+        self.on_ready = on_ready
+        self.settle_seconds = settle_seconds
+        self.poll_seconds = poll_seconds
+        self.use_inotify = use_inotify
+        self.backend = None
+        self._settling = {}  # path -> (signature, last activity)
+        self._known = {}  # path -> signature of files already reported ready
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _signature(self, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _matches(self, name):
+        return fnmatch.fnmatch(name, self.pattern)
+
+    def _touch(self, path, now):
+        """Record activity on a file; its settle timer restarts only if it changed"""
+        signature = self._signature(path)
+        with self._lock:
+            if signature is None:
+                self._settling.pop(path, None)
+                self._known.pop(path, None)
+                return
+            previous = self._settling[path][0] if path in self._settling else self._known.get(path)
+            if signature != previous:
+                self._settling[path] = (signature, now)
+
+    def _forget(self, path):
+        with self._lock:
+            self._settling.pop(path, None)
+            self._known.pop(path, None)
+
+    def _scan(self, now):
+        """Compare the directory listing against what has been seen so far"""
+        try:
+            names = [entry.name for entry in os.scandir(self.directory) if entry.is_file() and self._matches(entry.name)]
+        except FileNotFoundError:
+            names = []
+        present = {os.path.join(self.directory, name) for name in names}
+        for path in present:
+            self._touch(path, now)
+        with self._lock:
+            for path in [path for path in self._known if path not in present]:
+                del self._known[path]
+
+    def _release_settled(self, now):
+        """Report files unchanged for settle_seconds; returns seconds until the next check"""
+        ready = []
+        next_check = None
+        with self._lock:
+            candidates = list(self._settling.items())
+        for path, (signature, last_activity) in candidates:
+            wait = last_activity + self.settle_seconds - now
+            if wait <= 0:
+                current = self._signature(path)
+                with self._lock:
+                    if current is None:
+                        self._settling.pop(path, None)
+                        continue
+                    if current != signature:
+                        self._settling[path] = (current, now)
+                        wait = self.settle_seconds
+                    else:
+                        del self._settling[path]
+                        self._known[path] = current
+                        ready.append(path)
+                        continue
+            next_check = wait if next_check is None else min(next_check, wait)
+
+        for path in ready:
+            try:
+                self.on_ready(path)
+            except Exception as e:
+                logger.error(f"❌ Watcher callback failed for {path}: {e}")
+        return next_check
+
+    def _run_inotify(self, notifier):
+        while not self._stop_event.is_set():
+            next_check = self._release_settled(time.monotonic())
+            timeout = self.poll_seconds if next_check is None else min(next_check, self.poll_seconds)
+            events = notifier.read(max(timeout, 0.01))
+            now = time.monotonic()
+            for mask, name in events:
+                if mask & IN_Q_OVERFLOW:
+                    logger.warning("⚠️ inotify queue overflowed, rescanning directory")
+                    self._scan(now)
+                elif name and self._matches(name):
+                    path = os.path.join(self.directory, name)
+                    if mask & (IN_DELETE | IN_MOVED_FROM):
+                        self._forget(path)
+                    else:
+                        self._touch(path, now)
+
+    def _run_polling(self):
+        while not self._stop_event.is_set():
+            self._scan(time.monotonic())
+            next_check = self._release_settled(time.monotonic())
+            timeout = self.poll_seconds if next_check is None else min(next_check, self.poll_seconds)
+            self._stop_event.wait(max(timeout, 0.01))
+
+    def _run(self, notifier):
+        logger.info(f"👀 Watching {self.directory} for {self.pattern} ({self.backend})")
+        try:
+            if notifier:
+                self._run_inotify(notifier)
+            else:
+                self._run_polling()
+        except Exception as e:
+            logger.error(f"❌ Directory watcher stopped: {e}")
+        finally:
+            if notifier:
+                notifier.close()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._stop_event.clear()
+
+        notifier = None
+        if self.use_inotify and sys.platform.startswith('linux'):
+            try:
+                notifier = _Inotify(self.directory)
+            except (OSError, AttributeError) as e:
+                logger.warning(f"⚠️ inotify unavailable, polling instead: {e}")
+        self.backend = 'inotify' if notifier else 'polling'
+
+        # Files dropped while nothing was watching are picked up on start
+        self._scan(time.monotonic())
+        self._thread = threading.Thread(target=self._run, args=(notifier,), name='directory-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+
+    def settling(self):
+        """Paths seen but not yet stable, which must not be processed yet"""
+        with self._lock:
+            return set(self._settling)
+
+    def status(self):
+        return {
+            'backend': self.backend,
+            'directory': self.directory,
+            'pattern': self.pattern,
+            'settle_seconds': self.settle_seconds,
+            'settling_files': sorted(os.path.basename(path) for path in self.settling()),
+            'running': bool(self._thread and self._thread.is_alive())
+        }
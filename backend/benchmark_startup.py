@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Measure how long `import app` takes, the cost every worker pays on boot.
+Runs the import in fresh interpreters under `python -X importtime` and
+reports wall time, total import time and the slowest modules.
+
+  cold: no bytecode cache, as on the first boot of a new deploy
+  warm: bytecode cached, as when a worker restarts
+
+Usage: python benchmark_startup.py [--runs N] [--top N] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORT_STATEMENT = "import app"
+
+
+def parse_importtime(stderr):
+    """{module: (self_us, cumulative_us)} and the total for top-level imports"""
+    modules = {}
+    total_us = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        modules[name] = (int(self_us), int(cumulative_us))
+        if depth == 0:
+            total_us += int(cumulative_us)
+    return modules, total_us
+
+
+def run_once(pycache_prefix):
+    env = dict(os.environ, PYTHONPYCACHEPREFIX=pycache_prefix)
+    # Warm runs only mean something if the first import is allowed to write its bytecode
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', IMPORT_STATEMENT],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    wall_seconds = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"`{IMPORT_STATEMENT}` failed:\n{completed.stderr[-2000:]}")
+    modules, total_us = parse_importtime(completed.stderr)
+    return wall_seconds, total_us, modules
+
+
+def benchmark(runs, top):
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='importtime-') as cache_root:
+        for mode in ('cold', 'warm'):
+            walls, totals, slowest = [], [], {}
+            for run in range(runs):
+                # Cold runs each get an empty cache; warm runs share one filled by a first import
+                prefix = os.path.join(cache_root, f'cold-{run}') if mode == 'cold' else os.path.join(cache_root, 'warm')
+                if mode == 'warm' and run == 0:
+                    run_once(prefix)
+                wall_seconds, total_us, modules = run_once(prefix)
+                walls.append(wall_seconds)
+                totals.append(total_us)
+                for name, (self_us, cumulative_us) in modules.items():
+                    slowest.setdefault(name, []).append((self_us, cumulative_us))
+
+            ranked = sorted(
+                ((name, statistics.median(s for s, _ in times), statistics.median(c for _, c in times))
+                 for name, times in slowest.items()),
+                key=lambda item: item[1], reverse=True
+            )[:top]
+            results[mode] = {
+                'runs': runs,
+                'wall_seconds': round(statistics.median(walls), 3),
+                'import_seconds': round(statistics.median(totals) / 1e6, 3),
+                'slowest_modules': [
+                    {'module': name, 'self_ms': round(self_us / 1000, 1), 'cumulative_ms': round(cumulative_us / 1000, 1)}
+                    for name, self_us, cumulative_us in ranked
+                ]
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app.py cold start and worker boot time")
+    parser.add_argument('--runs', type=int, default=3, help="Interpreters to start per mode (median is reported)")
+    parser.add_argument('--top', type=int, default=15, help="Slowest modules to list, by self time")
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON for tracking")
+    args = parser.parse_args()
+
+    results = benchmark(max(1, args.runs), args.top)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for mode, result in results.items():
+        print(f"🚀 {mode}: {result['wall_seconds']:.3f}s wall, {result['import_seconds']:.3f}s importing "
+              f"(median of {result['runs']})")
+        for module in result['slowest_modules']:
+            print(f"   {module['self_ms']:8.1f} ms self {module['cumulative_ms']:9.1f} ms cumulative  {module['module']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+data/airports.bin is the one canonical copy of the shared airports list.
+This regenerates everything derived from it:
+
+  shared_airports.py                         Python list (fallback import)
+  ../frontend/src/data/airports.js           frontend module
+  ../frontend/sqlserver_all_airports_inserts.sql  SQL Server seed script
+
+Edit the data by importing an edited copy of either module, which repacks
+data/airports.bin before the artifacts are written.
+
+Usage: python build_airports.py [--from-js PATH | --from-py PATH]
+"""
+
+import argparse
+import importlib.util
+import os
+from datetime import datetime
+
+from services.airport_dataset import (
+    BACKEND_DIR, SQL_COLUMNS, load_airports_data, iter_airport_sql_rows, read_airports_js,
+    render_airports_js, render_airports_python, resolve_dataset_path, write_airport_dataset
+)
+from services.sql_script import iter_sql_script, write_sql_script
+
+PYTHON_ARTIFACT = os.path.join(BACKEND_DIR, 'shared_airports.py')
+JS_ARTIFACT = os.path.join(BACKEND_DIR, '..', 'frontend', 'src', 'data', 'airports.js')
+SQL_ARTIFACT = os.path.join(BACKEND_DIR, '..', 'frontend', 'sqlserver_all_airports_inserts.sql')
+
+
+def read_airports_py(path):
+    spec = importlib.util.spec_from_file_location('_airports_source', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.airports
+
+
+def import_airports(airports, dataset_path=None):
+    """Repack the dataset from a list of airport dicts"""
+    count = write_airport_dataset(airports, dataset_path)
+    print(f"✅ Packed {count} airports into {resolve_dataset_path(dataset_path)}")
+    return count
+
+
+def build_artifacts(dataset_path=None):
+    """Regenerate the Python, JS and SQL copies from the dataset"""
+    airports = list(load_airports_data(dataset_path))
+
+    with open(PYTHON_ARTIFACT, 'w', encoding='utf-8') as f:
+        f.write(render_airports_python(airports))
+    print(f"✅ Wrote {os.path.normpath(PYTHON_ARTIFACT)}")
+
+    with open(JS_ARTIFACT, 'w', encoding='utf-8') as f:
+        f.write(render_airports_js(airports))
+    print(f"✅ Wrote {os.path.normpath(JS_ARTIFACT)}")
+
+    header = (
+        "-- SQL Server INSERT statements for airports table\n"
+        f"-- Generated on: {datetime.now().isoformat()}\n"
+        f"-- Total airports: {len(airports)}\n"
+        "-- Source: backend/data/airports.bin\n\n"
+    )
+    write_sql_script(SQL_ARTIFACT, iter_sql_script(
+        'airports', SQL_COLUMNS, iter_airport_sql_rows(airports), header=header, identity_insert=True
+    ))
+    print(f"✅ Wrote {os.path.normpath(SQL_ARTIFACT)}")
+    return len(airports)
+
+
+def rebuild_from_js(js_path=JS_ARTIFACT):
+    """Repack the dataset from an airports.js module, then rewrite every artifact"""
+    import_airports(read_airports_js(js_path))
+    return build_artifacts()
+
+
+def rebuild_from_python(py_path=PYTHON_ARTIFACT):
+    """Repack the dataset from a shared_airports.py module, then rewrite every artifact"""
+    import_airports(read_airports_py(py_path))
+    return build_artifacts()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the shared airport artifacts from data/airports.bin")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--from-js', metavar='PATH', help="Repack the dataset from an airports.js module first")
+    source.add_argument('--from-py', metavar='PATH', help="Repack the dataset from a shared_airports.py module first")
+    args = parser.parse_args()
+
+    if args.from_js:
+        count = rebuild_from_js(args.from_js)
+    elif args.from_py:
+        count = rebuild_from_python(args.from_py)
+    else:
+        count = build_artifacts()
+    print(f"🎉 {count} airports")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Build the precomputed airport distance matrix used for fallback and
+validation distance lookups. Only rebuilds when the airport set changes.
+
+Usage: python build_distance_matrix.py [--force]
+"""
+
+import sys
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from config_manager import ConfigManager
+from services.airport_registry import get_airport_registry
+from services.airport_dataset import load_airports_data
+from services.distance_matrix import build_distance_matrix, read_matrix_meta
+
+
+def main():
+    force = '--force' in sys.argv[1:]
+
+    config_manager = ConfigManager()
+    config_manager.load_config()
+
+    try:
+        airports_data = load_airports_data()
+    except ImportError as e:
+        print(f"⚠️ Could not import shared_airports.py: {e}")
+        airports_data = []
+
+    registry = get_airport_registry()
+    try:
+        engine = create_engine(config_manager.config.database.connection_string)
+        with sessionmaker(bind=engine)() as db:
+            registry.load(db, airports_data)
+        print(f"✅ Loaded {len(registry)} airports from database and shared file")
+    except Exception as e:
+        print(f"⚠️ Database not available ({e}), using shared airports only")
+        registry.load(airports_data=airports_data)
+
+    matrix_path = config_manager.config.distance.matrix_path
+    if build_distance_matrix(matrix_path, force=force):
+        meta = read_matrix_meta(matrix_path)
+        print(f"✅ Distance matrix written to {matrix_path}")
+        print(f"📊 {meta['size']} airports, {meta['airports_with_coordinates']} with coordinates")
+    else:
+        print(f"✅ Distance matrix at {matrix_path} already matches the airport set")
+
+
+if __name__ == "__main__":
+    main()
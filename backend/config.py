@@ -39,12 +39,86 @@ class DatabaseConfig:
             return f"{base_conn}?{params}"
         else:
             raise ValueError(f"Unsupported database dialect: {self.dialect}")
+    
+    @property
+    def engine_options(self):
+        """Extra create_engine() arguments for the dialect"""
+        if self.dialect == "mssql":
+            # pyodbc sends executemany parameter sets in one round trip
+            return {"fast_executemany": True}
+        return {}
+
+@dataclass
+class ICAOConfig:
+    """ICAO API client and route cache settings"""
+    cache_path: str = "data/route_cache.db"
+    cache_ttl_days: int = 30
+    fetch_workers: int = 8
+    requests_per_second: float = 4.0
+    pool_size: int = 16
+    cookie_ttl_seconds: int = 1800
+    timeout_seconds: float = 30.0
+    max_concurrent: int = 8
+    min_requests_per_second: float = 0.5
+    max_requests_per_second: float = 8.0
+    latency_target_seconds: float = 5.0
+    breaker_failure_threshold: int = 5
+    breaker_cooldown_seconds: float = 30.0
+    max_park_seconds: float = 600.0
+    max_parked_rows: int = 100
+
+@dataclass
+class BatchConfig:
+    """Batch CSV processing settings"""
+    flush_size: int = 500
+    progress_stream_max_seconds: int = 300
+
+@dataclass
+class ReplicationConfig:
+    """SQLite to SQL Server replication settings"""
+    source_path: str = "flight_calculator.db"
+    target_url: Optional[str] = None
+    chunk_size: int = 5000
+
+@dataclass
+class DistanceConfig:
+    """Precomputed airport distance matrix settings"""
+    matrix_path: str = "data/distance_matrix.npy"
+    use_matrix: bool = True
+
+@dataclass
+class AirportsConfig:
+    """Shared airports dataset settings"""
+    dataset_path: str = "data/airports.bin"
+    list_max_age_seconds: int = 60
+
+@dataclass
+class ChangeFeedConfig:
+    """Retention of the calculation change feed and its SSE stream"""
+    retention_hours: int = 24
+    cursor_idle_seconds: int = 600
+    prune_interval_seconds: int = 600
+    stream_max_seconds: int = 300
+    commit_settle_seconds: int = 30
+
+@dataclass
+class EmissionsModelConfig:
+    """Offline emissions model fitted from cached ICAO answers"""
+    holdout_percent: int = 20
+    min_band_samples: int = 5
 
 class Config:
     """Main configuration class"""
     
     def __init__(self):
         self.database = DatabaseConfig()
+        self.icao = ICAOConfig()
+        self.distance = DistanceConfig()
+        self.batch = BatchConfig()
+        self.replication = ReplicationConfig()
+        self.emissions_model = EmissionsModelConfig()
+        self.airports = AirportsConfig()
+        self.change_feed = ChangeFeedConfig()
         self._load_from_env()
     
     def _load_from_env(self):
@@ -58,6 +132,51 @@ class Config:
         self.database.database = os.getenv('DB_NAME', 'flight_calculator')
         self.database.driver = os.getenv('DB_DRIVER', 'ODBC Driver 17 for SQL Server')
         self.database.extra = os.getenv('DB_EXTRA')
+        
+        # ICAO configuration
+        self.icao.cache_path = os.getenv('ICAO_CACHE_PATH', 'data/route_cache.db')
+        self.icao.cache_ttl_days = int(os.getenv('ICAO_CACHE_TTL_DAYS', '30'))
+        self.icao.fetch_workers = int(os.getenv('ICAO_FETCH_WORKERS', '8'))
+        self.icao.requests_per_second = float(os.getenv('ICAO_REQUESTS_PER_SECOND', '4'))
+        self.icao.pool_size = int(os.getenv('ICAO_POOL_SIZE', '16'))
+        self.icao.cookie_ttl_seconds = int(os.getenv('ICAO_COOKIE_TTL_SECONDS', '1800'))
+        self.icao.timeout_seconds = float(os.getenv('ICAO_TIMEOUT_SECONDS', '30'))
+        self.icao.max_concurrent = int(os.getenv('ICAO_MAX_CONCURRENT', '8'))
+        self.icao.min_requests_per_second = float(os.getenv('ICAO_MIN_REQUESTS_PER_SECOND', '0.5'))
+        self.icao.max_requests_per_second = float(os.getenv('ICAO_MAX_REQUESTS_PER_SECOND', '8'))
+        self.icao.latency_target_seconds = float(os.getenv('ICAO_LATENCY_TARGET_SECONDS', '5'))
+        self.icao.breaker_failure_threshold = int(os.getenv('ICAO_BREAKER_FAILURE_THRESHOLD', '5'))
+        self.icao.breaker_cooldown_seconds = float(os.getenv('ICAO_BREAKER_COOLDOWN_SECONDS', '30'))
+        self.icao.max_park_seconds = float(os.getenv('ICAO_MAX_PARK_SECONDS', '600'))
+        self.icao.max_parked_rows = int(os.getenv('ICAO_MAX_PARKED_ROWS', '100'))
+        
+        # Batch processing configuration
+        self.batch.flush_size = int(os.getenv('BATCH_FLUSH_SIZE', '500'))
+        self.batch.progress_stream_max_seconds = int(os.getenv('BATCH_PROGRESS_STREAM_MAX_SECONDS', '300'))
+        
+        # Replication configuration
+        self.replication.source_path = os.getenv('REPLICATION_SOURCE_PATH', 'flight_calculator.db')
+        self.replication.target_url = os.getenv('REPLICATION_TARGET_URL')
+        self.replication.chunk_size = int(os.getenv('REPLICATION_CHUNK_SIZE', '5000'))
+        
+        # Emissions model configuration
+        self.emissions_model.holdout_percent = int(os.getenv('EMISSIONS_MODEL_HOLDOUT_PERCENT', '20'))
+        self.emissions_model.min_band_samples = int(os.getenv('EMISSIONS_MODEL_MIN_BAND_SAMPLES', '5'))
+        
+        # Airports dataset configuration
+        self.airports.dataset_path = os.getenv('AIRPORTS_DATASET_PATH', 'data/airports.bin')
+        self.airports.list_max_age_seconds = int(os.getenv('AIRPORTS_LIST_MAX_AGE', '60'))
+        
+        # Change feed configuration
+        self.change_feed.retention_hours = int(os.getenv('CHANGE_FEED_RETENTION_HOURS', '24'))
+        self.change_feed.cursor_idle_seconds = int(os.getenv('CHANGE_FEED_CURSOR_IDLE_SECONDS', '600'))
+        self.change_feed.prune_interval_seconds = int(os.getenv('CHANGE_FEED_PRUNE_INTERVAL_SECONDS', '600'))
+        self.change_feed.stream_max_seconds = int(os.getenv('CHANGE_FEED_STREAM_MAX_SECONDS', '300'))
+        self.change_feed.commit_settle_seconds = int(os.getenv('CHANGE_FEED_COMMIT_SETTLE_SECONDS', '30'))
+        
+        # Distance matrix configuration
+        self.distance.matrix_path = os.getenv('DISTANCE_MATRIX_PATH', 'data/distance_matrix.npy')
+        self.distance.use_matrix = os.getenv('DISTANCE_MATRIX_ENABLED', 'true').lower() == 'true'
     
     def update_from_dict(self, config_dict: dict):
         """Update configuration from dictionary"""
@@ -66,6 +185,34 @@ class Config:
             for key, value in db_config.items():
                 if hasattr(self.database, key):
                     setattr(self.database, key, value)
+        if 'icao' in config_dict:
+            for key, value in config_dict['icao'].items():
+                if hasattr(self.icao, key):
+                    setattr(self.icao, key, value)
+        if 'batch' in config_dict:
+            for key, value in config_dict['batch'].items():
+                if hasattr(self.batch, key):
+                    setattr(self.batch, key, value)
+        if 'distance' in config_dict:
+            for key, value in config_dict['distance'].items():
+                if hasattr(self.distance, key):
+                    setattr(self.distance, key, value)
+        if 'replication' in config_dict:
+            for key, value in config_dict['replication'].items():
+                if hasattr(self.replication, key):
+                    setattr(self.replication, key, value)
+        if 'airports' in config_dict:
+            for key, value in config_dict['airports'].items():
+                if hasattr(self.airports, key):
+                    setattr(self.airports, key, value)
+        if 'emissions_model' in config_dict:
+            for key, value in config_dict['emissions_model'].items():
+                if hasattr(self.emissions_model, key):
+                    setattr(self.emissions_model, key, value)
+        if 'change_feed' in config_dict:
+            for key, value in config_dict['change_feed'].items():
+                if hasattr(self.change_feed, key):
+                    setattr(self.change_feed, key, value)
 
 # Global config instance
 config = Config()
\ No newline at end of file
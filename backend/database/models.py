@@ -1,11 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, JSON, ForeignKey
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, JSON, ForeignKey, Index
+from sqlalchemy.orm import declarative_base, relationship
+from datetime import datetime, timezone
 import enum
 
 Base = declarative_base()
 
+
+def utc_now():
+    """Current UTC time as a naive datetime, the way the DateTime columns store it"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class Airport(Base):
     __tablename__ = 'airports'
     
@@ -19,8 +24,8 @@ class Airport(Base):
     longitude = Column(Float, nullable=True)
     timezone = Column(String(50), nullable=True)
     search_field = Column(String(300), nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=utc_now)
+    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now)
 
     def __repr__(self):
         return f"<Airport({self.iata_code}: {self.city}, {self.country})>"
@@ -66,12 +71,30 @@ class FlightCalculation(Base):
     # Additional metadata
     calculation_method = Column(String(50), default='ICAO_API')
     flight_info = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=utc_now)
     created_by = Column(String(100), nullable=True)
     
+    # Keyset pagination walks (created_at, id) newest first
+    __table_args__ = (
+        Index('ix_flight_calculations_created_at_id', 'created_at', 'id'),
+    )
+    
     def __repr__(self):
         return f"<FlightCalculation({self.id}: {self.departure_airport_id}->{self.destination_airport_id})>"
     
+    # Map calculation_method to data_source for frontend compatibility
+    DATA_SOURCE_MAP = {
+        'ICAO_API': 'ICAO_API',
+        'ICAO_ENHANCED': 'ENHANCED_CALCULATION', 
+        'ICAO_BASIC': 'BASIC_CALCULATION',
+        'ICAO': 'CALCULATION',
+        'EMISSIONS_MODEL': 'EMISSIONS_MODEL'
+    }
+    
+    @classmethod
+    def data_source_for(cls, calculation_method):
+        return cls.DATA_SOURCE_MAP.get(calculation_method, 'CALCULATION')
+    
     def to_dict(self):
         # Get airport codes safely
         departure_code = "Unknown"
@@ -82,14 +105,7 @@ class FlightCalculation(Base):
         if self.destination_airport:
             destination_code = self.destination_airport.iata_code
         
-        # Map calculation_method to data_source for frontend compatibility
-        data_source_map = {
-            'ICAO_API': 'ICAO_API',
-            'ICAO_ENHANCED': 'ENHANCED_CALCULATION', 
-            'ICAO_BASIC': 'BASIC_CALCULATION',
-            'ICAO': 'CALCULATION'
-        }
-        data_source = data_source_map.get(self.calculation_method, 'CALCULATION')
+        data_source = self.data_source_for(self.calculation_method)
         
         return {
             'id': self.id,
@@ -128,4 +144,63 @@ class FlightCalculation(Base):
             'data_source': self.calculation_method,
             'flight_info': self.flight_info,
             'created_at': self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+        }
+
+class CalculationChange(Base):
+    """Append-only change feed for flight_calculations, ordered by seq"""
+    __tablename__ = 'calculation_changes'
+    
+    # AUTOINCREMENT keeps SQLite from reusing sequence numbers
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    calculation_id = Column(Integer, nullable=True)
+    change_type = Column(String(10), nullable=False)
+    created_at = Column(DateTime, default=utc_now)
+    
+    __table_args__ = {'sqlite_autoincrement': True}
+    
+    def __repr__(self):
+        return f"<CalculationChange({self.seq}: {self.change_type} {self.calculation_id})>"
+
+class BatchJob(Base):
+    """Durable record of a CSV batch run, used to resume after a restart"""
+    __tablename__ = 'batch_jobs'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    file_hash = Column(String(64), nullable=False, index=True)
+    file_name = Column(String(255), nullable=False)
+    file_size = Column(Integer, nullable=True)
+    batch_params = Column(JSON, nullable=True)
+    status = Column(String(20), nullable=False, default='running')
+    
+    # Every row up to and including this CSV row number is durably handled,
+    # except the parked rows listed in deferred_rows
+    last_committed_row = Column(Integer, nullable=False, default=1)
+    deferred_rows = Column(JSON, nullable=True)
+    processed_rows = Column(Integer, nullable=False, default=0)
+    error_rows = Column(Integer, nullable=False, default=0)
+    resume_count = Column(Integer, nullable=False, default=0)
+    
+    created_at = Column(DateTime, default=utc_now)
+    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now)
+    completed_at = Column(DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<BatchJob({self.id}: {self.file_name} {self.status} @ row {self.last_committed_row})>"
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'file_hash': self.file_hash,
+            'file_name': self.file_name,
+            'file_size': self.file_size,
+            'batch_params': self.batch_params,
+            'status': self.status,
+            'last_committed_row': self.last_committed_row,
+            'deferred_rows': self.deferred_rows or [],
+            'processed_rows': self.processed_rows,
+            'error_rows': self.error_rows,
+            'resume_count': self.resume_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
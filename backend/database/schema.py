@@ -0,0 +1,49 @@
+from sqlalchemy import inspect, text
+
+# Stamped into SQLite's PRAGMA user_version once create_all and the column
+# upgrades have run. Bump it whenever a model or update_sqlite_schema changes
+# so existing databases are checked again on the next start.
+SCHEMA_VERSION = 2
+
+
+def stored_schema_version(engine):
+    """Schema version recorded in the database, or None where it cannot be stored"""
+    if engine.dialect.name != 'sqlite':
+        return None
+    with engine.connect() as conn:
+        return conn.execute(text("PRAGMA user_version")).scalar()
+
+
+def schema_is_current(engine):
+    """True when the schema checks already ran against this database at this version"""
+    return stored_schema_version(engine) == SCHEMA_VERSION
+
+
+def add_missing_columns(engine, tables):
+    """
+    ALTER in nullable columns the models gained after their tables were
+    created, since create_all leaves existing tables alone. Returns the
+    "table.column" names added.
+    """
+    inspector = inspect(engine)
+    add = 'ADD' if engine.dialect.name == 'mssql' else 'ADD COLUMN'
+    added = []
+    with engine.begin() as conn:
+        for table in tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} {add} {column.name} {column_type}"))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def mark_schema_current(engine):
+    if engine.dialect.name != 'sqlite':
+        return
+    with engine.begin() as conn:
+        conn.execute(text(f"PRAGMA user_version = {SCHEMA_VERSION}"))
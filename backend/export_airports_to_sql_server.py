@@ -2,6 +2,8 @@ import sqlite3
 import os
 from datetime import datetime
 
+from services.sql_script import iter_cursor_rows, iter_sql_script, write_sql_script
+
 def discover_database_tables():
     """Discover what tables exist in the database"""
     
@@ -161,60 +163,30 @@ def export_airports_data(table_name):
             print("❌ No data found in table")
             return
         
-        # Get all data
-        cursor.execute(f"SELECT * FROM {table_name} ORDER BY {columns[0]}")
-        data = cursor.fetchall()
-        
         # Generate SQL Server INSERT script
         filename = f"sqlserver_{table_name}_exports.sql"
+        header = (
+            f"-- SQL Server INSERT statements for table: {table_name}\n"
+            f"-- Generated on: {datetime.now().isoformat()}\n"
+            f"-- Total rows: {total_rows}\n"
+            f"-- Source: SQLite database\n\n"
+        )
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(f"-- SQL Server INSERT statements for table: {table_name}\n")
-            f.write(f"-- Generated on: {datetime.now().isoformat()}\n")
-            f.write(f"-- Total rows: {total_rows}\n")
-            f.write(f"-- Source: SQLite database\n\n")
-            
-            # Check if we should use identity insert (if there's an ID column)
-            has_id_column = any(col[1].lower() == 'id' for col in columns_info)
-            if has_id_column:
-                f.write("-- Enable identity insert to preserve original IDs\n")
-                f.write(f"SET IDENTITY_INSERT [{table_name}] ON;\n\n")
-            
-            # Write data in batches
-            batch_size = 100
-            for i in range(0, len(data), batch_size):
-                batch = data[i:i + batch_size]
-                f.write(f"-- Batch {i//batch_size + 1}: Rows {i+1} to {i+len(batch)}\n")
-                
-                for row in batch:
-                    values = []
-                    for value in row:
-                        if value is None:
-                            values.append("NULL")
-                        elif isinstance(value, str):
-                            escaped_value = value.replace("'", "''")
-                            values.append(f"'{escaped_value}'")
-                        elif isinstance(value, (int, float)):
-                            values.append(str(value))
-                        else:
-                            values.append(f"'{str(value)}'")
-                    
-                    columns_str = ", ".join([f"[{col}]" for col in columns])
-                    values_str = ", ".join(values)
-                    
-                    insert_sql = f"INSERT INTO [{table_name}] ({columns_str}) VALUES ({values_str});"
-                    f.write(insert_sql + "\n")
-                
-                f.write("\n")
-            
-            if has_id_column:
-                f.write("-- Disable identity insert after import\n")
-                f.write(f"SET IDENTITY_INSERT [{table_name}] OFF;\n")
+        # Check if we should use identity insert (if there's an ID column)
+        has_id_column = any(col[1].lower() == 'id' for col in columns_info)
+        
+        # Stream rows into batched multi-row INSERT blocks
+        data_cursor = conn.execute(f"SELECT * FROM {table_name} ORDER BY {columns[0]}")
+        write_sql_script(filename, iter_sql_script(
+            table_name, columns, iter_cursor_rows(data_cursor),
+            header=header, identity_insert=has_id_column
+        ))
         
         print(f"✅ Exported to: {filename}")
         
         # Generate summary
-        generate_data_summary(table_name, data, columns, total_rows)
+        cursor.execute(f"SELECT * FROM {table_name} ORDER BY {columns[0]} LIMIT 10")
+        generate_data_summary(table_name, cursor.fetchall(), columns, total_rows)
         
         conn.close()
         
@@ -2,6 +2,8 @@ import sqlite3
 import json
 from datetime import datetime
 
+from services.sql_script import iter_cursor_rows, iter_sql_script, write_sql_script
+
 def export_flight_calculations_to_sql_server():
     """Export only flight_calculations table data to SQL Server INSERT scripts"""
     
@@ -19,80 +21,40 @@ def export_flight_calculations_to_sql_server():
     
     print(f"Columns found: {columns}")
     
-    # Get all data from flight_calculations table
-    sqlite_cursor.execute("SELECT * FROM flight_calculations")
-    rows = sqlite_cursor.fetchall()
+    sqlite_cursor.execute("SELECT COUNT(*) FROM flight_calculations")
+    row_count = sqlite_cursor.fetchone()[0]
     
-    print(f"Found {len(rows)} rows in flight_calculations table")
+    print(f"Found {row_count} rows in flight_calculations table")
     
-    # Generate SQL Server INSERT statements
-    insert_statements = []
+    # Check if we need identity insert (if id column is primary key)
+    has_identity = any(col[5] > 0 for col in columns_info if col[1] == 'id')
     
-    for row in rows:
-        values = []
-        for i, value in enumerate(row):
-            col_name = columns[i]
-            
-            if value is None:
-                values.append("NULL")
-            elif isinstance(value, str):
-                # Escape single quotes and handle strings
-                escaped_value = value.replace("'", "''")
-                values.append(f"'{escaped_value}'")
-            elif isinstance(value, int):
-                values.append(str(value))
-            elif isinstance(value, float):
-                # Handle float values, ensure proper decimal format
-                values.append(str(value))
-            elif isinstance(value, datetime):
-                # Convert datetime to SQL Server format
-                values.append(f"'{value.isoformat()}'")
-            elif isinstance(value, bool):
-                # Convert boolean to bit (1 for True, 0 for False)
-                values.append("1" if value else "0")
-            else:
-                # Convert any other type to string
-                values.append(f"'{str(value)}'")
-        
-        columns_str = ", ".join([f"[{col}]" for col in columns])
-        values_str = ", ".join(values)
-        
-        insert_stmt = f"INSERT INTO [flight_calculations] ({columns_str}) VALUES ({values_str});"
-        insert_statements.append(insert_stmt)
+    header = (
+        "-- SQL Server INSERT statements for table: flight_calculations\n"
+        f"-- Generated on: {datetime.now().isoformat()}\n"
+        f"-- Total rows: {row_count}\n"
+        "-- Source: SQLite database 'flight_calculator.db'\n"
+        "-- NOTE: This is the CORRECT database with actual data!\n\n"
+    )
     
-    # Write to file
+    # Stream rows from the cursor into batched multi-row INSERT blocks
+    data_cursor = sqlite_conn.execute("SELECT * FROM flight_calculations")
     filename = "sqlserver_flight_calculations_inserts.sql"
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(f"-- SQL Server INSERT statements for table: flight_calculations\n")
-        f.write(f"-- Generated on: {datetime.now().isoformat()}\n")
-        f.write(f"-- Total rows: {len(insert_statements)}\n")
-        f.write(f"-- Source: SQLite database 'flight_calculator.db'\n")
-        f.write(f"-- NOTE: This is the CORRECT database with actual data!\n\n")
-        
-        # Check if we need identity insert (if id column is primary key)
-        has_identity = any(col[5] > 0 for col in columns_info if col[1] == 'id')
-        
-        if has_identity:
-            f.write("-- Enable identity insert to preserve original IDs\n")
-            f.write("SET IDENTITY_INSERT [flight_calculations] ON;\n\n")
-        
-        # Write all INSERT statements
-        for stmt in insert_statements:
-            f.write(stmt + "\n")
-        
-        if has_identity:
-            f.write("\n-- Disable identity insert after import\n")
-            f.write("SET IDENTITY_INSERT [flight_calculations] OFF;\n")
+    write_sql_script(filename, iter_sql_script(
+        'flight_calculations', columns, iter_cursor_rows(data_cursor),
+        header=header, identity_insert=has_identity
+    ))
     
-    print(f"✅ Exported {len(insert_statements)} rows to {filename}")
+    print(f"✅ Exported {row_count} rows to {filename}")
     
     # Also generate a summary report
-    generate_export_summary(sqlite_cursor, rows, columns)
+    sqlite_cursor.execute("SELECT * FROM flight_calculations LIMIT 3")
+    generate_export_summary(sqlite_cursor, row_count, sqlite_cursor.fetchall(), columns)
     
     sqlite_conn.close()
     print("\n🎉 Export completed!")
 
-def generate_export_summary(cursor, rows, columns):
+def generate_export_summary(cursor, row_count, sample_rows, columns):
     """Generate a summary report of the exported data"""
     
     summary_filename = "export_summary.txt"
@@ -101,13 +63,13 @@ def generate_export_summary(cursor, rows, columns):
         f.write("FLIGHT CALCULATIONS EXPORT SUMMARY\n")
         f.write("=" * 50 + "\n")
         f.write(f"Export Date: {datetime.now().isoformat()}\n")
-        f.write(f"Total Rows Exported: {len(rows)}\n")
+        f.write(f"Total Rows Exported: {row_count}\n")
         f.write(f"Source Database: flight_calculator.db\n")
         f.write(f"Target: SQL Server\n")
         f.write(f"Columns: {', '.join(columns)}\n\n")
         
         # Get some statistics about the data
-        if rows:
+        if row_count:
             # Count by cabin class
             cursor.execute("SELECT cabin_class, COUNT(*) FROM flight_calculations GROUP BY cabin_class")
             cabin_stats = cursor.fetchall()
@@ -149,7 +111,7 @@ def generate_export_summary(cursor, rows, columns):
             f.write("\nSAMPLE DATA (first 3 rows):\n")
             f.write("-" * 50 + "\n")
             
-            for i, row in enumerate(rows[:3]):
+            for i, row in enumerate(sample_rows):
                 f.write(f"Row {i+1}:\n")
                 for col_name, value in zip(columns, row):
                     # Format the output nicely
@@ -2,6 +2,8 @@ import sqlite3
 import json
 from datetime import datetime
 
+from services.sql_script import iter_cursor_rows, iter_sql_script, write_sql_script
+
 def export_sqlite_to_sql_server_scripts():
     """Export SQLite data to SQL Server INSERT scripts"""
     
@@ -26,46 +28,21 @@ def export_sqlite_to_sql_server_scripts():
         sqlite_cursor.execute(f"PRAGMA table_info({table})")
         columns = [row[1] for row in sqlite_cursor.fetchall()]
         
-        # Get all data
-        sqlite_cursor.execute(f"SELECT * FROM {table}")
-        rows = sqlite_cursor.fetchall()
-        
-        # Generate SQL Server INSERT statements
-        insert_statements = []
+        sqlite_cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        row_count = sqlite_cursor.fetchone()[0]
         
-        for row in rows:
-            values = []
-            for i, value in enumerate(row):
-                if value is None:
-                    values.append("NULL")
-                elif isinstance(value, str):
-                    # Escape single quotes and handle strings
-                    escaped_value = value.replace("'", "''")
-                    values.append(f"'{escaped_value}'")
-                elif isinstance(value, (int, float)):
-                    values.append(str(value))
-                elif isinstance(value, datetime):
-                    values.append(f"'{value.isoformat()}'")
-                else:
-                    values.append(f"'{str(value)}'")
-            
-            columns_str = ", ".join([f"[{col}]" for col in columns])
-            values_str = ", ".join(values)
-            
-            insert_stmt = f"INSERT INTO [{table}] ({columns_str}) VALUES ({values_str});"
-            insert_statements.append(insert_stmt)
+        header = (
+            f"-- INSERT statements for table: {table}\n"
+            f"-- Generated on: {datetime.now().isoformat()}\n"
+            f"-- Total rows: {row_count}\n\n"
+        )
         
-        # Write to file
+        # Stream rows into batched multi-row INSERT blocks
+        data_cursor = sqlite_conn.execute(f"SELECT * FROM {table}")
         filename = f"sqlserver_{table}_inserts.sql"
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(f"-- INSERT statements for table: {table}\n")
-            f.write(f"-- Generated on: {datetime.now().isoformat()}\n")
-            f.write(f"-- Total rows: {len(insert_statements)}\n\n")
-            
-            for stmt in insert_statements:
-                f.write(stmt + "\n")
+        write_sql_script(filename, iter_sql_script(table, columns, iter_cursor_rows(data_cursor), header=header))
         
-        print(f"✅ Exported {len(insert_statements)} rows to {filename}")
+        print(f"✅ Exported {row_count} rows to {filename}")
     
     sqlite_conn.close()
     print("\n🎉 Export completed!")
@@ -76,49 +53,21 @@ def export_airports_specific():
     sqlite_conn = sqlite3.connect('flight_calculator_v2.db')
     sqlite_cursor = sqlite_conn.cursor()
     
-    # Export airports table
-    sqlite_cursor.execute("SELECT * FROM airports")
-    airports = sqlite_cursor.fetchall()
-    
     # Get column names
     sqlite_cursor.execute("PRAGMA table_info(airports)")
     columns = [row[1] for row in sqlite_cursor.fetchall()]
     
-    insert_statements = []
-    
-    for airport in airports:
-        values = []
-        for i, value in enumerate(airport):
-            col_name = columns[i]
-            
-            if value is None:
-                if col_name == 'icao_code':
-                    values.append("NULL")  # Explicit NULL for icao_code
-                else:
-                    values.append("NULL")
-            elif isinstance(value, str):
-                escaped_value = value.replace("'", "''")
-                values.append(f"'{escaped_value}'")
-            elif isinstance(value, (int, float)):
-                values.append(str(value))
-            else:
-                values.append(f"'{str(value)}'")
-        
-        columns_str = ", ".join([f"[{col}]" for col in columns])
-        values_str = ", ".join(values)
-        
-        insert_stmt = f"INSERT INTO [airports] ({columns_str}) VALUES ({values_str});"
-        insert_statements.append(insert_stmt)
+    sqlite_cursor.execute("SELECT COUNT(*) FROM airports")
+    airport_count = sqlite_cursor.fetchone()[0]
     
     # Write airports to file
-    with open('sqlserver_airports_inserts.sql', 'w', encoding='utf-8') as f:
-        f.write("-- AIRPORTS INSERT STATEMENTS\n")
-        f.write("-- Generated for SQL Server\n\n")
-        
-        for stmt in insert_statements:
-            f.write(stmt + "\n")
+    header = "-- AIRPORTS INSERT STATEMENTS\n-- Generated for SQL Server\n\n"
+    data_cursor = sqlite_conn.execute("SELECT * FROM airports")
+    write_sql_script('sqlserver_airports_inserts.sql', iter_sql_script(
+        'airports', columns, iter_cursor_rows(data_cursor), header=header
+    ))
     
-    print(f"✅ Exported {len(insert_statements)} airports to sqlserver_airports_inserts.sql")
+    print(f"✅ Exported {airport_count} airports to sqlserver_airports_inserts.sql")
     sqlite_conn.close()
 
 if __name__ == "__main__":
@@ -1,8 +1,9 @@
 import sqlite3
-import re
 from datetime import datetime
 import os
 
+from services.airport_dataset import read_airports_js
+
 def get_backend_database_path():
     """Get the database path in the backend directory"""
     
@@ -42,50 +43,8 @@ def read_all_airports_from_js(file_path):
     print(f"📖 Reading ALL airports from: {file_path}")
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Extract array content
-        pattern = r'export\s+const\s+airports\s*=\s*\[(.*?)\];'
-        match = re.search(pattern, content, re.DOTALL)
-        
-        if not match:
-            # Try without export
-            pattern = r'const\s+airports\s*=\s*\[(.*?)\];'
-            match = re.search(pattern, content, re.DOTALL)
-        
-        if match:
-            array_content = match.group(1)
-            print(f"✅ Found array with {len(array_content)} characters")
-            
-            # Split by objects
-            objects = re.findall(r'\{[^}]+\}', array_content)
-            print(f"✅ Found {len(objects)} airport objects")
-            
-            airports = []
-            for obj_str in objects:
-                airport = {}
-                # Extract each field
-                code_match = re.search(r"code:\s*['\"]([^'\"]+)['\"]", obj_str)
-                name_match = re.search(r"name:\s*['\"]([^'\"]+)['\"]", obj_str)
-                city_match = re.search(r"city:\s*['\"]([^'\"]+)['\"]", obj_str)
-                country_match = re.search(r"country:\s*['\"]([^'\"]+)['\"]", obj_str)
-                search_match = re.search(r"search:\s*['\"]([^'\"]+)['\"]", obj_str)
-                
-                if code_match:
-                    airport['code'] = code_match.group(1)
-                if name_match:
-                    airport['name'] = name_match.group(1)
-                if city_match:
-                    airport['city'] = city_match.group(1)
-                if country_match:
-                    airport['country'] = country_match.group(1)
-                if search_match:
-                    airport['search'] = search_match.group(1)
-                
-                if airport:  # Only add if we have at least a code
-                    airports.append(airport)
-            
+        airports = read_airports_js(file_path)
+        if airports:
             print(f"✅ Successfully parsed {len(airports)} airports")
             return airports
         
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Copy new rows from the local SQLite database to SQL Server (or any
+SQLAlchemy target). Each run continues from the high-water mark stored
+on the target, so only rows added since the last run are copied.
+
+Usage: python replicate_to_sqlserver.py [--target URL] [--source PATH] [--chunk-size N]
+"""
+
+import argparse
+import json
+
+from config_manager import ConfigManager
+from services.replication import replicate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replicate flight_calculator.db to SQL Server")
+    parser.add_argument('--target', help="SQLAlchemy URL of the target (defaults to REPLICATION_TARGET_URL)")
+    parser.add_argument('--source', help="Path of the SQLite database to copy from")
+    parser.add_argument('--chunk-size', type=int, help="Rows per bulk insert")
+    args = parser.parse_args()
+
+    config_manager = ConfigManager()
+    config_manager.load_config()
+
+    try:
+        replication_config = config_manager.config.replication
+        stats = replicate(
+            target_url=args.target or replication_config.target_url,
+            source_path=args.source or replication_config.source_path,
+            chunk_size=args.chunk_size or replication_config.chunk_size
+        )
+    except (ValueError, FileNotFoundError) as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+
+    for table_name, table_stats in stats['tables'].items():
+        print(f"✅ {table_name}: {table_stats['rows_copied']} new rows, high-water id {table_stats['last_id']}")
+    print(f"📊 {json.dumps(stats, indent=2)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Little-endian layout, every section 8-byte aligned:
+#   header | latitude f64[n] | longitude f64[n] | name, city, country, search u32[n]
+#   | code 4s[n] | string offsets u32[strings + 1] | UTF-8 string pool
+MAGIC = b'ARPT'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sIIII12x')  # magic, version, airports, strings, pool bytes, padding to 32
+CODE_WIDTH = 4
+STRING_COLUMNS = ('name', 'city', 'country', 'search')
+
+JS_OBJECT_PATTERN = re.compile(r'\{([^{}]*)\}')
+JS_FIELD_PATTERN = re.compile(r'(\w+)\s*:\s*("(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?|null)')
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _layout(count, string_count):
+    """Byte offset of each section for a file holding count airports"""
+    offsets = {}
+    position = HEADER.size
+    for name, size in (('latitude', 8 * count), ('longitude', 8 * count),
+                       *((column, 4 * count) for column in STRING_COLUMNS),
+                       ('code', CODE_WIDTH * count), ('string_offsets', 4 * (string_count + 1))):
+        offsets[name] = position
+        position = _align(position + size)
+    offsets['pool'] = position
+    return offsets
+
+
+def _column(buffer, offset, count, typecode):
+    view = buffer[offset:offset + count * struct.calcsize(typecode)]
+    if sys.byteorder == 'little':
+        return view.cast(typecode)
+    values = array(typecode, view)
+    values.byteswap()
+    return values
+
+
+def resolve_dataset_path(path=None):
+    """The configured dataset path; relative paths are taken from the backend directory"""
+    path = path or config.airports.dataset_path
+    return path if os.path.isabs(path) else os.path.join(BACKEND_DIR, path)
+
+
+class AirportDataset(Sequence):
+    """
+    Read-only view over the packed airports file. The file is memory-mapped
+    and columns are sliced out of it without copying; airport dicts, shaped
+    like the entries of shared_airports.py, are only built when indexed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self._mmap)
+        magic, version, count, string_count, pool_size = HEADER.unpack_from(buffer)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            buffer.release()
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} airport dataset")
+
+        offsets = _layout(count, string_count)
+        self._count = count
+        self._latitude = _column(buffer, offsets['latitude'], count, 'd')
+        self._longitude = _column(buffer, offsets['longitude'], count, 'd')
+        self._strings = {column: _column(buffer, offsets[column], count, 'I') for column in STRING_COLUMNS}
+        self._codes = buffer[offsets['code']:offsets['code'] + CODE_WIDTH * count]
+        self._string_offsets = _column(buffer, offsets['string_offsets'], string_count + 1, 'I')
+        self._pool = buffer[offsets['pool']:offsets['pool'] + pool_size]
+        self._decoded = [None] * string_count
+
+    def __len__(self):
+        return self._count
+
+    def string(self, string_id):
+        """Interned string by id, decoded once and shared by every airport using it"""
+        value = self._decoded[string_id]
+        if value is None:
+            start, end = self._string_offsets[string_id], self._string_offsets[string_id + 1]
+            value = self._decoded[string_id] = str(self._pool[start:end], 'utf-8')
+        return value
+
+    def code(self, index):
+        start = index * CODE_WIDTH
+        return bytes(self._codes[start:start + CODE_WIDTH]).rstrip(b'\0').decode('ascii')
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('airport index out of range')
+
+        airport = {'code': self.code(index)}
+        for column in STRING_COLUMNS:
+            airport[column] = self.string(self._strings[column][index])
+        latitude, longitude = self._latitude[index], self._longitude[index]
+        if not math.isnan(latitude):
+            airport['latitude'] = latitude
+        if not math.isnan(longitude):
+            airport['longitude'] = longitude
+        return airport
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'airports': self._count,
+            'strings': len(self._decoded),
+            'countries': len({self._strings['country'][i] for i in range(self._count)}),
+            'file_bytes': len(self._mmap)
+        }
+
+
+def write_airport_dataset(airports, path=None):
+    """
+    Pack a list of airport dicts into the dataset file, atomically. Every
+    string is interned, so the ~200 countries and repeated city names are
+    stored once however many airports share them.
+    """
+    path = resolve_dataset_path(path)
+    airports = [airport for airport in airports if airport.get('code')]
+
+    strings = {}
+    for airport in airports:
+        for column in STRING_COLUMNS:
+            strings.setdefault(airport.get(column) or '', len(strings))
+    encoded = [value.encode('utf-8') for value in strings]
+    string_offsets = [0]
+    for value in encoded:
+        string_offsets.append(string_offsets[-1] + len(value))
+
+    count = len(airports)
+    offsets = _layout(count, len(strings))
+    codes = []
+    for airport in airports:
+        code = airport['code'].strip().upper().encode('ascii')
+        if len(code) > CODE_WIDTH:
+            raise ValueError(f"Airport code {airport['code']!r} is longer than {CODE_WIDTH} characters")
+        codes.append(code.ljust(CODE_WIDTH, b'\0'))
+
+    def coordinate(airport, key):
+        value = airport.get(key)
+        return math.nan if value in (None, '') else float(value)
+
+    sections = {
+        'latitude': struct.pack(f'<{count}d', *(coordinate(airport, 'latitude') for airport in airports)),
+        'longitude': struct.pack(f'<{count}d', *(coordinate(airport, 'longitude') for airport in airports)),
+        **{column: struct.pack(f'<{count}I', *(strings[airport.get(column) or ''] for airport in airports))
+           for column in STRING_COLUMNS},
+        'code': b''.join(codes),
+        'string_offsets': struct.pack(f'<{len(string_offsets)}I', *string_offsets),
+        'pool': b''.join(encoded)
+    }
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, count, len(strings), string_offsets[-1]))
+        for name in ('latitude', 'longitude', *STRING_COLUMNS, 'code', 'string_offsets', 'pool'):
+            f.write(b'\0' * (offsets[name] - f.tell()))
+            f.write(sections[name])
+    os.replace(temp_path, path)
+    return count
+
+
+def load_airports_data(dataset_path=None):
+    """
+    The shared airports list, memory-mapped from the packed dataset. Falls
+    back to the generated shared_airports.py when the dataset is missing.
+    """
+    path = resolve_dataset_path(dataset_path)
+    try:
+        return AirportDataset(path)
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Airport dataset unavailable ({e}), importing shared_airports.py")
+    from shared_airports import airports
+    return airports
+
+
+def read_airports_js(path):
+    """Parse the `export const airports = [...]` module written by render_airports_js"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    airports = []
+    for match in JS_OBJECT_PATTERN.finditer(content):
+        airport = {key: json.loads(value) for key, value in JS_FIELD_PATTERN.findall(match.group(1))}
+        if airport.get('code'):
+            airports.append(airport)
+    return airports
+
+
+def _airport_fields(airport):
+    fields = [(column, airport.get(column) or '') for column in ('code', *STRING_COLUMNS)]
+    fields += [(key, airport[key]) for key in ('latitude', 'longitude') if airport.get(key) is not None]
+    return fields
+
+
+def render_airports_python(airports):
+    lines = [
+        '  { ' + ', '.join(f'{json.dumps(key)}: {json.dumps(value, ensure_ascii=False)}'
+                           for key, value in _airport_fields(airport)) + ' },'
+        for airport in airports
+    ]
+    return ('"""\nShared airports data - generated from data/airports.bin by build_airports.py\n"""\n\n'
+            'airports = [\n' + '\n'.join(lines) + '\n]\n')
+
+
+def render_airports_js(airports):
+    lines = [
+        '  { ' + ', '.join(f'{key}: {json.dumps(value, ensure_ascii=False)}'
+                           for key, value in _airport_fields(airport)) + ' },'
+        for airport in airports
+    ]
+    return ('// Generated from backend/data/airports.bin by backend/build_airports.py\n'
+            'export const airports = [\n' + '\n'.join(lines) + '\n];\n')
+
+
+SQL_COLUMNS = ['id', 'iata_code', 'icao_code', 'name', 'city', 'country', 'latitude', 'longitude', 'search_field']
+
+
+def iter_airport_sql_rows(airports):
+    for airport_id, airport in enumerate(airports, 1):
+        yield (airport_id, airport['code'], None, airport.get('name'), airport.get('city'), airport.get('country'),
+               airport.get('latitude'), airport.get('longitude'), airport.get('search'))
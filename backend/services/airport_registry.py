@@ -0,0 +1,246 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def _to_float(value):
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+class AirportRecord:
+    """Compact read-only view of an airport, shaped like the Airport model"""
+
+    __slots__ = ('id', 'iata_code', 'icao_code', 'name', 'city', 'country',
+                 'latitude', 'longitude', 'search_field')
+
+    def __init__(self, id, iata_code, icao_code, name, city, country, latitude, longitude, search_field):
+        self.id = id
+        self.iata_code = iata_code
+        self.icao_code = icao_code
+        self.name = name
+        self.city = city
+        self.country = country
+        self.latitude = latitude
+        self.longitude = longitude
+        self.search_field = search_field
+
+    @classmethod
+    def from_model(cls, airport):
+        return cls(
+            airport.id,
+            (airport.iata_code or '').upper() or None,
+            (airport.icao_code or '').upper() or None,
+            airport.name,
+            airport.city,
+            airport.country,
+            _to_float(airport.latitude),
+            _to_float(airport.longitude),
+            airport.search_field
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        iata_code = (data.get('code') or data.get('iata_code') or '').strip().upper()
+        city = data.get('city', 'Unknown')
+        country = data.get('country', 'Unknown')
+        return cls(
+            data.get('id'),
+            iata_code or None,
+            (data.get('icao_code') or '').strip().upper() or None,
+            data.get('name', f"{iata_code} Airport"),
+            city,
+            country,
+            _to_float(data.get('latitude')),
+            _to_float(data.get('longitude')),
+            data.get('search') or data.get('search_field') or f"{city}, {country} ({iata_code})"
+        )
+
+    def merged_with(self, other):
+        """Fill gaps in this record from another record for the same airport"""
+        return AirportRecord(*(
+            mine if mine not in (None, '') else theirs
+            for mine, theirs in zip(
+                (getattr(self, name) for name in self.__slots__),
+                (getattr(other, name) for name in other.__slots__)
+            )
+        ))
+
+    def to_dict(self):
+        return {
+            'code': self.iata_code,
+            'name': self.name,
+            'city': self.city,
+            'country': self.country,
+            'search': self.search_field or f"{self.city}, {self.country} ({self.iata_code})",
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'iata_code': self.iata_code,
+            'icao_code': self.icao_code
+        }
+
+    def __repr__(self):
+        return f"<AirportRecord({self.iata_code}: {self.city}, {self.country})>"
+
+
+class AirportRegistry:
+    """
+    Process-wide airport index keyed on IATA and ICAO codes.
+    Database rows win over the shared airports list; the list fills in
+    airports that have not been populated yet.
+    """
+
+    def __init__(self):
+        self.by_iata = {}
+        self.by_icao = {}
+        self.lock = threading.Lock()
+        self.loaded_from_db = False
+        self.version = 0
+        self._arrays = None
+
+    def load(self, db=None, airports_data=None):
+        """Rebuild the index from the database and/or the shared airports list"""
+        by_iata = {}
+        by_icao = {}
+
+        for data in airports_data or []:
+            record = AirportRecord.from_dict(data)
+            if record.iata_code:
+                by_iata[record.iata_code] = record
+
+        db_count = 0
+        if db is not None:
+            from sqlalchemy import select
+            from database.models import Airport
+            # Plain rows are much cheaper than ORM objects and carry the same attributes
+            rows = db.execute(select(
+                Airport.id, Airport.iata_code, Airport.icao_code, Airport.name, Airport.city,
+                Airport.country, Airport.latitude, Airport.longitude, Airport.search_field
+            )).all()
+            for airport in rows:
+                record = AirportRecord.from_model(airport)
+                if not record.iata_code:
+                    continue
+                shared = by_iata.get(record.iata_code)
+                by_iata[record.iata_code] = record.merged_with(shared) if shared else record
+                db_count += 1
+
+        for record in by_iata.values():
+            if record.icao_code:
+                by_icao[record.icao_code] = record
+
+        with self.lock:
+            self.by_iata = by_iata
+            self.by_icao = by_icao
+            self.loaded_from_db = self.loaded_from_db or db is not None
+            self.version += 1
+
+        logger.info(f"✈️ Airport registry loaded: {len(by_iata)} airports ({db_count} from database)")
+        return len(by_iata)
+
+    def add(self, airport):
+        """Insert or refresh one airport from a model instance or dict"""
+        record = AirportRecord.from_dict(airport) if isinstance(airport, dict) else AirportRecord.from_model(airport)
+        if not record.iata_code:
+            return None
+        with self.lock:
+            existing = self.by_iata.get(record.iata_code)
+            if existing:
+                record = record.merged_with(existing)
+                if existing.icao_code and existing.icao_code != record.icao_code:
+                    self.by_icao.pop(existing.icao_code, None)
+            self.by_iata[record.iata_code] = record
+            if record.icao_code:
+                self.by_icao[record.icao_code] = record
+            self.version += 1
+        return record
+
+    def get(self, code):
+        """Look up an airport by IATA code, falling back to ICAO"""
+        if not code:
+            return None
+        code = code.strip().upper()
+        return self.by_iata.get(code) or self.by_icao.get(code)
+
+    def get_id(self, code):
+        """Database id for a code, or None if the airport is not in the database"""
+        record = self.get(code)
+        return record.id if record else None
+
+    def coordinates(self, code):
+        """(latitude, longitude) for a code, or None when unknown"""
+        record = self.get(code)
+        if record and record.latitude is not None and record.longitude is not None:
+            return (record.latitude, record.longitude)
+        return None
+
+    def coordinate_arrays(self):
+        """
+        Return (codes, ordinals, lat_rad, lon_rad): IATA codes in ordinal order, a
+        code -> ordinal map over IATA and ICAO codes, and float64 radian arrays
+        in the same order with NaN where coordinates are unknown.
+        Rebuilt only when the registry changes.
+        """
+        arrays = self._arrays
+        if arrays is not None and arrays[0] == self.version:
+            return arrays[1:]
+
+        import numpy as np
+
+        with self.lock:
+            version = self.version
+            records = sorted(self.by_iata.values(), key=lambda record: record.iata_code)
+        ordinals = {}
+        lat = np.full(len(records), np.nan)
+        lon = np.full(len(records), np.nan)
+        for ordinal, record in enumerate(records):
+            ordinals[record.iata_code] = ordinal
+            if record.icao_code:
+                ordinals.setdefault(record.icao_code, ordinal)
+            if record.latitude is not None and record.longitude is not None:
+                lat[ordinal] = record.latitude
+                lon[ordinal] = record.longitude
+
+        codes = tuple(record.iata_code for record in records)
+        self._arrays = (version, codes, ordinals, np.radians(lat), np.radians(lon))
+        return self._arrays[1:]
+
+    def __contains__(self, code):
+        return self.get(code) is not None
+
+    def __len__(self):
+        return len(self.by_iata)
+
+    def stats(self):
+        return {
+            'airports': len(self.by_iata),
+            'icao_codes': len(self.by_icao),
+            'in_database': sum(1 for record in self.by_iata.values() if record.id is not None),
+            'with_coordinates': sum(1 for record in self.by_iata.values() if record.latitude is not None),
+            'loaded_from_db': self.loaded_from_db
+        }
+
+
+_airport_registry = None
+_airport_registry_lock = threading.Lock()
+
+
+def get_airport_registry():
+    """Return the process-wide airport registry, seeding it from the shared airports list on first use"""
+    global _airport_registry
+    if _airport_registry is None:
+        with _airport_registry_lock:
+            if _airport_registry is None:
+                registry = AirportRegistry()
+                try:
+                    from .airport_dataset import load_airports_data
+                    registry.load(airports_data=load_airports_data())
+                except ImportError as e:
+                    logger.warning(f"⚠️ Could not seed airport registry from shared_airports: {e}")
+                _airport_registry = registry
+    return _airport_registry
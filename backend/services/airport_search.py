@@ -0,0 +1,185 @@
+import heapq
+import logging
+import threading
+import unicodedata
+
+from .airport_registry import get_airport_registry
+
+logger = logging.getLogger(__name__)
+
+MAX_CODE_LENGTH = 4
+
+# Words nearly every airport name carries; indexing them would make "air" match all of them
+STOPWORDS = frozenset({'airport', 'airports', 'international', 'intl', 'regional', 'municipal', 'airfield'})
+
+# Rank of the best way a query word matched an airport; lower sorts first
+RANK_CODE_EXACT = 0
+RANK_CODE_PREFIX = 1
+RANK_CITY_PREFIX = 2
+RANK_NAME_PREFIX = 3
+RANK_COUNTRY_PREFIX = 4
+RANK_WORD_PREFIX = 5
+RANK_SUBSTRING = 6
+
+
+def normalize(text):
+    """Casefold and strip accents so 'Côte' and 'cote' index the same way"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def _words(text):
+    return [word for word in ''.join(char if char.isalnum() else ' ' for char in text).split()
+            if word not in STOPWORDS]
+
+
+def _word_trigrams(word):
+    """Trigrams of a word padded like pg_trgm, so short prefixes have trigrams too"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _query_trigrams(word):
+    """Trigrams every indexed word containing this query word must have"""
+    if len(word) < 3:
+        # Too short for an inner trigram: match it as the start of a word
+        return {f"  {word}"[-3:]}
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+class _Entry:
+    __slots__ = ('record', 'codes', 'city', 'name', 'country', 'words', 'text')
+
+    def __init__(self, record):
+        self.record = record
+        self.codes = tuple(code.lower() for code in (record.iata_code, record.icao_code) if code)
+        self.city = normalize(record.city)
+        self.name = normalize(record.name)
+        self.country = normalize(record.country)
+        self.text = ' '.join((self.city, self.name, self.country, normalize(record.search_field)))
+        self.words = _words(self.text)
+
+
+class AirportSearchIndex:
+    """
+    In-memory typeahead over the airport registry: a prefix trie on IATA and
+    ICAO codes plus a trigram index on city, name, country and the search
+    label. Every word of the query must match; results are ranked by how well
+    the best word matched, then by city.
+    """
+
+    def __init__(self, records, version=None):
+        self.version = version
+        self.entries = [_Entry(record) for record in records]
+        self.code_trie = {}
+        self.trigrams = {}
+
+        for entry_id, entry in enumerate(self.entries):
+            for code in entry.codes:
+                node = self.code_trie
+                for char in code:
+                    node = node.setdefault(char, {})
+                    node.setdefault(None, set()).add(entry_id)
+            for word in set(entry.words):
+                for trigram in _word_trigrams(word):
+                    self.trigrams.setdefault(trigram, set()).add(entry_id)
+
+    def _code_prefix(self, word):
+        node = self.code_trie
+        for char in word:
+            node = node.get(char)
+            if node is None:
+                return set()
+        return node[None]
+
+    def _text_matches(self, word):
+        postings = [self.trigrams.get(trigram) for trigram in _query_trigrams(word)]
+        if not all(postings):
+            return set()
+        postings.sort(key=len)
+        return postings[0].intersection(*postings[1:])
+
+    def _rank(self, entry, word):
+        if word in entry.codes:
+            return RANK_CODE_EXACT
+        if any(code.startswith(word) for code in entry.codes):
+            return RANK_CODE_PREFIX
+        if entry.city.startswith(word):
+            return RANK_CITY_PREFIX
+        if entry.name.startswith(word):
+            return RANK_NAME_PREFIX
+        if entry.country.startswith(word):
+            return RANK_COUNTRY_PREFIX
+        if any(indexed.startswith(word) for indexed in entry.words):
+            return RANK_WORD_PREFIX
+        if len(word) >= 3 and word in entry.text:
+            return RANK_SUBSTRING
+        return None
+
+    def search(self, query, limit=20):
+        """Up to limit (rank, record) pairs for a free-text query, best first"""
+        words = _words(normalize(query))
+        if not words:
+            return []
+
+        candidates = None
+        for word in words:
+            matches = self._text_matches(word)
+            if len(word) <= MAX_CODE_LENGTH:
+                matches = matches | self._code_prefix(word)
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return []
+
+        if len(words) == 1 and len(words[0]) <= MAX_CODE_LENGTH:
+            # Code matches outrank every text match, so when they fill the page the rest can be skipped
+            code_matches = self._code_prefix(words[0])
+            if len(code_matches) >= limit:
+                candidates = code_matches
+
+        scored = []
+        for entry_id in candidates:
+            entry = self.entries[entry_id]
+            ranks = [self._rank(entry, word) for word in words]
+            if None in ranks:
+                # A trigram hit spread across words rather than one real match
+                continue
+            scored.append((min(ranks), sum(ranks), len(entry.city), entry.record.iata_code, entry_id))
+
+        best = heapq.nsmallest(limit, scored)
+        return [(rank, self.entries[entry_id].record) for rank, _, _, _, entry_id in best]
+
+    def stats(self):
+        return {
+            'version': self.version,
+            'airports': len(self.entries),
+            'trigrams': len(self.trigrams)
+        }
+
+
+_search_index = None
+_search_index_lock = threading.Lock()
+
+
+def get_airport_search_index():
+    """Search index for the current registry contents, rebuilt when the registry changes"""
+    global _search_index
+    registry = get_airport_registry()
+    index = _search_index
+    if index is not None and index.version == registry.version:
+        return index
+    with _search_index_lock:
+        index = _search_index
+        if index is None or index.version != registry.version:
+            with registry.lock:
+                version = registry.version
+                records = list(registry.by_iata.values())
+            index = AirportSearchIndex(records, version)
+            _search_index = index
+            logger.info(f"🔎 Airport search index built: {len(records)} airports, {len(index.trigrams)} trigrams")
+    return index
+
+
+def search_airports(query, limit=20):
+    """Ranked airport dicts matching a typeahead query"""
+    return [record.to_dict() for _, record in get_airport_search_index().search(query, limit)]
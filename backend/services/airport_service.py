@@ -1,7 +1,11 @@
-import pandas as pd
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
 from database.models import Airport
+from .airport_dataset import load_airports_data
+from .airport_registry import get_airport_registry
+from .airport_search import search_airports
+from .http_cache import get_airports_list_cache
+from .airport_upsert import UPDATABLE_COLUMNS, upsert_airports
+from .distance import haversine_degrees_km, great_circle_km_batch
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,54 +14,43 @@ class AirportService:
     def __init__(self, db: Session):
         self.db = db
     
+    def upsert_airports(self, airports, update_columns=UPDATABLE_COLUMNS):
+        """Bulk insert/update airports, commit, and refresh everything derived from the table"""
+        result = upsert_airports(self.db, airports, update_columns)
+        self.db.commit()
+        # New rows need their ids in the registry; the registry version change rebuilds search too
+        get_airport_registry().load(self.db, load_airports_data())
+        get_airports_list_cache().invalidate()
+        return result
+
     def import_airports_from_array(self, airports_data: list):
         """Import airports from a JavaScript-style array"""
         try:
-            airports_imported = 0
-            
+            rows = []
             for airport_data in airports_data:
                 # Map your JavaScript object to our database model
                 iata_code = airport_data.get('code', '').strip().upper()
                 name = airport_data.get('name', '')
                 city = airport_data.get('city', '')
                 country = airport_data.get('country', '')
-                search_field = airport_data.get('search', '')
                 
                 # Skip if missing essential data
                 if not iata_code or not name or not city or not country:
                     continue
                 
-                # Create search field if not provided
-                if not search_field:
-                    search_field = f"{city}, {country} ({iata_code})"
-                
-                # Check if airport already exists
-                existing_airport = self.get_airport_by_code(iata_code)
-                
-                if existing_airport:
-                    # Update existing airport
-                    existing_airport.name = name
-                    existing_airport.city = city
-                    existing_airport.country = country
-                    existing_airport.search_field = search_field
-                else:
-                    # Create new airport with NULL for icao_code instead of empty string
-                    airport = Airport(
-                        iata_code=iata_code,
-                        icao_code=None,  # Use NULL instead of empty string
-                        name=name,
-                        city=city,
-                        country=country,
-                        latitude=None,
-                        longitude=None,
-                        timezone='',
-                        search_field=search_field
-                    )
-                    self.db.add(airport)
-                
-                airports_imported += 1
+                rows.append({
+                    'iata_code': iata_code,
+                    'name': name,
+                    'city': city,
+                    'country': country,
+                    'timezone': '',
+                    # Create search field if not provided
+                    'search_field': airport_data.get('search') or f"{city}, {country} ({iata_code})"
+                })
             
-            self.db.commit()
+            # Existing airports keep their codes and coordinates; only the labels are refreshed
+            result = self.upsert_airports(rows, update_columns=('name', 'city', 'country', 'search_field'))
+            airports_imported = result.created + result.updated + result.unchanged
             logger.info(f"Successfully imported {airports_imported} airports from array")
             return airports_imported
             
@@ -69,6 +62,7 @@ class AirportService:
     def import_airports_from_csv(self, csv_file_path: str):
         """Import airports from CSV file"""
         try:
+            import pandas as pd
             df = pd.read_csv(csv_file_path)
             
             # Expected columns (adjust based on your CSV)
@@ -78,28 +72,13 @@ class AirportService:
                 if col not in df.columns:
                     raise ValueError(f"Missing required column: {col}")
             
-            airports_imported = 0
-            for _, row in df.iterrows():
+            rows = df.to_dict('records')
+            for row in rows:
                 # Create searchable field
-                search_field = f"{row['city']}, {row['country']} ({row['iata_code']})"
-                
-                airport = Airport(
-                    iata_code=row['iata_code'],
-                    icao_code=row.get('icao_code', ''),
-                    name=row['name'],
-                    city=row['city'],
-                    country=row['country'],
-                    latitude=row.get('latitude'),
-                    longitude=row.get('longitude'),
-                    timezone=row.get('timezone', ''),
-                    search_field=search_field
-                )
-                
-                # Use merge to handle duplicates
-                self.db.merge(airport)
-                airports_imported += 1
+                row['search_field'] = f"{row['city']}, {row['country']} ({row['iata_code']})"
             
-            self.db.commit()
+            result = self.upsert_airports(rows)
+            airports_imported = result.created + result.updated + result.unchanged
             logger.info(f"Successfully imported {airports_imported} airports")
             return airports_imported
             
@@ -107,45 +86,41 @@ class AirportService:
             self.db.rollback()
             logger.error(f"Error importing airports: {str(e)}")
             raise
-    
+
     def search_airports(self, query: str, limit: int = 20):
         """Search airports by IATA code, city, country, or name"""
         if not query or len(query) < 2:
             return []
         
-        search_term = f"%{query.lower()}%"
-        
-        airports = self.db.query(Airport).filter(
-            or_(
-                Airport.iata_code.ilike(search_term),
-                Airport.city.ilike(search_term),
-                Airport.country.ilike(search_term),
-                Airport.name.ilike(search_term),
-                Airport.search_field.ilike(search_term)
-            )
-        ).limit(limit).all()
-        
-        return [airport.to_dict() for airport in airports]
+        # Answered from the in-memory index; ILIKE '%q%' over five columns was a full scan per keystroke
+        return search_airports(query, limit)
     
     def get_airport_by_code(self, airport_code: str):
         """Get airport by code using correct schema"""
         try:
             if not airport_code:
                 return None
+            
+            # Resolve through the registry so known airports cost one primary key lookup
+            airport_id = get_airport_registry().get_id(airport_code)
+            if airport_id is not None:
+                airport = self.db.get(Airport, airport_id)
+                if airport:
+                    return airport
                 
             # Try by iata_code first
             airport = self.db.query(Airport)\
                 .filter(Airport.iata_code == airport_code.upper())\
                 .first()
-            
-            if airport:
-                return airport
                 
             # Try by icao_code as fallback
-            airport = self.db.query(Airport)\
-                .filter(Airport.icao_code == airport_code.upper())\
-                .first()
-                
+            if not airport:
+                airport = self.db.query(Airport)\
+                    .filter(Airport.icao_code == airport_code.upper())\
+                    .first()
+            
+            if airport:
+                get_airport_registry().add(airport)
             return airport
             
         except Exception as e:
@@ -182,6 +157,7 @@ class AirportService:
             try:
                 self.db.commit()
                 self.db.refresh(new_airport)
+                get_airport_registry().add(new_airport)
                 logger.info(f"✅ Created airport: {airport_code}")
                 return new_airport
             except Exception as commit_error:
@@ -220,22 +196,25 @@ class AirportService:
             # Fallback to predefined distances
             return self._get_fallback_distance(dep_iata, dest_iata)
     
-    def _calculate_simple_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-        """Simple distance calculation using Haversine formula"""
-        from math import radians, sin, cos, sqrt, atan2
-        
-        # Convert to radians
-        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    def calculate_distances(self, dep_codes: list, dest_codes: list):
+        """Vectorized calculate_distance; routes with an unknown airport come back as 0"""
+        import numpy as np
+
+        registry = get_airport_registry()
+        distances = np.round(great_circle_km_batch(dep_codes, dest_codes))
         
-        # Haversine formula
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1-a))
-        radius_earth_km = 6371  # Earth's radius in km
-        distance_km = radius_earth_km * c
+        for i, (dep_iata, dest_iata) in enumerate(zip(dep_codes, dest_codes)):
+            if distances[i]:
+                continue
+            if registry.get_id(dep_iata) is not None and registry.get_id(dest_iata) is not None:
+                # Fallback to predefined distances
+                distances[i] = self._get_fallback_distance(dep_iata, dest_iata)
         
-        return distance_km
+        return distances
+    
+    def _calculate_simple_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+        """Simple distance calculation using Haversine formula"""
+        return haversine_degrees_km(lat1, lon1, lat2, lon2)
     
     def _get_fallback_distance(self, dep_iata: str, dest_iata: str) -> float:
         """Fallback distance calculation for airports without coordinates"""
@@ -0,0 +1,143 @@
+import logging
+import math
+from collections import namedtuple
+
+from sqlalchemy import bindparam, insert, select, text, update
+
+from database.models import Airport, utc_now
+
+logger = logging.getLogger(__name__)
+
+UpsertResult = namedtuple('UpsertResult', ['created', 'updated', 'unchanged'])
+
+AIRPORT_COLUMNS = (
+    'iata_code', 'icao_code', 'name', 'city', 'country',
+    'latitude', 'longitude', 'timezone', 'search_field'
+)
+UPDATABLE_COLUMNS = AIRPORT_COLUMNS[1:]
+
+# SQL Server allows 2100 bound parameters per statement and 1000 rows per VALUES list
+MSSQL_MAX_PARAMETERS = 2000
+MSSQL_MAX_VALUES_ROWS = 1000
+
+airports_table = Airport.__table__
+
+
+def _clean(value):
+    if hasattr(value, 'item'):
+        # numpy scalars from pandas
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def normalize_airport_row(data):
+    """A full column dict for one airport, or None when it has no IATA code"""
+    row = {column: _clean(data.get(column)) for column in AIRPORT_COLUMNS}
+    row['iata_code'] = (row['iata_code'] or '').strip().upper()
+    if not row['iata_code']:
+        return None
+    # icao_code is unique, so an empty string may only appear once; store NULL instead
+    row['icao_code'] = (row['icao_code'] or '').strip().upper() or None
+    return row
+
+
+def _without_id(row):
+    return {column: row[column] for column in AIRPORT_COLUMNS}
+
+
+def _chunks(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _sqlite_upsert(db, rows, update_columns, now):
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+    # One single-row statement run through executemany: compiled once and never near
+    # the bound parameter limit, where a multi-row VALUES list compiles per chunk
+    statement = sqlite_insert(airports_table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[airports_table.c.iata_code],
+        set_={**{column: statement.excluded[column] for column in update_columns},
+              'updated_at': statement.excluded.updated_at}
+    )
+    db.execute(statement, [dict(row, created_at=now, updated_at=now) for row in rows])
+
+
+def _mssql_merge(db, rows, update_columns, now):
+    columns = [*AIRPORT_COLUMNS, 'created_at', 'updated_at']
+    column_list = ', '.join(f"[{column}]" for column in columns)
+    update_list = ', '.join(f"target.[{column}] = source.[{column}]" for column in (*update_columns, 'updated_at'))
+    insert_list = ', '.join(f"source.[{column}]" for column in columns)
+
+    chunk_rows = min(MSSQL_MAX_PARAMETERS // len(columns), MSSQL_MAX_VALUES_ROWS)
+    for chunk in _chunks(rows, chunk_rows):
+        values = ',\n'.join(
+            '(' + ', '.join(f":{column}_{i}" for column in columns) + ')' for i in range(len(chunk))
+        )
+        params = {
+            f"{column}_{i}": value
+            for i, row in enumerate(chunk)
+            for column, value in dict(row, created_at=now, updated_at=now).items()
+        }
+        db.execute(text(
+            f"MERGE INTO [airports] WITH (HOLDLOCK) AS target\n"
+            f"USING (VALUES\n{values}\n) AS source ({column_list})\n"
+            f"ON target.[iata_code] = source.[iata_code]\n"
+            f"WHEN MATCHED THEN UPDATE SET {update_list}\n"
+            f"WHEN NOT MATCHED THEN INSERT ({column_list}) VALUES ({insert_list});"
+        ), params)
+
+
+def _generic_upsert(db, inserts, updates, update_columns, now):
+    """Diff-driven insert/update for dialects without a native upsert"""
+    if inserts:
+        db.execute(insert(airports_table), [dict(row, created_at=now, updated_at=now) for row in inserts])
+    if updates:
+        statement = update(airports_table).where(airports_table.c.id == bindparam('_id')).values(
+            **{column: bindparam(column) for column in update_columns}, updated_at=now
+        )
+        db.execute(statement, [{'_id': row['_id'], **{column: row[column] for column in update_columns}}
+                               for row in updates])
+
+
+def upsert_airports(db, airports, update_columns=UPDATABLE_COLUMNS):
+    """
+    Insert new airports and update changed ones in a handful of statements.
+    Existing rows are read in one query and diffed in memory, so unchanged
+    airports are not written at all; update_columns limits which columns an
+    existing airport may have overwritten. Does not commit.
+    """
+    rows = {}
+    for data in airports:
+        row = normalize_airport_row(data)
+        if row:
+            rows[row['iata_code']] = row
+
+    columns = [airports_table.c.id] + [airports_table.c[column] for column in AIRPORT_COLUMNS]
+    existing = {row.iata_code: row for row in db.execute(select(*columns)).all()}
+
+    inserts, updates = [], []
+    for code, row in rows.items():
+        current = existing.get(code)
+        if current is None:
+            inserts.append(row)
+        elif any(getattr(current, column) != row[column] for column in update_columns):
+            updates.append(dict(row, _id=current.id))
+
+    now = utc_now()
+    dialect = db.get_bind().dialect.name
+    if inserts or updates:
+        if dialect == 'sqlite':
+            _sqlite_upsert(db, inserts + [_without_id(row) for row in updates], update_columns, now)
+        elif dialect == 'mssql':
+            _mssql_merge(db, inserts + [_without_id(row) for row in updates], update_columns, now)
+        else:
+            _generic_upsert(db, inserts, updates, update_columns, now)
+
+    result = UpsertResult(len(inserts), len(updates), len(rows) - len(inserts) - len(updates))
+    logger.info(f"✈️ Airport upsert ({dialect}): {result.created} created, {result.updated} updated, "
+                f"{result.unchanged} unchanged")
+    return result
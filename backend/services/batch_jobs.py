@@ -0,0 +1,87 @@
+import hashlib
+import logging
+import os
+from sqlalchemy.orm import Session
+
+from database.models import BatchJob, utc_now
+
+logger = logging.getLogger(__name__)
+
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+# CSV row numbers start at 2, after the header line
+FIRST_DATA_ROW = 2
+
+FINGERPRINT_BLOCK_SIZE = 1024 * 1024
+
+
+def file_fingerprint(file_path):
+    """
+    Identifies a CSV file independent of its name from its size, mtime and
+    a hash of its first block, so a large file is not read twice.
+    """
+    stat = os.stat(file_path)
+    digest = hashlib.sha256(f"{stat.st_size}:{stat.st_mtime_ns}:".encode())
+    with open(file_path, 'rb') as f:
+        digest.update(f.read(FINGERPRINT_BLOCK_SIZE))
+    return digest.hexdigest()
+
+
+class BatchJobStore:
+    """
+    Creates and checkpoints BatchJob rows on the batch session. Checkpoints
+    are not committed here; they ride along with the writer's commit so the
+    mark never gets ahead of or behind the inserted rows.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def start(self, file_path, batch_params):
+        """Resume the interrupted job for this file and params, or open a new one"""
+        file_hash = file_fingerprint(file_path)
+        job = self.db.query(BatchJob)\
+            .filter(BatchJob.file_hash == file_hash, BatchJob.status == JOB_RUNNING)\
+            .order_by(BatchJob.id.desc())\
+            .first()
+
+        if job and job.batch_params == batch_params:
+            job.resume_count += 1
+            self.db.commit()
+            logger.info(f"♻️ Resuming job {job.id} for {job.file_name} after row {job.last_committed_row}")
+            return job, True
+
+        job = BatchJob(
+            file_hash=file_hash,
+            file_name=os.path.basename(file_path),
+            file_size=os.path.getsize(file_path),
+            batch_params=batch_params,
+            status=JOB_RUNNING,
+            last_committed_row=FIRST_DATA_ROW - 1,
+            processed_rows=0,
+            error_rows=0,
+            resume_count=0
+        )
+        self.db.add(job)
+        self.db.commit()
+        return job, False
+
+    def checkpoint(self, job, last_row, processed_rows, error_rows, deferred_rows=None):
+        """Stage the new mark, and the parked rows it has moved past, in the current transaction"""
+        job.last_committed_row = last_row
+        job.deferred_rows = list(deferred_rows) if deferred_rows else None
+        job.processed_rows = processed_rows
+        job.error_rows = error_rows
+        job.updated_at = utc_now()
+
+    def finish(self, job, status, last_row=None, processed_rows=None, error_rows=None):
+        if last_row is not None:
+            self.checkpoint(job, last_row, processed_rows, error_rows)
+        job.status = status
+        job.completed_at = utc_now()
+        self.db.commit()
+
+    def recent(self, limit=20):
+        return self.db.query(BatchJob).order_by(BatchJob.id.desc()).limit(limit).all()
@@ -1,13 +1,24 @@
 import csv
-import pandas as pd
 import os
 import logging
 import shutil
 from sqlalchemy.orm import Session
 from datetime import datetime
 from typing import Dict, List
+from config import config
 from .calculation_service import CalculationService
 from .airport_service import AirportService
+from .icao_fetcher import ConcurrentICAOFetcher
+from .icao_emissions import get_icao_emissions
+from .airport_registry import get_airport_registry
+from .calculation_writer import CalculationWriter
+from .csv_stream import CSVStream, clean_csv_header, count_csv_lines, read_csv_header
+from .progress import get_progress_tracker
+from .batch_jobs import JOB_COMPLETED, JOB_FAILED, BatchJobStore
+from .emissions_model import (
+    CALCULATION_MODE_HYBRID, CALCULATION_MODE_ICAO, CALCULATION_MODE_MODEL, CALCULATION_MODES,
+    BatchEmissionsEstimator, get_emissions_model
+)
 
 logger = logging.getLogger(__name__)
 
@@ -18,25 +29,18 @@ class BatchService:
     def _count_csv_rows(self, file_path):
         """Count total rows in CSV file"""
         try:
-            with open(file_path, 'r', encoding='utf-8-sig') as file:
-                # Read sample to detect header
-                sample = file.read(1024)
-                file.seek(0)
-                
-                has_header = any(keyword in sample.upper() for keyword in 
-                               ['DEPARTURE', 'DESTINATION', 'PASSENGER', 'CABIN', 'ROUND'])
-                
-                csv_reader = csv.reader(file)
-                
-                # Skip header if present
-                if has_header:
-                    next(csv_reader, None)
-                
-                # Count rows
-                row_count = sum(1 for row in csv_reader)
-                return row_count
+            header = read_csv_header(file_path) or []
+            has_header = any(keyword in ','.join(header).upper() for keyword in 
+                           ['DEPARTURE', 'DESTINATION', 'PASSENGER', 'CABIN', 'ROUND'])
+            
+            row_count = count_csv_lines(file_path)
+            
+            # Skip header if present
+            if has_header:
+                row_count -= 1
+            return max(row_count, 0)
         except Exception as e:
-            print(f"❌ Error counting CSV rows: {e}")
+            logger.error(f"❌ Error counting CSV rows: {e}")
             return 0
     
     def _validate_airport_code(self, code):
@@ -51,82 +55,44 @@ class BatchService:
             return None
         
         try:
+            if get_airport_registry().get_id(clean_code) is not None:
+                return clean_code
+            
             from database.models import Airport
             airport = self.db.query(Airport).filter(Airport.iata_code == clean_code).first()
             
             if airport:
                 return clean_code
             else:
-                print(f"❌ Airport not found in database: {clean_code}")
+                logger.debug(f"❌ Airport not found in database: {clean_code}")
                 return None
         except Exception as e:
-            print(f"❌ Airport validation error for {clean_code}: {e}")
+            logger.warning(f"❌ Airport validation error for {clean_code}: {e}")
             return None
 
 
 class DirectBatchService:
-    def __init__(self, db_session):
+    def __init__(self, db_session, progress=None):
         self.db = db_session
-        # ADD THIS PROGRESS TRACKING
-        self.current_progress = {
-            'status': 'idle',
-            'message': 'Ready for processing',
-            'current_row': 0,
-            'total_rows': 0,
-            'processed_rows': 0,
-            'error_rows': 0,
-            'progress_percent': 0
-        }
+        # Instances share the process-wide tracker unless given their own
+        self.progress = progress or get_progress_tracker()
+
+    @property
+    def current_progress(self):
+        """Snapshot of the shared batch progress"""
+        return self.progress.snapshot()
 
     def update_progress(self, **kwargs):
-        """Update progress information - FIXED VERSION"""
-        for key, value in kwargs.items():
-            if key in self.current_progress:
-                self.current_progress[key] = value
-        
-        # DEBUG: Print the full progress state to see what's happening
-        print(f"🔄 Progress updated: {self.current_progress}")
-        
-        # Ensure status is always set during processing
-        if 'status' not in kwargs and self.current_progress.get('current_row', 0) > 0:
-            # If we're processing rows but status wasn't explicitly set, ensure it's 'processing'
-            if self.current_progress['status'] == 'idle':
-                self.current_progress['status'] = 'processing'
+        """Update progress information; subscribers are notified at a throttled rate"""
+        self.progress.update(**kwargs)
 
     def reset_progress(self):
         """Reset progress to idle state"""
-        self.current_progress.update({
-            'status': 'idle',
-            'message': 'Ready for processing',
-            'current_row': 0,
-            'total_rows': 0,
-            'processed_rows': 0,
-            'error_rows': 0,
-            'progress_percent': 0
-        })
+        self.progress.reset()
     
     def clean_csv_header(self, header):
         """Remove BOM and clean CSV header"""
-        cleaned_header = []
-        for field in header:
-            # Remove BOM character if present
-            if field.startswith('\ufeff'):
-                field = field.replace('\ufeff', '')
-            # Clean the field name
-            field = field.strip().lower()
-            # Map common column names
-            if field in ['departure_iata', 'departure', 'from', 'origin']:
-                field = 'departure_iata'
-            elif field in ['destination_iata', 'destination', 'to', 'arrival']:
-                field = 'destination_iata'
-            elif field in ['passengers', 'pax']:
-                field = 'passengers'
-            elif field in ['cabin_class', 'cabin', 'class']:
-                field = 'cabin_class'
-            elif field in ['round_trip', 'roundtrip', 'return']:
-                field = 'round_trip'
-            cleaned_header.append(field)
-        return cleaned_header
+        return clean_csv_header(header)
     
     def _validate_airport_code(self, code):
         """Validate and clean airport code - SIMPLIFIED VERSION"""
@@ -145,11 +111,18 @@ class DirectBatchService:
     def _get_airport_id(self, iata_code):
         """Get airport ID from IATA code"""
         try:
+            registry = get_airport_registry()
+            airport_id = registry.get_id(iata_code)
+            if airport_id is not None:
+                return airport_id
+            
             from database.models import Airport
             airport = self.db.query(Airport).filter(Airport.iata_code == iata_code).first()
+            if airport:
+                registry.add(airport)
             return airport.id if airport else None
         except Exception as e:
-            print(f"❌ Error getting airport ID for {iata_code}: {e}")
+            logger.warning(f"❌ Error getting airport ID for {iata_code}: {e}")
             return None
     
     def _debug_model_structure(self):
@@ -158,21 +131,134 @@ class DirectBatchService:
             from database.models import FlightCalculation as EnhancedFlightCalculation
             import inspect
             
-            print("🔍 DEBUG: EnhancedFlightCalculation model structure:")
+            logger.debug("🔍 DEBUG: EnhancedFlightCalculation model structure:")
             for name, value in inspect.getmembers(EnhancedFlightCalculation):
                 if not name.startswith('_') and not inspect.ismethod(value):
-                    print(f"   {name}: {type(value)}")
+                    logger.debug(f"   {name}: {type(value)}")
             
             # Try to create an instance to see what fields are required
             test_instance = EnhancedFlightCalculation()
-            print("✅ Model can be instantiated")
+            logger.debug("✅ Model can be instantiated")
             return True
         except Exception as e:
-            print(f"❌ Model debug failed: {e}")
+            logger.warning(f"❌ Model debug failed: {e}")
             return False
     
+    def _iter_row_jobs(self, rows, cleaned_header, batch_params, skip_through=0, retry_rows=()):
+        """Turn CSV rows into ICAO fetch jobs, flagging rows that fail validation"""
+        for row_num, row in enumerate(rows, start=2):
+            if row_num <= skip_through and row_num not in retry_rows:
+                # Already handled by an earlier run of this job
+                continue
+            if len(row) < 2:
+                logger.debug(f"⚠️ Row {row_num}: insufficient columns, skipping")
+                yield {'row': row_num, 'error': 'Insufficient columns'}
+                continue
+            
+            # Create dictionary from row using cleaned header
+            row_dict = {}
+            for i, field in enumerate(cleaned_header):
+                if i < len(row):
+                    row_dict[field] = row[i]
+            
+            # Extract data using cleaned field names
+            departure_iata_raw = row_dict.get('departure_iata', '').strip().upper()
+            destination_iata_raw = row_dict.get('destination_iata', '').strip().upper()
+            
+            # Validate airport codes (SIMPLIFIED - just check format)
+            departure = self._validate_airport_code(departure_iata_raw)
+            destination = self._validate_airport_code(destination_iata_raw)
+            
+            if not departure or not destination:
+                logger.debug(f"⚠️ Row {row_num}: invalid airport codes '{departure_iata_raw}' -> '{destination_iata_raw}', skipping")
+                yield {'row': row_num, 'error': f'Invalid airport codes: {departure_iata_raw} -> {destination_iata_raw}'}
+                continue
+            
+            if departure == destination:
+                logger.debug(f"⚠️ Row {row_num}: same airport {departure}, skipping")
+                yield {'row': row_num, 'error': f'Same airport: {departure}'}
+                continue
+            
+            # Unknown airports fail here, before an ICAO call is spent on the row
+            departure_airport_id = self._get_airport_id(departure)
+            destination_airport_id = self._get_airport_id(destination)
+            missing = [code for code, airport_id in ((departure, departure_airport_id), (destination, destination_airport_id)) if not airport_id]
+            if missing:
+                logger.debug(f"❌ Row {row_num}: airport not found in database: {', '.join(missing)}")
+                yield {'row': row_num, 'error': f"Airport not found in database: {', '.join(missing)}"}
+                continue
+            
+            # USE BATCH PARAMETERS INSTEAD OF CSV VALUES
+            yield {
+                'row': row_num,
+                'error': None,
+                'departure': departure,
+                'destination': destination,
+                'departure_airport_id': departure_airport_id,
+                'destination_airport_id': destination_airport_id,
+                'passengers': batch_params['passengers'],
+                'cabin_class': batch_params['cabinClass'],
+                'round_trip': batch_params['roundTrip'],
+                'calculation_mode': batch_params.get('calculationMode', CALCULATION_MODE_ICAO)
+            }
+    
+    @staticmethod
+    def _route_key(job):
+        """Dedup key for a row job - batch params are fixed for the whole file"""
+        if job['error']:
+            return None
+        return (job['departure'], job['destination'])
+    
+    def _fetch_row_emissions(self, job):
+        """ICAO lookup for one row job - runs on a fetcher worker thread"""
+        if job['error']:
+            return None
+        
+        logger.debug(f"🛫 Processing row {job['row']}: {job['departure']} -> {job['destination']} with params: {job['passengers']}pax, {job['cabin_class']}, {job['round_trip'] and 'round trip' or 'one way'}")
+        
+        # STRICT MODE: No fallbacks. Throttling, an open circuit or a timeout
+        # parks the row in the fetcher, which retries it after the rest move on
+        try:
+            return get_icao_emissions(
+                departure=job['departure'],
+                destination=job['destination'],
+                passengers=job['passengers'],
+                round_trip=job['round_trip'],
+                cabin_class=job['cabin_class']
+            )
+        except Exception:
+            if job.get('calculation_mode') != CALCULATION_MODE_HYBRID:
+                raise
+            # HYBRID MODE: the offline model answers when ICAO cannot
+            result = get_emissions_model().estimate(
+                job['departure'], job['destination'], job['passengers'], job['round_trip'], job['cabin_class']
+            )
+            if result is None:
+                raise
+            return result
+    
     # STRICT MODE - NO FALLBACK IF ICAO FAILS
-    def process_flight_csv(self, file_path, batch_size=50, batch_params=None):
+    def _apply_flush(self, flushed, processed_rows, error_rows, writer):
+        """Record ids from a writer flush and turn rows the database rejected into errors"""
+        for row_result, calculation_id in flushed.written:
+            row_result['calculation_id'] = calculation_id
+        for row_result, error in flushed.failed:
+            processed_rows -= 1
+            error_rows += 1
+            row_result.pop('departure', None)
+            row_result.pop('destination', None)
+            row_result.pop('batch_params_applied', None)
+            row_result.update({
+                'success': False,
+                'calculation_id': None,
+                'error': f'Database error: {error}'
+            })
+            logger.debug(f"❌ Row {row_result['row']} database error: {error}")
+        if flushed.written or flushed.failed:
+            logger.debug(f"💾 Committed batch {writer.flushes} ({writer.rows_written} total written)")
+        return processed_rows, error_rows
+    
+    def process_flight_csv(self, file_path, batch_size=None, batch_params=None, max_workers=None):
         """Process CSV using direct function calls - STRICT MODE: No fallbacks on ICAO failure"""
         try:
             print(f"🔄 Processing {file_path} with DIRECT FUNCTION CALLS - STRICT MODE")
@@ -185,6 +271,11 @@ class DirectBatchService:
                     'cabinClass': 'economy',
                     'roundTrip': False
                 }
+            batch_size = batch_size or config.batch.flush_size
+            calculation_mode = batch_params.get('calculationMode', CALCULATION_MODE_ICAO)
+            if calculation_mode not in CALCULATION_MODES:
+                return {'success': False, 'error': f'Unknown calculationMode: {calculation_mode}'}
+            job = None
             
             # RESET PROGRESS AT START
             self.reset_progress()
@@ -206,14 +297,12 @@ class DirectBatchService:
             processed_rows = 0
             error_rows = 0
             results = []
-            batch_count = 0
             
-            # Use utf-8-sig to handle BOM automatically
-            with open(file_path, 'r', encoding='utf-8-sig') as file:
-                csv_reader = csv.reader(file)
-                
+            # Single streaming pass; utf-8-sig handles the BOM and progress
+            # comes from the byte offset instead of a separate counting pass
+            with CSVStream(file_path) as stream:
                 # Read and clean header
-                header = next(csv_reader, None)
+                header = stream.header
                 if header:
                     cleaned_header = self.clean_csv_header(header)
                     print(f"📋 CSV header (cleaned): {cleaned_header}")
@@ -222,18 +311,61 @@ class DirectBatchService:
                     self.update_progress(status='failed', message='Empty CSV file')
                     return {'success': False, 'error': 'Empty CSV file'}
                 
-                total_rows = sum(1 for row in csv_reader)
-                file.seek(0)  # Reset to beginning
-                next(csv_reader, None)  # Skip header again
+                # Pick up where an interrupted run of the same file and params stopped
+                jobs = BatchJobStore(self.db)
+                job, resumed = jobs.start(file_path, batch_params)
+                last_row = job.last_committed_row
+                # Parked rows the checkpoint moved past; they count once they resolve
+                deferred_rows = set(job.deferred_rows or ())
+                if resumed:
+                    processed_rows = job.processed_rows
+                    error_rows = job.error_rows
+                    print(f"♻️ Resuming job {job.id} after row {last_row} ({processed_rows} successful, {error_rows} errors so far)")
                 
-                # UPDATE PROGRESS WITH TOTAL ROWS - MAKE SURE STATUS STAYS 'processing'
+                # Staged by the writer inside each flush transaction. row_marks holds the
+                # checkpoint as of each buffered row for when a flush commits row by row.
+                checkpoint = {'row': last_row, 'processed': processed_rows, 'errors': error_rows, 'deferred': sorted(deferred_rows)}
+                row_marks = {}
+                def stage_checkpoint(failed_count, token=None):
+                    if token is None:
+                        mark = checkpoint
+                        row_marks.clear()
+                    else:
+                        mark = row_marks[token['row']]
+                    jobs.checkpoint(job, mark['row'], mark['processed'] - failed_count, mark['errors'] + failed_count, mark['deferred'])
+                
+                # UPDATE PROGRESS - MAKE SURE STATUS STAYS 'processing'
                 self.update_progress(
                     status='processing',  # Keep status as processing
-                    total_rows=total_rows,
-                    message=f'Processing {total_rows} rows from {file_path} with batch params: {batch_params} - STRICT MODE'
+                    message=f'Processing {file_path} ({stream.file_size / (1024 * 1024):.1f} MB) with batch params: {batch_params} - STRICT MODE'
                 )
                 
-                for row_num, row in enumerate(csv_reader, start=2):
+                # ICAO lookups run concurrently; outcomes come back in row order
+                # so this loop stays the single DB writer. Rows repeating a route
+                # already seen in this file reuse its lookup instead of calling ICAO again.
+                if calculation_mode == CALCULATION_MODE_MODEL:
+                    # MODEL MODE: no network, whole chunks estimated at once
+                    fetcher = BatchEmissionsEstimator(get_emissions_model())
+                    lookup_label = 'Emissions model'
+                else:
+                    # HYBRID MODE falls back to the model, so a failure there is final
+                    max_park_seconds = 0 if calculation_mode == CALCULATION_MODE_HYBRID else None
+                    fetcher = ConcurrentICAOFetcher(self._fetch_row_emissions, max_workers=max_workers, max_park_seconds=max_park_seconds)
+                    lookup_label = 'ICAO API'
+
+                writer = CalculationWriter(self.db, flush_size=batch_size, on_commit=stage_checkpoint)
+                row_jobs = self._iter_row_jobs(stream, cleaned_header, batch_params, skip_through=last_row, retry_rows=frozenset(deferred_rows))
+                
+                for outcome in fetcher.fetch_ordered(row_jobs, key_fn=self._route_key):
+                    row_job = outcome.job
+                    row_num = row_job['row']
+                    # Parked rows settle out of order, so the mark only moves forward
+                    last_row = max(last_row, row_num)
+                    if outcome.parked:
+                        deferred_rows.add(row_num)
+                        continue
+                    deferred_rows.discard(row_num)
+                    total_rows = stream.estimated_total_rows
                     try:
                         # Update progress more frequently - every 5 rows instead of batch_size
                         if row_num % 5 == 0 or row_num == 2:
@@ -242,17 +374,17 @@ class DirectBatchService:
                                 current_row=row_num,
                                 processed_rows=processed_rows,
                                 error_rows=error_rows,
-                                progress_percent=((row_num - 2) / total_rows * 100) if total_rows > 0 else 0,
-                                message=f'Processing row {row_num} of {total_rows} - {processed_rows} successful, {error_rows} failed'
+                                total_rows=total_rows,
+                                progress_percent=stream.progress_percent,
+                                message=f'Processing row {row_num} of ~{total_rows} - {processed_rows} successful, {error_rows} failed'
                             )
                         
                         # Progress update (keep your existing logging)
                         if row_num % batch_size == 0 or row_num == 2:
-                            progress_percent = (row_num / total_rows) * 100 if total_rows > 0 else 0
-                            print(f"📊 Progress: {row_num}/{total_rows} rows ({progress_percent:.1f}%) - {processed_rows} successful, {error_rows} errors")
+                            logger.debug(f"📊 Progress: {row_num}/~{total_rows} rows ({stream.progress_percent:.1f}%) - {processed_rows} successful, {error_rows} errors")
                         
-                        if len(row) < 2:
-                            print(f"⚠️ Row {row_num}: insufficient columns, skipping")
+                        if row_job['error']:
+                            # Row failed validation before any ICAO call
                             error_rows += 1
                             self.update_progress(
                                 status='processing',  # Keep status as processing
@@ -261,40 +393,35 @@ class DirectBatchService:
                             results.append({
                                 'row': row_num,
                                 'success': False,
-                                'error': 'Insufficient columns'
+                                'error': row_job['error']
                             })
                             continue
                         
-                        # Create dictionary from row using cleaned header
-                        row_dict = {}
-                        for i, field in enumerate(cleaned_header):
-                            if i < len(row):
-                                row_dict[field] = row[i]
+                        departure = row_job['departure']
+                        destination = row_job['destination']
+                        passengers = row_job['passengers']
+                        cabin_class = row_job['cabin_class']
+                        round_trip = row_job['round_trip']
                         
-                        # Extract data using cleaned field names
-                        departure_iata_raw = row_dict.get('departure_iata', '').strip().upper()
-                        destination_iata_raw = row_dict.get('destination_iata', '').strip().upper()
-                        
-                        # Validate airport codes (SIMPLIFIED - just check format)
-                        departure = self._validate_airport_code(departure_iata_raw)
-                        destination = self._validate_airport_code(destination_iata_raw)
-                        
-                        if not departure or not destination:
-                            print(f"⚠️ Row {row_num}: invalid airport codes '{departure_iata_raw}' -> '{destination_iata_raw}', skipping")
+                        if outcome.error:
+                            # STRICT MODE: Catch ICAO API exceptions and count as errors
                             error_rows += 1
                             self.update_progress(
                                 status='processing',  # Keep status as processing
                                 error_rows=error_rows
                             )
+                            error_msg = f"{lookup_label} failed: {str(outcome.error)}"
                             results.append({
                                 'row': row_num,
                                 'success': False,
-                                'error': f'Invalid airport codes: {departure_iata_raw} -> {destination_iata_raw}'
+                                'error': error_msg
                             })
+                            logger.debug(f"❌ Row {row_num} ICAO API error for {departure}->{destination}: {error_msg}")
                             continue
                         
-                        if departure == destination:
-                            print(f"⚠️ Row {row_num}: same airport {departure}, skipping")
+                        result = outcome.result
+                        if not result:
+                            # STRICT MODE: If ICAO returns no result, count as error
                             error_rows += 1
                             self.update_progress(
                                 status='processing',  # Keep status as processing
@@ -303,136 +430,59 @@ class DirectBatchService:
                             results.append({
                                 'row': row_num,
                                 'success': False,
-                                'error': f'Same airport: {departure}'
+                                'error': 'ICAO API returned no data'
                             })
+                            logger.debug(f"❌ Row {row_num}: ICAO API returned no data for {departure}->{destination}")
                             continue
                         
-                        # USE BATCH PARAMETERS INSTEAD OF CSV VALUES
-                        # Override CSV values with batch parameters
-                        passengers = batch_params['passengers']
-                        cabin_class = batch_params['cabinClass']
-                        round_trip = batch_params['roundTrip']
+                        # Create flight info
+                        flight_info = f"{departure} to {destination} - {result.get('distance_km', 0)}km"
+                        if round_trip:
+                            flight_info += " (Round Trip)"
+                        flight_info += f" • {cabin_class.replace('_', ' ').title()}"
                         
-                        print(f"🛫 Processing row {row_num}: {departure} -> {destination} with params: {passengers}pax, {cabin_class}, {round_trip and 'round trip' or 'one way'}")
+                        # Buffer the calculation; the writer bulk inserts and commits every flush_size rows
+                        calculation_data = {
+                            'departure_airport_id': row_job['departure_airport_id'],
+                            'destination_airport_id': row_job['destination_airport_id'],
+                            'passengers': passengers,
+                            'round_trip': round_trip,
+                            'cabin_class': cabin_class,
+                            'fuel_burn_kg': float(result.get('fuel_burn_kg', 0)),
+                            'total_co2_kg': float(result.get('total_co2_kg', 0)),
+                            'co2_per_passenger_kg': float(result.get('co2_per_passenger_kg', 0)),
+                            'co2_tonnes': float(result.get('co2_tonnes', 0)),
+                            'distance_km': float(result.get('distance_km', 0)),
+                            'distance_miles': float(result.get('distance_miles', 0)),
+                            'flight_info': flight_info,
+                            'calculation_method': result.get('data_source', 'DIRECT_CALL'),
+                        }
                         
-                        # Use direct function call from app.py - STRICT MODE: No fallbacks
-                        from app import get_icao_emissions
-                        try:
-                            result = get_icao_emissions(
-                                departure=departure,
-                                destination=destination,
-                                passengers=passengers,
-                                round_trip=round_trip,
-                                cabin_class=cabin_class
-                            )
-                            
-                            if result:
-                                # Create flight info
-                                flight_info = f"{departure} to {destination} - {result.get('distance_km', 0)}km"
-                                if round_trip:
-                                    flight_info += " (Round Trip)"
-                                flight_info += f" • {cabin_class.replace('_', ' ').title()}"
-                                
-                                # FIXED: Use EnhancedFlightCalculation for automation database
-                                from database.models import FlightCalculation as EnhancedFlightCalculation
-                                
-                                # Get airport IDs
-                                departure_airport_id = self._get_airport_id(departure)
-                                destination_airport_id = self._get_airport_id(destination)
-                                
-                                # Create calculation
-                                try:
-                                    calculation_data = {
-                                        'passengers': passengers,
-                                        'round_trip': round_trip,
-                                        'cabin_class': cabin_class,
-                                        'fuel_burn_kg': float(result.get('fuel_burn_kg', 0)),
-                                        'total_co2_kg': float(result.get('total_co2_kg', 0)),
-                                        'co2_per_passenger_kg': float(result.get('co2_per_passenger_kg', 0)),
-                                        'co2_tonnes': float(result.get('co2_tonnes', 0)),
-                                        'distance_km': float(result.get('distance_km', 0)),
-                                        'distance_miles': float(result.get('distance_miles', 0)),
-                                        'flight_info': flight_info,
-                                        'calculation_method': result.get('data_source', 'DIRECT_CALL'),
-                                    }
-                                    
-                                    # Add airport IDs if we have them
-                                    if departure_airport_id:
-                                        calculation_data['departure_airport_id'] = departure_airport_id
-                                    if destination_airport_id:
-                                        calculation_data['destination_airport_id'] = destination_airport_id
-                                    
-                                    calculation = EnhancedFlightCalculation(**calculation_data)
-                                    self.db.add(calculation)
-                                    
-                                    # Commit every batch_size rows
-                                    if processed_rows % batch_size == 0:
-                                        self.db.commit()
-                                        batch_count += 1
-                                        print(f"💾 Committed batch {batch_count} ({processed_rows} total processed)")
-                                    
-                                    processed_rows += 1
-                                    # UPDATE PROGRESS WITH PROCESSED ROWS - KEEP STATUS AS 'processing'
-                                    self.update_progress(
-                                        status='processing',  # Keep status as processing
-                                        processed_rows=processed_rows,
-                                        progress_percent=(row_num / total_rows * 100) if total_rows > 0 else 0,
-                                        message=f'Processed {processed_rows} rows successfully'
-                                    )
-                                    results.append({
-                                        'row': row_num,
-                                        'departure': departure,
-                                        'destination': destination,
-                                        'success': True,
-                                        'calculation_id': calculation.id,
-                                        'batch_params_applied': batch_params  # Track which params were used
-                                    })
-                                    print(f"✅ Row {row_num} processed successfully - ID: {calculation.id}")
-                                    
-                                except Exception as db_error:
-                                    self.db.rollback()
-                                    error_rows += 1
-                                    self.update_progress(
-                                        status='processing',  # Keep status as processing even on errors
-                                        error_rows=error_rows
-                                    )
-                                    results.append({
-                                        'row': row_num,
-                                        'success': False,
-                                        'error': f'Database error: {str(db_error)}'
-                                    })
-                                    print(f"❌ Database error for {departure}->{destination}: {db_error}")
-                                    continue
-                                    
-                            else:
-                                # STRICT MODE: If ICAO returns no result, count as error
-                                error_rows += 1
-                                self.update_progress(
-                                    status='processing',  # Keep status as processing
-                                    error_rows=error_rows
-                                )
-                                results.append({
-                                    'row': row_num,
-                                    'success': False,
-                                    'error': 'ICAO API returned no data'
-                                })
-                                print(f"❌ Row {row_num}: ICAO API returned no data for {departure}->{destination}")
-                                
-                        except Exception as icao_error:
-                            # STRICT MODE: Catch ICAO API exceptions and count as errors
-                            error_rows += 1
-                            self.update_progress(
-                                status='processing',  # Keep status as processing
-                                error_rows=error_rows
-                            )
-                            error_msg = f"ICAO API failed: {str(icao_error)}"
-                            results.append({
-                                'row': row_num,
-                                'success': False,
-                                'error': error_msg
-                            })
-                            print(f"❌ Row {row_num} ICAO API error for {departure}->{destination}: {error_msg}")
-                            continue
+                        row_result = {
+                            'row': row_num,
+                            'departure': departure,
+                            'destination': destination,
+                            'success': True,
+                            'calculation_id': None,  # Filled in when the writer flushes
+                            'batch_params_applied': batch_params  # Track which params were used
+                        }
+                        results.append(row_result)
+                        processed_rows += 1
+                        
+                        checkpoint.update(row=last_row, processed=processed_rows, errors=error_rows, deferred=sorted(deferred_rows))
+                        row_marks[row_num] = dict(checkpoint)
+                        flushed = writer.add(calculation_data, token=row_result)
+                        if flushed:
+                            processed_rows, error_rows = self._apply_flush(flushed, processed_rows, error_rows, writer)
+                        
+                        # UPDATE PROGRESS WITH PROCESSED ROWS - KEEP STATUS AS 'processing'
+                        self.update_progress(
+                            status='processing',  # Keep status as processing
+                            processed_rows=processed_rows,
+                            error_rows=error_rows,
+                            progress_percent=stream.progress_percent,
+                            message=f'Processed {processed_rows} rows successfully'
+                        )
                             
                     except Exception as e:
                         error_rows += 1
@@ -445,20 +495,27 @@ class DirectBatchService:
                             'success': False,
                             'error': f'Unexpected error: {str(e)}'
                         })
-                        print(f"❌ Row {row_num} unexpected error: {str(e)}")
+                        logger.debug(f"❌ Row {row_num} unexpected error: {str(e)}")
                         self.db.rollback()
                         continue
             
-            # Final commit
-            try:
-                self.db.commit()
-                print("💾 Final commit completed")
-            except Exception as e:
-                self.db.rollback()
-                print(f"❌ Final commit error: {e}")
+            # Final flush of whatever is still buffered
+            checkpoint.update(row=last_row, processed=processed_rows, errors=error_rows, deferred=sorted(deferred_rows))
+            processed_rows, error_rows = self._apply_flush(writer.flush(), processed_rows, error_rows, writer)
+            jobs.finish(job, JOB_COMPLETED, last_row, processed_rows, error_rows)
+            print("💾 Final commit completed")
             
             print(f"🎉 STRICT MODE Processing complete: {processed_rows} successful, {error_rows} errors")
             
+            route_rows = fetcher.keyed_jobs
+            dedup = {
+                'route_rows': route_rows,
+                'unique_routes': fetcher.unique_fetches,
+                'icao_lookups_saved': route_rows - fetcher.unique_fetches,
+                'dedup_ratio': round(route_rows / fetcher.unique_fetches, 2) if fetcher.unique_fetches else 1.0
+            }
+            print(f"🔁 Route dedup: {dedup['route_rows']} rows -> {dedup['unique_routes']} unique routes ({dedup['dedup_ratio']}x)")
+            
             # Calculate success rate BEFORE using it
             success_rate = (processed_rows / (processed_rows + error_rows)) * 100 if (processed_rows + error_rows) > 0 else 0
             
@@ -466,6 +523,7 @@ class DirectBatchService:
             self.update_progress(
                 status='completed',  # FINALLY set to completed
                 message=f'STRICT MODE Processing completed: {processed_rows} successful, {error_rows} errors',
+                total_rows=processed_rows + error_rows,
                 processed_rows=processed_rows,
                 error_rows=error_rows,
                 progress_percent=100
@@ -481,12 +539,23 @@ class DirectBatchService:
                 'original_filename': original_filename,
                 'success_rate': round(success_rate, 1),
                 'batch_params_used': batch_params,  # Include which params were used
-                'strict_mode': True  # Indicate strict mode was used
+                'strict_mode': calculation_mode == CALCULATION_MODE_ICAO,  # Indicate strict mode was used
+                'calculation_mode': calculation_mode,
+                'parked_rows': fetcher.parked_jobs,
+                'dedup': dedup,
+                'job_id': job.id,
+                'resumed': resumed
             }
             
         except Exception as e:
-            print(f"💥 File processing error: {str(e)}")
+            logger.error(f"💥 File processing error: {str(e)}")
             self.db.rollback()
+            if job is not None:
+                try:
+                    jobs.finish(job, JOB_FAILED)
+                except Exception as finish_error:
+                    logger.error(f"❌ Could not mark batch job {job.id} failed: {finish_error}")
+                    self.db.rollback()
             self.update_progress(
                 status='failed',  # Set to failed on exception
                 message=f'STRICT MODE Processing failed: {str(e)}',
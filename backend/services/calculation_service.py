@@ -1,6 +1,9 @@
 from sqlalchemy.orm import Session, joinedload
 from database.models import FlightCalculation, Airport
 from .airport_service import AirportService
+from .icao_client import get_icao_client
+from .airport_registry import get_airport_registry
+from .distance import fallback_emissions_batch
 from datetime import datetime
 import logging
 import requests
@@ -143,13 +146,14 @@ class CalculationService:
                 country="Unknown",
                 latitude=coords[0],
                 longitude=coords[1],
-                search=f"{airport_code} Airport"
+                search_field=f"{airport_code} Airport"
             )
             
             self.db.add(new_airport)
             try:
                 self.db.commit()
                 self.db.refresh(new_airport)
+                get_airport_registry().add(new_airport)
                 logger.info(f"✅ Created airport: {airport_code}")
                 return new_airport
             except Exception as commit_error:
@@ -220,8 +224,6 @@ class CalculationService:
         try:
             logger.info(f"🌐 Calling ICAO API for {departure} -> {destination}")
             
-            url = "https://icec.icao.int/Home/PassengerCompute"
-            
             # CORRECTED: Map cabin class to ICAO numeric format
             cabin_class_mapping = {
                 "economy": 0,
@@ -250,16 +252,7 @@ class CalculationService:
                 "NumberOfPassenger": passengers
             }
             
-            headers = {
-                "Content-Type": "application/json; charset=UTF-8",
-                "Accept": "application/json, text/javascript, */*; q=0.01",
-                "X-Requested-With": "XMLHttpRequest",
-                "Origin": "https://icec.icao.int",
-                "Referer": "https://icec.icao.int/calculator",
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }
-            
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response = get_icao_client().compute(payload)
             
             logger.info(f"📡 ICAO API Response Status: {response.status_code}")
             
@@ -441,61 +434,46 @@ class CalculationService:
     def _calculate_enhanced_fallback(self, departure: str, destination: str, passengers: int, round_trip: bool, cabin_class: str):
         """Enhanced fallback when ICAO API fails with better error handling"""
         try:
-            # Calculate real distance with better error handling
-            distance_km = 0
-            try:
-                distance_km = self.airport_service.calculate_distance(departure, destination)
-            except Exception as e:
-                logger.warning(f"📏 Distance calculation failed for {departure}->{destination}: {e}")
-            
-            if distance_km == 0:
-                # Use common route distances as fallback
-                common_distances = {
-                    # Add more common routes here
-                    'ALA-FRU': 200,  # Almaty to Bishkek
-                    'FRU-ALA': 200,
-                }
-                
-                route_key = f"{departure.upper()}-{destination.upper()}"
-                distance_km = common_distances.get(route_key, 800)  # Default to 800km
-                logger.info(f"📏 Using estimated distance for {route_key}: {distance_km} km")
-            
-            # Rest of the calculation logic remains the same...
-            CO2_PER_KG_FUEL = 3.16
-            BASE_FUEL_PER_PAX_KM = 0.01766
-            
-            cabin_multipliers = {
-                "economy": 1.0, "premium_economy": 1.3, "business": 1.8, "first": 2.5
-            }
-            
-            multiplier = cabin_multipliers.get(cabin_class, 1.0)
-            fuel_per_passenger_one_way = distance_km * BASE_FUEL_PER_PAX_KM * multiplier
-            
-            if round_trip:
-                fuel_per_passenger_total = fuel_per_passenger_one_way * 2
-                co2_per_passenger = fuel_per_passenger_total * CO2_PER_KG_FUEL
-            else:
-                fuel_per_passenger_total = fuel_per_passenger_one_way
-                co2_per_passenger = fuel_per_passenger_one_way * CO2_PER_KG_FUEL
-            
-            total_co2 = co2_per_passenger * passengers
-            total_fuel = fuel_per_passenger_total * passengers
-
-            return {
-                'fuel_burn_kg': round(total_fuel),
-                'total_co2_kg': round(total_co2),
-                'co2_per_passenger_kg': round(co2_per_passenger),
-                'co2_tonnes': round(total_co2 / 1000, 3),
-                'distance_km': round(distance_km),
-                'distance_miles': round(distance_km * 0.621371),
-                'cabin_class': cabin_class,
-                'data_source': 'ENHANCED_FALLBACK'
-            }
+            return self._calculate_enhanced_fallback_batch([{
+                'departure': departure,
+                'destination': destination,
+                'passengers': passengers,
+                'round_trip': round_trip,
+                'cabin_class': cabin_class
+            }])[0]
             
         except Exception as e:
             logger.error(f"❌ Enhanced fallback failed for {departure}->{destination}: {e}")
             return self._calculate_basic_fallback(departure, destination, passengers, round_trip, cabin_class)
 
+    def _calculate_enhanced_fallback_batch(self, routes: list):
+        """Enhanced fallback for a whole batch of routes in one vectorized pass"""
+        if not routes:
+            return []
+        
+        departures = [route['departure'].upper() for route in routes]
+        destinations = [route['destination'].upper() for route in routes]
+        distances = self.airport_service.calculate_distances(departures, destinations)
+        
+        # Use common route distances where the airports are unknown
+        common_distances = {
+            # Add more common routes here
+            'ALA-FRU': 200,  # Almaty to Bishkek
+            'FRU-ALA': 200,
+        }
+        for i in (distances == 0).nonzero()[0]:
+            route_key = f"{departures[i]}-{destinations[i]}"
+            distances[i] = common_distances.get(route_key, 800)  # Default to 800km
+            logger.info(f"📏 Using estimated distance for {route_key}: {distances[i]} km")
+        
+        return fallback_emissions_batch(
+            distances,
+            [route['passengers'] for route in routes],
+            [route['round_trip'] for route in routes],
+            [route['cabin_class'] for route in routes],
+            'ENHANCED_FALLBACK'
+        )
+
     def _calculate_basic_fallback(self, departure: str, destination: str, passengers: int, round_trip: bool, cabin_class: str):
         """Basic fallback"""
         try:
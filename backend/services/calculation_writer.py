@@ -0,0 +1,101 @@
+import logging
+from collections import namedtuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from config import config
+from database.models import FlightCalculation, utc_now
+from .change_feed import CHANGE_INSERT, record_changes
+
+logger = logging.getLogger(__name__)
+
+# written: [(token, calculation_id)], failed: [(token, error message)]
+FlushResult = namedtuple('FlushResult', ['written', 'failed'])
+
+CALCULATION_COLUMNS = (
+    'departure_airport_id', 'destination_airport_id', 'passengers', 'round_trip',
+    'cabin_class', 'distance_km', 'distance_miles', 'fuel_burn_kg', 'total_co2_kg',
+    'co2_per_passenger_kg', 'co2_tonnes', 'calculation_method', 'flight_info',
+    'created_at', 'created_by'
+)
+
+
+class CalculationWriter:
+    """
+    Buffers FlightCalculation rows and writes them with one Core
+    INSERT ... RETURNING per flush, committing after each flush.
+    Each row carries an opaque token so callers can map ids back.
+    on_commit(failed_count, token=None) runs inside each flush transaction
+    just before it commits, so callers can stage a checkpoint with the rows.
+    When a bulk insert falls back to row-by-row, it also runs in each row's
+    own transaction with that row's token and the failures so far.
+    """
+
+    def __init__(self, db: Session, flush_size: int = None, on_commit=None):
+        self.db = db
+        self.on_commit = on_commit
+        self.flush_size = max(1, flush_size or config.batch.flush_size)
+        self.buffer = []
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.flushes = 0
+        self.statement = insert(FlightCalculation).returning(
+            FlightCalculation.id, sort_by_parameter_order=True
+        )
+
+    def add(self, values: dict, token=None):
+        """Buffer one row; returns a FlushResult when this row triggered a flush"""
+        row = {column: values.get(column) for column in CALCULATION_COLUMNS}
+        row['created_at'] = row['created_at'] or utc_now()
+        row['calculation_method'] = row['calculation_method'] or 'ICAO_API'
+        self.buffer.append((token, row))
+        if len(self.buffer) >= self.flush_size:
+            return self.flush()
+        return None
+
+    def flush(self):
+        """Insert everything buffered and commit"""
+        pending, self.buffer = self.buffer, []
+        if not pending:
+            return FlushResult([], [])
+
+        try:
+            ids = self.db.execute(self.statement, [row for _, row in pending]).scalars().all()
+            # Core inserts skip mapper events, so feed the change log directly
+            record_changes(self.db, ids, CHANGE_INSERT)
+            if self.on_commit:
+                self.on_commit(0)
+            self.db.commit()
+            written = list(zip((token for token, _ in pending), ids))
+            failed = []
+        except Exception as e:
+            self.db.rollback()
+            logger.warning(f"⚠️ Bulk insert of {len(pending)} rows failed, retrying row by row: {e}")
+            written, failed = self._write_individually(pending)
+            if self.on_commit:
+                # Close out the flush, including trailing rows that failed
+                self.on_commit(len(failed))
+                self.db.commit()
+
+        self.flushes += 1
+        self.rows_written += len(written)
+        self.rows_failed += len(failed)
+        return FlushResult(written, failed)
+
+    def _write_individually(self, pending):
+        """Isolate the rows that broke a bulk insert"""
+        written = []
+        failed = []
+        for token, row in pending:
+            try:
+                calculation_id = self.db.execute(self.statement, [row]).scalar_one()
+                record_changes(self.db, [calculation_id], CHANGE_INSERT)
+                if self.on_commit:
+                    self.on_commit(len(failed), token)
+                self.db.commit()
+                written.append((token, calculation_id))
+            except Exception as e:
+                self.db.rollback()
+                failed.append((token, str(e)))
+        return written, failed
@@ -0,0 +1,237 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from sqlalchemy import delete, event, func, insert, select
+
+from config import config
+from database.models import CalculationChange, FlightCalculation, utc_now
+
+logger = logging.getLogger(__name__)
+
+CHANGE_INSERT = 'insert'
+CHANGE_DELETE = 'delete'
+# Written instead of one row per id when the whole table is cleared
+CHANGE_RESET = 'reset'
+
+DEFAULT_FEED_LIMIT = 1000
+# Stays under SQLite's bound parameter limit for IN (...) deletes
+DELETE_CHUNK_SIZE = 900
+
+changes_table = CalculationChange.__table__
+
+
+def record_changes(connection, calculation_ids, change_type):
+    """
+    Append change rows on a Connection or Session, inside the caller's
+    transaction so the feed commits or rolls back with the data.
+    """
+    if change_type == CHANGE_RESET:
+        calculation_ids = [None]
+    if not calculation_ids:
+        return
+    now = utc_now()
+    connection.execute(
+        insert(changes_table),
+        [{'calculation_id': calculation_id, 'change_type': change_type, 'created_at': now}
+         for calculation_id in calculation_ids]
+    )
+
+
+def _after_insert(mapper, connection, target):
+    record_changes(connection, [target.id], CHANGE_INSERT)
+
+
+def _after_delete(mapper, connection, target):
+    record_changes(connection, [target.id], CHANGE_DELETE)
+
+
+def track_model(model_class):
+    """Record ORM inserts and deletes of a flight calculation model in the feed"""
+    if not event.contains(model_class, 'after_insert', _after_insert):
+        event.listen(model_class, 'after_insert', _after_insert)
+        event.listen(model_class, 'after_delete', _after_delete)
+
+
+def delete_calculations(db, calculation_ids):
+    """Bulk delete calculations by id and record the deletions; returns the count"""
+    deleted = 0
+    calculation_ids = list(calculation_ids)
+    for start in range(0, len(calculation_ids), DELETE_CHUNK_SIZE):
+        chunk = calculation_ids[start:start + DELETE_CHUNK_SIZE]
+        deleted += db.execute(
+            delete(FlightCalculation).where(FlightCalculation.id.in_(chunk)),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+        record_changes(db, chunk, CHANGE_DELETE)
+    return deleted
+
+
+def _settle_cutoff():
+    return utc_now() - timedelta(seconds=config.change_feed.commit_settle_seconds)
+
+
+def current_sequence(db):
+    """
+    Starting position for a new reader, 0 when the feed is empty. SQLite
+    serializes writers, so the latest seq is safe there. Elsewhere identity
+    values can commit out of order, so a new reader starts behind the
+    changes of the last commit_settle_seconds and lets read_changes wait
+    for any gap in them to fill.
+    """
+    if db.get_bind().dialect.name == 'sqlite':
+        return db.execute(select(func.max(changes_table.c.seq))).scalar() or 0
+    settled = db.execute(
+        select(changes_table.c.seq)
+        .where(changes_table.c.created_at < _settle_cutoff())
+        .order_by(changes_table.c.seq.desc())
+        .limit(1)
+    ).scalar()
+    if settled is not None:
+        return settled
+    oldest = db.execute(select(func.min(changes_table.c.seq))).scalar()
+    return oldest - 1 if oldest is not None else 0
+
+
+def read_changes(db, since, limit=DEFAULT_FEED_LIMIT):
+    """
+    Net changes after `since`: ids inserted and ids deleted, with rows that
+    were both added and removed in the window cancelled out. `reset` means
+    the table was cleared, or the changes after `since` were pruned, and
+    clients should reload from scratch.
+    
+    A gap in seq may be a transaction that took its identity value but has
+    not committed yet (SQL Server and other concurrent writers). Reading
+    stops before a gap until the row after it is commit_settle_seconds old;
+    a gap that old is a rollback or an identity jump and is skipped.
+    """
+    oldest = db.execute(select(func.min(changes_table.c.seq))).scalar()
+    pruned_past_cursor = oldest is not None and since < oldest - 1
+    rows = db.execute(
+        select(changes_table.c.seq, changes_table.c.calculation_id, changes_table.c.change_type,
+               changes_table.c.created_at)
+        .where(changes_table.c.seq > since)
+        .order_by(changes_table.c.seq)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    settle_cutoff = _settle_cutoff()
+    expected = since + 1
+    for position, row in enumerate(rows):
+        # Pruning leaves a gap before the first row; the reset already covers it
+        gap = row.seq != expected and not (pruned_past_cursor and position == 0)
+        if gap and row.created_at is not None and row.created_at >= settle_cutoff:
+            rows = rows[:position]
+            has_more = False
+            break
+        expected = row.seq + 1
+
+    inserted = {}
+    deleted = set()
+    reset = pruned_past_cursor
+    for _, calculation_id, change_type, _ in rows:
+        if change_type == CHANGE_RESET:
+            reset = True
+            inserted.clear()
+            deleted.clear()
+        elif change_type == CHANGE_INSERT:
+            inserted[calculation_id] = None
+            deleted.discard(calculation_id)
+        elif calculation_id in inserted:
+            del inserted[calculation_id]
+        else:
+            deleted.add(calculation_id)
+
+    return {
+        'since': since,
+        'seq': rows[-1].seq if rows else since,
+        'inserted': list(inserted),
+        'deleted': sorted(deleted),
+        'reset': reset,
+        'has_more': has_more
+    }
+
+
+class CursorTracker:
+    """
+    Feed positions of recently seen clients. Pruning never removes changes
+    a tracked client has yet to read; clients idle longer than idle_seconds
+    stop holding the feed back.
+    """
+
+    def __init__(self, idle_seconds):
+        self.idle_seconds = idle_seconds
+        self._cursors = {}  # client key -> (seq, last seen)
+        self._lock = threading.Lock()
+
+    def touch(self, client, seq):
+        with self._lock:
+            self._cursors[client] = (seq, time.monotonic())
+
+    def release(self, client):
+        with self._lock:
+            self._cursors.pop(client, None)
+
+    def oldest(self):
+        """Smallest cursor among active clients, None when there are none"""
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            for client in [client for client, (_, seen) in self._cursors.items() if seen < cutoff]:
+                del self._cursors[client]
+            return min((seq for seq, _ in self._cursors.values()), default=None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._cursors)
+
+
+_cursor_tracker = None
+_cursor_tracker_lock = threading.Lock()
+_last_prune = 0.0
+
+
+def get_cursor_tracker():
+    """Process-wide tracker of change feed cursors"""
+    global _cursor_tracker
+    if _cursor_tracker is None:
+        with _cursor_tracker_lock:
+            if _cursor_tracker is None:
+                _cursor_tracker = CursorTracker(config.change_feed.cursor_idle_seconds)
+    return _cursor_tracker
+
+
+def prune_changes(db, older_than, oldest_cursor=None):
+    """
+    Delete change rows created before older_than that no client still needs:
+    rows at or below oldest_cursor, or all old rows when no cursor is active.
+    The newest row is always kept so current_sequence never goes back.
+    Does not commit; returns the number of rows deleted.
+    """
+    latest = current_sequence(db)
+    floor = latest - 1 if oldest_cursor is None else min(oldest_cursor, latest - 1)
+    if floor <= 0:
+        return 0
+    return db.execute(
+        delete(changes_table)
+        .where(changes_table.c.seq <= floor)
+        .where(changes_table.c.created_at < older_than)
+    ).rowcount
+
+
+def prune_changes_if_due(db):
+    """Prune the feed past its retention window, at most once per prune interval"""
+    global _last_prune
+    now = time.monotonic()
+    with _cursor_tracker_lock:
+        if now - _last_prune < config.change_feed.prune_interval_seconds:
+            return 0
+        _last_prune = now
+    older_than = utc_now() - timedelta(hours=config.change_feed.retention_hours)
+    pruned = prune_changes(db, older_than, get_cursor_tracker().oldest())
+    db.commit()
+    if pruned:
+        logger.info(f"🧹 Pruned {pruned} change feed rows older than {older_than:%Y-%m-%d %H:%M}")
+    return pruned
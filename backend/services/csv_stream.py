@@ -0,0 +1,136 @@
+import codecs
+import csv
+import os
+
+CHUNK_SIZE = 1024 * 1024
+# Bytes read from the head of a file to estimate its row count
+ESTIMATE_SAMPLE_SIZE = 64 * 1024
+
+
+def clean_csv_header(header):
+    """Remove BOM and clean CSV header"""
+    cleaned_header = []
+    for field in header:
+        # Remove BOM character if present
+        if field.startswith('\ufeff'):
+            field = field.replace('\ufeff', '')
+        # Clean the field name
+        field = field.strip().lower()
+        # Map common column names
+        if field in ['departure_iata', 'departure', 'from', 'origin']:
+            field = 'departure_iata'
+        elif field in ['destination_iata', 'destination', 'to', 'arrival']:
+            field = 'destination_iata'
+        elif field in ['passengers', 'pax']:
+            field = 'passengers'
+        elif field in ['cabin_class', 'cabin', 'class']:
+            field = 'cabin_class'
+        elif field in ['round_trip', 'roundtrip', 'return']:
+            field = 'round_trip'
+        cleaned_header.append(field)
+    return cleaned_header
+
+
+def read_csv_header(file_path, encoding='utf-8-sig'):
+    """Parse only the first line of a CSV file, or None if it is empty"""
+    with open(file_path, 'rb') as file:
+        first_line = file.readline()
+    if not first_line.strip():
+        return None
+    return next(csv.reader([first_line.decode(encoding)]), None)
+
+
+def count_csv_lines(file_path):
+    """Count lines with a raw newline scan, without parsing any rows"""
+    lines = 0
+    last = b'\n'
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+            lines += chunk.count(b'\n')
+            last = chunk[-1:]
+    # A final line without a trailing newline still counts
+    if last != b'\n':
+        lines += 1
+    return lines
+
+
+def estimate_csv_rows(file_path, sample_size=ESTIMATE_SAMPLE_SIZE):
+    """
+    Data rows in a CSV file, extrapolated from the file size and the average
+    row length in its first sample_size bytes. Exact for files that fit in
+    the sample; never reads more than that.
+    """
+    file_size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as file:
+        sample = file.read(sample_size)
+    header_end = sample.find(b'\n') + 1
+    if not header_end:
+        return 0
+    rows = sample.count(b'\n', header_end)
+    if len(sample) == file_size:
+        # Whole file read: count a final row without a trailing newline too
+        return rows + (1 if sample[-1:] != b'\n' and len(sample) > header_end else 0)
+    if not rows:
+        return 1
+    data_bytes = sample.rindex(b'\n') + 1 - header_end
+    return round(rows * (file_size - header_end) / data_bytes)
+
+
+class CSVStream:
+    """
+    Single-pass CSV reader that parses each row once and reports progress
+    from the byte offset, so large files never need a counting pass.
+
+        with CSVStream(path) as stream:
+            header = stream.header
+            for row in stream:
+                ...
+    """
+
+    def __init__(self, file_path, encoding='utf-8-sig'):
+        self.file_path = file_path
+        self.encoding = encoding
+        self.file_size = os.path.getsize(file_path)
+        self.header = None
+        self.header_bytes = 0
+        self.bytes_read = 0
+        self.rows_read = 0
+        self._file = None
+        self._reader = None
+
+    def __enter__(self):
+        self._file = open(self.file_path, 'rb')
+        self._reader = csv.reader(self._decoded_lines())
+        self.header = next(self._reader, None)
+        self.header_bytes = self.bytes_read
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._file.close()
+        return False
+
+    def _decoded_lines(self):
+        decoder = codecs.getincrementaldecoder(self.encoding)()
+        for line in self._file:
+            self.bytes_read += len(line)
+            yield decoder.decode(line)
+
+    def __iter__(self):
+        for row in self._reader:
+            self.rows_read += 1
+            yield row
+
+    @property
+    def progress_percent(self):
+        if not self.file_size:
+            return 100.0
+        return min(100.0, self.bytes_read / self.file_size * 100)
+
+    @property
+    def estimated_total_rows(self):
+        """Data rows in the file, extrapolated from the average row size so far"""
+        data_bytes = self.bytes_read - self.header_bytes
+        if not self.rows_read or data_bytes <= 0:
+            return self.rows_read
+        estimate = round(self.rows_read * (self.file_size - self.header_bytes) / data_bytes)
+        return max(estimate, self.rows_read)
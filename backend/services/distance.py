@@ -0,0 +1,102 @@
+# numpy is imported inside the functions so importing this module stays cheap
+from .airport_registry import get_airport_registry
+
+EARTH_RADIUS_KM = 6371.0
+KM_TO_MILES = 0.621371
+
+# Fallback fuel model shared by the app and CalculationService estimates
+CO2_PER_KG_FUEL = 3.16
+BASE_FUEL_PER_PAX_KM = 0.01766
+CABIN_MULTIPLIERS = {
+    "economy": 1.0,
+    "premium_economy": 1.3,
+    "business": 1.8,
+    "first": 2.5
+}
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km for scalars or arrays of radians"""
+    import numpy as np
+
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def haversine_degrees_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km between two points given in degrees"""
+    import numpy as np
+
+    return float(haversine_km(*np.radians([lat1, lon1, lat2, lon2])))
+
+
+def _ordinals_for(codes, ordinals):
+    import numpy as np
+
+    return np.fromiter(
+        (ordinals.get((code or '').strip().upper(), -1) for code in codes),
+        dtype=np.int64,
+        count=len(codes)
+    )
+
+
+def great_circle_km_batch(departures, destinations):
+    """
+    Distances in km for parallel sequences of airport codes.
+    Routes with an unknown airport or missing coordinates come back as 0.
+    """
+    import numpy as np
+
+    _, ordinals, lat, lon = get_airport_registry().coordinate_arrays()
+    dep = _ordinals_for(departures, ordinals)
+    dest = _ordinals_for(destinations, ordinals)
+    if len(dep) == 0:
+        return np.zeros(0)
+
+    # The precomputed matrix shares the registry ordinals when it is current
+    from .distance_matrix import get_distance_matrix
+    matrix = get_distance_matrix()
+    if matrix is not None:
+        distances = matrix.lookup(dep, dest)
+    else:
+        distances = haversine_km(lat[dep], lon[dep], lat[dest], lon[dest])
+
+    # Index -1 reads the last airport, so mask unknown codes afterwards
+    distances[(dep < 0) | (dest < 0)] = np.nan
+    return np.nan_to_num(distances, nan=0.0)
+
+
+def great_circle_km(departure, destination):
+    """Distance in km between two airport codes, or 0 when unknown"""
+    return float(great_circle_km_batch([departure], [destination])[0])
+
+
+def fallback_emissions_batch(distances_km, passengers, round_trips, cabin_classes, data_source):
+    """Distance-based fuel and CO2 estimates for a whole batch of routes"""
+    import numpy as np
+
+    distances_km = np.asarray(distances_km, dtype=float)
+    passengers = np.asarray(passengers, dtype=float)
+    legs = np.where(np.asarray(round_trips, dtype=bool), 2.0, 1.0)
+    multipliers = np.array([CABIN_MULTIPLIERS.get((cabin or '').lower(), 1.0) for cabin in cabin_classes])
+
+    fuel_per_passenger = distances_km * BASE_FUEL_PER_PAX_KM * multipliers * legs
+    co2_per_passenger = fuel_per_passenger * CO2_PER_KG_FUEL
+    total_co2 = co2_per_passenger * passengers
+    total_fuel = fuel_per_passenger * passengers
+
+    return [
+        {
+            'fuel_burn_kg': round(float(total_fuel[i])),
+            'total_co2_kg': round(float(total_co2[i])),
+            'co2_per_passenger_kg': round(float(co2_per_passenger[i])),
+            'co2_tonnes': round(float(total_co2[i]) / 1000, 3),
+            'distance_km': round(float(distances_km[i])),
+            'distance_miles': round(float(distances_km[i]) * KM_TO_MILES),
+            'cabin_class': cabin_classes[i],
+            'data_source': data_source
+        }
+        for i in range(len(distances_km))
+    ]
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+
+from config import config
+from .airport_registry import get_airport_registry
+from .distance import haversine_km
+
+logger = logging.getLogger(__name__)
+
+# Rows computed per step while building, keeps peak memory to a few MB
+BUILD_CHUNK_ROWS = 256
+
+
+def airport_set_checksum(codes, lat, lon):
+    """Fingerprint of the ordered airport set and its coordinates"""
+    digest = hashlib.sha256()
+    digest.update("\n".join(codes).encode("utf-8"))
+    digest.update(np.ascontiguousarray(lat, dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(lon, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def _meta_path(matrix_path):
+    return os.path.splitext(matrix_path)[0] + ".json"
+
+
+class DistanceMatrix:
+    """Memory-mapped float32 all-pairs distance matrix indexed by airport ordinal"""
+
+    def __init__(self, matrix_path: str, meta: dict):
+        self.path = matrix_path
+        self.checksum = meta['checksum']
+        self.size = meta['size']
+        self.built_at = meta.get('built_at')
+        self.matrix = np.load(matrix_path, mmap_mode='r')
+
+    def lookup(self, dep_ordinals, dest_ordinals):
+        """Distances in km for ordinal arrays, as float64 with NaN where unknown"""
+        return np.asarray(self.matrix[dep_ordinals, dest_ordinals], dtype=np.float64)
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'airports': self.size,
+            'built_at': self.built_at,
+            'checksum': self.checksum[:12]
+        }
+
+
+def read_matrix_meta(matrix_path: str = None):
+    """Sidecar metadata for a built matrix, or None if it has not been built"""
+    meta_path = _meta_path(matrix_path or config.distance.matrix_path)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, 'r') as f:
+        return json.load(f)
+
+
+def build_distance_matrix(matrix_path: str = None, force: bool = False):
+    """
+    Write the all-pairs matrix for the current airport registry.
+    Skips the build when the stored checksum already matches unless forced.
+    Returns True when a new matrix was written.
+    """
+    matrix_path = matrix_path or config.distance.matrix_path
+    codes, _, lat, lon = get_airport_registry().coordinate_arrays()
+    checksum = airport_set_checksum(codes, lat, lon)
+
+    meta = read_matrix_meta(matrix_path)
+    if not force and meta and meta.get('checksum') == checksum and os.path.exists(matrix_path):
+        logger.info(f"📏 Distance matrix at {matrix_path} is up to date ({len(codes)} airports)")
+        return False
+
+    directory = os.path.dirname(matrix_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    size = len(codes)
+    tmp_path = matrix_path + ".tmp"
+    matrix = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=(size, size))
+    for start in range(0, size, BUILD_CHUNK_ROWS):
+        end = min(start + BUILD_CHUNK_ROWS, size)
+        matrix[start:end] = haversine_km(
+            lat[start:end, None], lon[start:end, None],
+            lat[None, :], lon[None, :]
+        )
+    matrix.flush()
+    del matrix
+    os.replace(tmp_path, matrix_path)
+
+    with open(_meta_path(matrix_path), 'w') as f:
+        json.dump({
+            'checksum': checksum,
+            'size': size,
+            'airports_with_coordinates': int(np.count_nonzero(~np.isnan(lat))),
+            'built_at': datetime.now(timezone.utc).isoformat()
+        }, f, indent=2)
+
+    # Make the next lookup pick up the new file
+    global _checked_version
+    with _distance_matrix_lock:
+        _checked_version = None
+
+    logger.info(f"✅ Built {size}x{size} distance matrix at {matrix_path}")
+    return True
+
+
+_distance_matrix = None
+_checked_version = None
+_distance_matrix_lock = threading.Lock()
+
+
+def get_distance_matrix():
+    """
+    Return the precomputed matrix if it exists and matches the current
+    airport set, otherwise None. Re-validated only when the registry changes.
+    """
+    global _distance_matrix, _checked_version
+    if not config.distance.use_matrix:
+        return None
+
+    registry = get_airport_registry()
+    if _checked_version == registry.version:
+        return _distance_matrix
+
+    with _distance_matrix_lock:
+        if _checked_version == registry.version:
+            return _distance_matrix
+
+        version = registry.version
+        matrix_path = config.distance.matrix_path
+        matrix = None
+        try:
+            meta = read_matrix_meta(matrix_path)
+            if meta and os.path.exists(matrix_path):
+                codes, _, lat, lon = registry.coordinate_arrays()
+                if meta.get('checksum') == airport_set_checksum(codes, lat, lon):
+                    if _distance_matrix is not None and _distance_matrix.checksum == meta['checksum']:
+                        matrix = _distance_matrix
+                    else:
+                        matrix = DistanceMatrix(matrix_path, meta)
+                        logger.info(f"📏 Loaded distance matrix for {matrix.size} airports")
+                else:
+                    logger.warning("⚠️ Distance matrix is stale for the current airports, computing distances directly")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load distance matrix from {matrix_path}: {e}")
+
+        _distance_matrix = matrix
+        _checked_version = version
+        return matrix
@@ -0,0 +1,364 @@
+import logging
+import math
+import threading
+import time
+import zlib
+
+from config import config
+from .distance import (
+    BASE_FUEL_PER_PAX_KM, CABIN_MULTIPLIERS, CO2_PER_KG_FUEL, KM_TO_MILES, great_circle_km_batch
+)
+from .icao_fetcher import FetchOutcome
+from .route_cache import get_route_cache
+
+logger = logging.getLogger(__name__)
+
+# batch_params['calculationMode'] values
+CALCULATION_MODE_ICAO = 'icao'
+CALCULATION_MODE_MODEL = 'model'
+CALCULATION_MODE_HYBRID = 'hybrid'
+CALCULATION_MODES = (CALCULATION_MODE_ICAO, CALCULATION_MODE_MODEL, CALCULATION_MODE_HYBRID)
+
+MODEL_DATA_SOURCE = 'EMISSIONS_MODEL'
+
+CABIN_CLASSES = ('economy', 'premium_economy', 'business', 'first')
+CABIN_INDEX = {cabin: i for i, cabin in enumerate(CABIN_CLASSES)}
+
+# Upper edges of the great-circle distance bands, per leg
+DISTANCE_BAND_EDGES_KM = (500.0, 1000.0, 1500.0, 2500.0, 4000.0, 6000.0, 9000.0, math.inf)
+
+ESTIMATE_CHUNK_ROWS = 1000
+
+
+def _band_of(distances_km):
+    import numpy as np
+
+    return np.searchsorted(DISTANCE_BAND_EDGES_KM, distances_km, side='left')
+
+
+def _cabin_of(cabin_classes):
+    import numpy as np
+
+    return np.fromiter(
+        (CABIN_INDEX.get((cabin or 'economy').lower(), 0) for cabin in cabin_classes),
+        dtype=np.int64,
+        count=len(cabin_classes)
+    )
+
+
+def _fit_line(distances_km, co2_kg):
+    """Least-squares co2 = intercept + slope * distance"""
+    import numpy as np
+
+    if len(distances_km) >= 2 and np.ptp(distances_km) > 0:
+        slope, intercept = np.polyfit(distances_km, co2_kg, 1)
+        if slope > 0:
+            return intercept, slope
+    # Too little spread for a line: keep it proportional to distance
+    return 0.0, float(np.sum(co2_kg) / np.sum(distances_km))
+
+
+def _holdout_mask(departures, destinations, holdout_percent):
+    """Deterministic route-level split; a route and its reverse land on the same side"""
+    import numpy as np
+
+    return np.fromiter(
+        (zlib.crc32(f"{min(dep, dest)}-{max(dep, dest)}".encode()) % 100 < holdout_percent
+         for dep, dest in zip(departures, destinations)),
+        dtype=bool,
+        count=len(departures)
+    )
+
+
+class TrainingSamples:
+    """Per-leg ICAO answers from the route cache, aligned with great-circle distances"""
+
+    def __init__(self, departures, destinations, cabins, distances_km, co2_kg, icao_distances_km):
+        self.departures = departures
+        self.destinations = destinations
+        self.cabins = cabins
+        self.distances_km = distances_km
+        self.co2_kg = co2_kg
+        self.icao_distances_km = icao_distances_km
+
+    def __len__(self):
+        return len(self.co2_kg)
+
+    def subset(self, mask):
+        return TrainingSamples(
+            [dep for dep, keep in zip(self.departures, mask) if keep],
+            [dest for dest, keep in zip(self.destinations, mask) if keep],
+            self.cabins[mask], self.distances_km[mask], self.co2_kg[mask], self.icao_distances_km[mask]
+        )
+
+    @classmethod
+    def from_route_cache(cls, route_cache=None):
+        import numpy as np
+
+        route_cache = route_cache or get_route_cache()
+        departures, destinations, cabins, co2, icao_distance = [], [], [], [], []
+        for departure, destination, cabin_class, round_trip, summary in route_cache.entries():
+            legs = 2 if round_trip else 1
+            co2_per_passenger = summary.get('co2_per_passenger') or 0
+            if co2_per_passenger <= 0:
+                continue
+            departures.append(departure)
+            destinations.append(destination)
+            cabins.append(cabin_class)
+            co2.append(co2_per_passenger / legs)
+            icao_distance.append((summary.get('distance') or 0) / legs)
+
+        distances = great_circle_km_batch(departures, destinations)
+        # Routes whose airports have no coordinates cannot be used
+        known = distances > 0
+        return cls(
+            departures, destinations, _cabin_of(cabins), distances, np.asarray(co2, dtype=float),
+            np.asarray(icao_distance, dtype=float)
+        ).subset(known)
+
+
+class EmissionsModel:
+    """
+    Piecewise-linear estimate of ICAO per-passenger CO2 from great-circle
+    distance, with one line per cabin class and distance band, held in small
+    numpy tables so whole batches are predicted with a few array lookups
+    """
+
+    def __init__(self, coefficients, distance_ratios, sample_counts, trained_samples=0, holdout=None):
+        self.coefficients = coefficients  # [cabin, band, (intercept, slope)]
+        self.distance_ratios = distance_ratios  # [cabin, band] ICAO distance / great-circle distance
+        self.sample_counts = sample_counts  # [cabin, band]
+        self.trained_samples = trained_samples
+        self.holdout = holdout
+        self.fitted_at = time.time()
+
+    @classmethod
+    def fit(cls, samples, min_band_samples=None):
+        """Fit the per cabin and band lines; sparse cells borrow from wider fits"""
+        import numpy as np
+
+        min_band_samples = min_band_samples or config.emissions_model.min_band_samples
+        cabins, bands = len(CABIN_CLASSES), len(DISTANCE_BAND_EDGES_KM)
+        coefficients = np.zeros((cabins, bands, 2))
+        distance_ratios = np.ones((cabins, bands))
+        sample_counts = np.zeros((cabins, bands), dtype=np.int64)
+        fitted_cabins = np.zeros(cabins, dtype=bool)
+
+        band_of_sample = _band_of(samples.distances_km)
+        ratios = np.divide(
+            samples.icao_distances_km, samples.distances_km,
+            out=np.ones_like(samples.distances_km), where=samples.icao_distances_km > 0
+        )
+
+        for cabin in range(cabins):
+            in_cabin = samples.cabins == cabin
+            if not in_cabin.any():
+                continue
+            fitted_cabins[cabin] = True
+            cabin_line = _fit_line(samples.distances_km[in_cabin], samples.co2_kg[in_cabin])
+            cabin_ratio = float(np.median(ratios[in_cabin]))
+            for band in range(bands):
+                in_band = in_cabin & (band_of_sample == band)
+                count = int(in_band.sum())
+                sample_counts[cabin, band] = count
+                if count >= min_band_samples:
+                    coefficients[cabin, band] = _fit_line(samples.distances_km[in_band], samples.co2_kg[in_band])
+                    distance_ratios[cabin, band] = float(np.median(ratios[in_band]))
+                else:
+                    coefficients[cabin, band] = cabin_line
+                    distance_ratios[cabin, band] = cabin_ratio
+
+        # Cabins never seen scale from economy, or from the constant fuel model without any data
+        economy = CABIN_INDEX['economy']
+        for cabin_class, cabin in CABIN_INDEX.items():
+            if fitted_cabins[cabin]:
+                continue
+            multiplier = CABIN_MULTIPLIERS.get(cabin_class, 1.0)
+            if fitted_cabins[economy]:
+                coefficients[cabin] = coefficients[economy] * multiplier
+                distance_ratios[cabin] = distance_ratios[economy]
+            else:
+                coefficients[cabin] = (0.0, BASE_FUEL_PER_PAX_KM * CO2_PER_KG_FUEL * multiplier)
+
+        return cls(coefficients, distance_ratios, sample_counts, trained_samples=len(samples))
+
+    @classmethod
+    def fit_with_holdout(cls, samples, holdout_percent=None, min_band_samples=None):
+        """Score a fit on routes held out of training, then refit on everything"""
+        holdout_percent = config.emissions_model.holdout_percent if holdout_percent is None else holdout_percent
+        holdout = None
+        if len(samples) and holdout_percent > 0:
+            mask = _holdout_mask(samples.departures, samples.destinations, holdout_percent)
+            if mask.any() and (~mask).any():
+                trial = cls.fit(samples.subset(~mask), min_band_samples)
+                holdout = trial.evaluate(samples.subset(mask))
+                holdout['holdout_percent'] = holdout_percent
+        model = cls.fit(samples, min_band_samples)
+        model.holdout = holdout
+        return model
+
+    def predict(self, distances_km, cabins):
+        """Per-passenger, per-leg CO2 and ICAO trip distance for great-circle distances"""
+        import numpy as np
+
+        distances_km = np.asarray(distances_km, dtype=float)
+        bands = _band_of(distances_km)
+        intercept = self.coefficients[cabins, bands, 0]
+        slope = self.coefficients[cabins, bands, 1]
+        co2 = np.maximum(intercept + slope * distances_km, 0.0)
+        return co2, distances_km * self.distance_ratios[cabins, bands]
+
+    def evaluate(self, samples):
+        """Error of predictions against known ICAO answers, per cabin and overall"""
+        import numpy as np
+
+        predicted, _ = self.predict(samples.distances_km, samples.cabins)
+        abs_error = np.abs(predicted - samples.co2_kg)
+        pct_error = abs_error / samples.co2_kg * 100
+
+        def summarize(mask):
+            if not mask.any():
+                return None
+            return {
+                'samples': int(mask.sum()),
+                'mae_kg': round(float(abs_error[mask].mean()), 2),
+                'mape_pct': round(float(pct_error[mask].mean()), 2),
+                'p90_pct_error': round(float(np.percentile(pct_error[mask], 90)), 2)
+            }
+
+        return {
+            'overall': summarize(np.ones(len(samples), dtype=bool)),
+            'by_cabin': {
+                cabin_class: summarize(samples.cabins == cabin)
+                for cabin_class, cabin in CABIN_INDEX.items()
+                if (samples.cabins == cabin).any()
+            }
+        }
+
+    def estimate_batch(self, departures, destinations, passengers, round_trips, cabin_classes):
+        """
+        Result dicts shaped like build_icao_result for a whole batch of routes.
+        Routes with an unknown airport come back as None.
+        """
+        import numpy as np
+
+        distances = great_circle_km_batch(departures, destinations)
+        co2_per_leg, icao_distance_per_leg = self.predict(distances, _cabin_of(cabin_classes))
+        legs = np.where(np.asarray(round_trips, dtype=bool), 2.0, 1.0)
+        co2_per_passenger = co2_per_leg * legs
+        total_co2 = co2_per_passenger * np.asarray(passengers, dtype=float)
+        total_distance = icao_distance_per_leg * legs
+
+        return [
+            {
+                'fuel_burn_kg': round(float(total_co2[i]) / CO2_PER_KG_FUEL),
+                'total_co2_kg': round(float(total_co2[i])),
+                'co2_per_passenger_kg': round(float(co2_per_passenger[i])),
+                'co2_tonnes': round(float(total_co2[i]) / 1000, 3),
+                'distance_km': round(float(total_distance[i])),
+                'distance_miles': round(float(total_distance[i]) * KM_TO_MILES),
+                'cabin_class': cabin_classes[i],
+                'data_source': MODEL_DATA_SOURCE
+            } if distances[i] > 0 else None
+            for i in range(len(distances))
+        ]
+
+    def estimate(self, departure, destination, passengers, round_trip, cabin_class):
+        return self.estimate_batch([departure], [destination], [passengers], [round_trip], [cabin_class])[0]
+
+    def summary(self):
+        return {
+            'trained_samples': self.trained_samples,
+            'fitted_at': self.fitted_at,
+            'distance_bands_km': [edge if math.isfinite(edge) else None for edge in DISTANCE_BAND_EDGES_KM],
+            'band_samples': {
+                cabin_class: self.sample_counts[cabin].tolist() for cabin_class, cabin in CABIN_INDEX.items()
+            },
+            'holdout': self.holdout
+        }
+
+
+class BatchEmissionsEstimator:
+    """
+    Drop-in for ConcurrentICAOFetcher in batch runs that use the model:
+    jobs are estimated in vectorized chunks and yielded in input order
+    """
+
+    def __init__(self, model, chunk_rows: int = ESTIMATE_CHUNK_ROWS):
+        self.model = model
+        self.chunk_rows = chunk_rows
+        self.total_jobs = 0
+        self.keyed_jobs = 0
+        self.unique_fetches = 0
+        self.parked_jobs = 0
+
+    def _estimate_chunk(self, chunk):
+        routes = [job for job in chunk if not job['error']]
+        start = time.perf_counter()
+        results = iter(self.model.estimate_batch(
+            [job['departure'] for job in routes],
+            [job['destination'] for job in routes],
+            [job['passengers'] for job in routes],
+            [job['round_trip'] for job in routes],
+            [job['cabin_class'] for job in routes]
+        ))
+        elapsed = (time.perf_counter() - start) / max(len(routes), 1)
+
+        for job in chunk:
+            if job['error']:
+                yield FetchOutcome(job, None, None, 0.0, False)
+                continue
+            result = next(results)
+            error = None if result else ValueError(f"No coordinates for {job['departure']} -> {job['destination']}")
+            yield FetchOutcome(job, result, error, elapsed, False)
+
+    def fetch_ordered(self, jobs, key_fn=None):
+        chunk = []
+        seen = set()
+        for job in jobs:
+            self.total_jobs += 1
+            key = key_fn(job) if key_fn else None
+            if key is not None:
+                self.keyed_jobs += 1
+                if key not in seen:
+                    seen.add(key)
+                    self.unique_fetches += 1
+            chunk.append(job)
+            if len(chunk) >= self.chunk_rows:
+                yield from self._estimate_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield from self._estimate_chunk(chunk)
+
+
+_emissions_model = None
+_emissions_model_lock = threading.Lock()
+
+
+def _fit_from_route_cache():
+    start = time.perf_counter()
+    samples = TrainingSamples.from_route_cache()
+    model = EmissionsModel.fit_with_holdout(samples)
+    overall = (model.holdout or {}).get('overall') or {}
+    logger.info(f"📈 Emissions model fitted on {len(samples)} cached routes in {time.perf_counter() - start:.2f}s "
+                f"(holdout MAPE {overall.get('mape_pct', 'n/a')}%)")
+    return model
+
+
+def fit_emissions_model():
+    """Refit on every cached ICAO answer and make the result the current model"""
+    global _emissions_model
+    model = _fit_from_route_cache()
+    with _emissions_model_lock:
+        _emissions_model = model
+    return model
+
+
+def get_emissions_model():
+    """Process-wide emissions model, fitted from the route cache on first use"""
+    global _emissions_model
+    if _emissions_model is None:
+        with _emissions_model_lock:
+            if _emissions_model is None:
+                _emissions_model = _fit_from_route_cache()
+    return _emissions_model
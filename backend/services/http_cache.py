@@ -0,0 +1,114 @@
+import gzip
+import hashlib
+import logging
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Preferred first when the client accepts several
+ENCODINGS = ('br', 'gzip')
+
+
+class PrecompressedPayload:
+    """
+    A serialized response body kept with its strong ETag and gzip/brotli
+    variants, so a repeat request costs a header comparison or a memcpy.
+    """
+
+    def __init__(self, body, version=None, content_type='application/json'):
+        self.version = version
+        self.content_type = content_type
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        # Each encoding is a different representation, so each gets its own strong tag
+        self.variants = {None: (body, digest)}
+        self.variants['gzip'] = (gzip.compress(body, compresslevel=9, mtime=0), f"{digest}-gzip")
+        if brotli is not None:
+            self.variants['br'] = (brotli.compress(body, quality=11), f"{digest}-br")
+
+    def _choose_encoding(self, request):
+        best = None
+        best_quality = 0
+        for encoding in ENCODINGS:
+            quality = request.accept_encodings[encoding]
+            if encoding in self.variants and quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def not_modified(self, request):
+        """True when If-None-Match names any variant of this body"""
+        return any(request.if_none_match.contains(etag) for _, etag in self.variants.values())
+
+    def respond(self, request, max_age=0):
+        from flask import Response
+
+        encoding = self._choose_encoding(request)
+        body, etag = self.variants[encoding]
+        headers = {
+            'ETag': f'"{etag}"',
+            'Cache-Control': f'public, max-age={max_age}, must-revalidate',
+            'Vary': 'Accept-Encoding'
+        }
+        if self.not_modified(request):
+            return Response(status=304, headers=headers)
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        return Response(body, content_type=self.content_type, headers=headers)
+
+    def sizes(self):
+        return {encoding or 'identity': len(body) for encoding, (body, _) in self.variants.items()}
+
+
+class VersionedPayloadCache:
+    """Holds one payload until its source version changes or it is invalidated"""
+
+    def __init__(self, name):
+        self.name = name
+        self._payload = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version, build):
+        """The cached payload for version, calling build() -> bytes on a miss"""
+        payload = self._payload
+        if payload is not None and payload.version == version:
+            self.hits += 1
+            return payload
+        with self._lock:
+            payload = self._payload
+            if payload is None or payload.version != version:
+                payload = PrecompressedPayload(build(), version)
+                self._payload = payload
+                self.misses += 1
+                logger.info(f"📦 Cached {self.name} payload: {payload.sizes()}")
+            else:
+                self.hits += 1
+        return payload
+
+    def invalidate(self):
+        with self._lock:
+            self._payload = None
+
+    def stats(self):
+        payload = self._payload
+        return {
+            'name': self.name,
+            'cached': payload is not None,
+            'version': payload.version if payload else None,
+            'sizes': payload.sizes() if payload else {},
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+_airports_list_cache = VersionedPayloadCache('airports-list')
+
+
+def get_airports_list_cache():
+    """Cache for the /api/v2/automation/airports-list body"""
+    return _airports_list_cache
@@ -0,0 +1,213 @@
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import config
+from .progress import get_progress_tracker
+from .rate_limit import CircuitBreaker, get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# Phrases that identify the HTML pages ICAO serves instead of JSON when throttling
+THROTTLE_PHRASES = ('rate limit', 'too many requests', 'captcha')
+THROTTLE_STATUSES = (429, 503)
+# Wait before retrying a row after a timeout or connection error
+TRANSIENT_RETRY_SECONDS = 2.0
+
+
+class ICAOUnavailable(Exception):
+    """ICAO is throttling us or the circuit is open; retry after retry_after seconds"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _parse_retry_after(response):
+    value = response.headers.get('Retry-After', '')
+    return float(value) if value.strip().isdigit() else None
+
+
+def retry_delay_for(error):
+    """Seconds to park a row before retrying after this error, or None if retrying won't help"""
+    while error is not None:
+        if isinstance(error, ICAOUnavailable):
+            return error.retry_after or TRANSIENT_RETRY_SECONDS
+        if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+            return TRANSIENT_RETRY_SECONDS
+        # Callers re-raise transport errors as plain exceptions; the original is the context
+        error = error.__cause__ or error.__context__
+    return None
+
+
+class ICAOClient:
+    """
+    Shared, thread-safe client for the ICAO carbon calculator.
+    Keeps one pooled keep-alive session and primes its cookies once,
+    refreshing them only when they expire or the server rejects them.
+    """
+
+    HOST = "icec.icao.int"
+    BASE_URL = f"https://{HOST}"
+    CALCULATOR_URL = f"{BASE_URL}/calculator"
+    COMPUTE_URL = f"{BASE_URL}/Home/PassengerCompute"
+
+    # Headers that match what the ICAO website sends
+    HEADERS = {
+        "Content-Type": "application/json; charset=UTF-8",
+        "Accept": "application/json, text/javascript, */*; q=0.01",
+        "X-Requested-With": "XMLHttpRequest",
+        "Origin": BASE_URL,
+        "Referer": CALCULATOR_URL,
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36",
+        "Sec-Ch-Ua": '"Google Chrome";v="141", "Not?A_Brand";v="8", "Chromium";v="141"',
+        "Sec-Ch-Ua-Mobile": "?0",
+        "Sec-Ch-Ua-Platform": '"Windows"',
+        "Sec-Fetch-Dest": "empty",
+        "Sec-Fetch-Mode": "cors",
+        "Sec-Fetch-Site": "same-origin"
+    }
+
+    # Statuses that mean our session cookies are no longer accepted
+    COOKIE_REJECTED_STATUSES = (401, 403, 419, 440)
+
+    def __init__(self, pool_size: int = None, cookie_ttl_seconds: int = None, timeout: float = None,
+                 max_concurrent: int = None):
+        self.pool_size = pool_size or config.icao.pool_size
+        # Shared budget for in-flight requests across every batch worker and fetcher
+        self.max_concurrent = max(1, max_concurrent or config.icao.max_concurrent)
+        self.in_flight = threading.BoundedSemaphore(self.max_concurrent)
+        self.cookie_ttl_seconds = cookie_ttl_seconds if cookie_ttl_seconds is not None else config.icao.cookie_ttl_seconds
+        self.timeout = timeout or config.icao.timeout_seconds
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(self.HEADERS)
+
+        self.cookie_lock = threading.Lock()
+        self.cookies_primed_at = None
+        self.cookie_refreshes = 0
+        self.request_count = 0
+        self.rejected_count = 0
+        self.breaker = CircuitBreaker(
+            config.icao.breaker_failure_threshold,
+            config.icao.breaker_cooldown_seconds
+        )
+
+    def _cookies_stale(self):
+        if self.cookies_primed_at is None:
+            return True
+        if self.cookie_ttl_seconds and time.monotonic() - self.cookies_primed_at > self.cookie_ttl_seconds:
+            return True
+        now = time.time()
+        return any(cookie.expires and cookie.expires <= now for cookie in self.session.cookies)
+
+    def _prime_cookies(self, force=False):
+        """Visit the calculator page once so the session carries ICAO cookies"""
+        if not force and not self._cookies_stale():
+            return
+        with self.cookie_lock:
+            # Another thread may have refreshed while we waited
+            if not force and not self._cookies_stale():
+                return
+            try:
+                logger.info("🔄 Getting session cookies from ICAO...")
+                self.session.get(self.CALCULATOR_URL, timeout=10)
+                self.cookie_refreshes += 1
+            except requests.exceptions.RequestException as e:
+                # Not fatal - the compute endpoint usually answers without cookies
+                logger.warning(f"⚠️ Could not prime ICAO cookies: {e}")
+            self.cookies_primed_at = time.monotonic()
+
+    def compute(self, payload: dict, timeout: float = None):
+        """
+        POST a PassengerCompute payload and return the raw response. Raises
+        ICAOUnavailable without calling out while the circuit is open, and
+        when ICAO answers with a throttling response.
+        """
+        allowed, retry_after = self.breaker.allow()
+        if not allowed:
+            self.rejected_count += 1
+            raise ICAOUnavailable(f"ICAO circuit open, retry in {retry_after:.0f}s", retry_after)
+
+        limiter = get_rate_limiter(self.HOST)
+        try:
+            self._prime_cookies()
+            limiter.acquire()
+            response, latency = self._post(payload, timeout)
+
+            if response.status_code in self.COOKIE_REJECTED_STATUSES:
+                logger.warning(f"🍪 ICAO rejected session ({response.status_code}), refreshing cookies")
+                self._prime_cookies(force=True)
+                limiter.acquire()
+                response, latency = self._post(payload, timeout)
+        except requests.exceptions.RequestException:
+            limiter.on_throttle()
+            self.breaker.record_failure()
+            raise
+
+        return self._record_outcome(response, latency, limiter)
+
+    def _record_outcome(self, response, latency, limiter):
+        """Feed the response into the limiter and breaker"""
+        is_html = response.text.lstrip()[:1] == '<'
+        throttled = response.status_code in THROTTLE_STATUSES or (
+            is_html and any(phrase in response.text.lower() for phrase in THROTTLE_PHRASES)
+        )
+        if throttled:
+            retry_after = _parse_retry_after(response)
+            limiter.on_throttle()
+            self.breaker.record_failure(retry_after)
+            logger.warning(f"🚦 ICAO throttled us ({response.status_code}), now {limiter.rate:.2f} req/s")
+            raise ICAOUnavailable(
+                f"ICAO API is throttling requests (status {response.status_code})",
+                retry_after or 1.0 / limiter.rate
+            )
+        # Any other HTML page goes back to the caller like a JSON error and fails only that row;
+        # parking it would hold the row for up to max_park_seconds on a page retrying won't change
+        if response.status_code >= 500:
+            # Server errors still go back to the caller, but count against the circuit
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+            limiter.on_success(latency)
+        return response
+
+    def _post(self, payload, timeout):
+        with self.in_flight:
+            started = time.monotonic()
+            response = self.session.post(self.COMPUTE_URL, json=payload, timeout=timeout or self.timeout)
+            latency = time.monotonic() - started
+            get_progress_tracker().record_latency(latency)
+        self.request_count += 1
+        return response, latency
+
+    def stats(self):
+        return {
+            'pool_size': self.pool_size,
+            'max_concurrent': self.max_concurrent,
+            'requests': self.request_count,
+            'rejected_while_open': self.rejected_count,
+            'circuit_breaker': self.breaker.stats(),
+            'rate_limiter': get_rate_limiter(self.HOST).stats(),
+            'cookie_refreshes': self.cookie_refreshes,
+            'cookies_age_seconds': round(time.monotonic() - self.cookies_primed_at) if self.cookies_primed_at else None
+        }
+
+
+_icao_client = None
+_icao_client_lock = threading.Lock()
+
+
+def get_icao_client():
+    """Return the process-wide ICAO client"""
+    global _icao_client
+    if _icao_client is None:
+        with _icao_client_lock:
+            if _icao_client is None:
+                _icao_client = ICAOClient()
+    return _icao_client
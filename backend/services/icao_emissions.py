@@ -0,0 +1,141 @@
+import json
+import logging
+
+import requests
+
+from .airport_registry import get_airport_registry
+from .icao_client import get_icao_client
+from .route_cache import get_route_cache
+
+logger = logging.getLogger(__name__)
+
+# ICAO numbers cabin classes rather than naming them
+ICAO_CABIN_CLASSES = {
+    "economy": 0,
+    "premium_economy": 1,
+    "business": 2,
+    "first": 3
+}
+
+
+def _airport_name(code):
+    airport = get_airport_registry().get(code) if code and code != 'Unknown' else None
+    if airport and getattr(airport, 'name', None):
+        return airport.name
+    return f"{code.upper()} Airport"
+
+
+def get_icao_emissions(departure, destination, passengers, round_trip, cabin_class):
+    """Get real emissions data from ICAO API - STRICT MODE: No fallbacks"""
+    route_cache = get_route_cache()
+    cached_summary = route_cache.get(departure, destination, cabin_class, round_trip)
+    if cached_summary:
+        result = build_icao_result(cached_summary, passengers, cabin_class)
+        result['cached'] = True
+        return result
+
+    icao_data = {
+        "AirportCodeDeparture": departure.upper(),
+        "AirportCodeDestination": [destination.upper()],
+        "CabinClass": ICAO_CABIN_CLASSES.get(cabin_class, 0),
+        "Departure": _airport_name(departure),
+        "Destination": [_airport_name(destination)],
+        "IsRoundTrip": round_trip,
+        "NumberOfPassenger": passengers
+    }
+    logger.debug(f"📤 ICAO payload: {icao_data}")
+
+    try:
+        response = get_icao_client().compute(icao_data)
+    except requests.exceptions.Timeout:
+        logger.warning(f"❌ ICAO API timeout for {departure}->{destination}")
+        raise Exception("ICAO API timeout - no fallback calculation performed")
+    except requests.exceptions.ConnectionError:
+        logger.warning(f"❌ ICAO API connection error for {departure}->{destination}")
+        raise Exception("ICAO API connection error - no fallback calculation performed")
+
+    if response.status_code != 200:
+        logger.warning(f"❌ ICAO API returned status {response.status_code}: {response.text[:500]}")
+        raise Exception(f"ICAO API returned status {response.status_code}")
+
+    body = response.text.strip()
+    if body.startswith('<!DOCTYPE html>') or body.startswith('<html'):
+        logger.warning(f"❌ ICAO API returned HTML instead of JSON for {departure}->{destination}: {body[:200]}")
+        raise Exception("ICAO API returned HTML instead of JSON")
+
+    try:
+        icao_result = response.json()
+    except json.JSONDecodeError as e:
+        logger.warning(f"❌ JSON decode error for {departure}->{destination}: {e}")
+        raise Exception(f"ICAO API returned invalid JSON: {e}")
+
+    summary = summarize_icao_response(icao_result, cabin_class)
+    route_cache.put(departure, destination, cabin_class, round_trip, summary)
+    return build_icao_result(summary, passengers, cabin_class)
+
+
+def summarize_icao_response(icao_response, cabin_class):
+    """Reduce an ICAO API response to the per-passenger figures we cache"""
+    icao_cabin_class = ICAO_CABIN_CLASSES.get(cabin_class, 0)
+    summaries = icao_response.get('resultSummary', [])
+
+    # If the exact cabin class is not found, economy (class 0) stands in
+    result_summary = next(
+        (summary for summary in summaries
+         if summary.get('cabinClass') == icao_cabin_class and summary.get('isClassFound', False)),
+        None
+    ) or next(
+        (summary for summary in summaries
+         if summary.get('cabinClass') == 0 and summary.get('isClassFound', False)),
+        None
+    )
+    if not result_summary:
+        raise ValueError("No valid results found in ICAO response")
+
+    total_co2 = 0
+    total_fuel = 0
+    total_distance = 0
+    for leg in result_summary.get('details', []):
+        total_co2 += leg.get('co2', 0)
+        total_fuel += leg.get('avgFuel', 0)
+        total_distance += leg.get('tripDistance', 0)
+
+    details = result_summary.get('details') or [{}]
+    return {
+        'co2_per_passenger': total_co2,  # ICAO gives per-passenger CO2 directly
+        'aircraft_fuel': total_fuel,
+        'distance': total_distance,
+        'avg_seats': details[0].get('avgSeats', 242),
+        'fleet': details[0].get('fleet', '')
+    }
+
+
+def build_icao_result(summary, passengers, cabin_class):
+    """Scale a per-passenger ICAO summary to the requested passenger count"""
+    co2_per_passenger = summary['co2_per_passenger']
+    total_co2_for_passengers = co2_per_passenger * passengers
+
+    # Calculate fuel allocation per passenger (derived from CO2)
+    fuel_per_passenger = co2_per_passenger / 3.16  # Convert CO2 back to fuel using ICAO factor
+    total_fuel_for_passengers = fuel_per_passenger * passengers
+    total_distance = summary['distance']
+
+    return {
+        'fuel_burn_kg': round(total_fuel_for_passengers),
+        'total_co2_kg': round(total_co2_for_passengers),
+        'co2_per_passenger_kg': round(co2_per_passenger),
+        'co2_tonnes': round(total_co2_for_passengers / 1000, 3),
+        'distance_km': round(total_distance),
+        'distance_miles': round(total_distance * 0.621371),
+        'cabin_class': cabin_class,
+        'data_source': 'ICAO_API',
+        'aircraft_fuel_total_kg': round(summary['aircraft_fuel']),
+        'aircraft_co2_total_kg': round(co2_per_passenger * 3.16),
+        'avg_seats': summary.get('avg_seats', 242),
+        'fleet': summary.get('fleet', '')
+    }
+
+
+def parse_icao_response(icao_response, departure, destination, passengers, round_trip, cabin_class):
+    """Parse the ICAO API response into our format"""
+    return build_icao_result(summarize_icao_response(icao_response, cabin_class), passengers, cabin_class)
@@ -0,0 +1,142 @@
+import heapq
+import itertools
+import logging
+import time
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from config import config
+from .icao_client import retry_delay_for
+
+logger = logging.getLogger(__name__)
+
+# parked: the job hit a retryable error and was put aside; its final outcome follows later
+FetchOutcome = namedtuple('FetchOutcome', ['job', 'result', 'error', 'elapsed', 'deduplicated', 'parked'], defaults=(False,))
+
+
+class ConcurrentICAOFetcher:
+    """
+    Runs ICAO lookups on a bounded thread pool and yields the outcomes
+    in the same order the jobs were submitted. A job that fails with a
+    retryable error is parked instead of holding up the rest: it is
+    yielded once with parked=True, re-submitted after its retry delay,
+    and its final outcome is yielded out of order when it settles.
+    """
+
+    def __init__(self, fetch_fn, max_workers: int = None, max_park_seconds: float = None, max_parked: int = None):
+        self.fetch_fn = fetch_fn
+        self.max_workers = max(1, max_workers or config.icao.fetch_workers)
+        self.max_park_seconds = config.icao.max_park_seconds if max_park_seconds is None else max_park_seconds
+        self.max_parked = max(1, max_parked or config.icao.max_parked_rows)
+        self.total_jobs = 0
+        self.keyed_jobs = 0
+        self.unique_fetches = 0
+        self.parked_jobs = 0
+
+    def _run(self, job):
+        start = time.perf_counter()
+        try:
+            result = self.fetch_fn(job)
+            return FetchOutcome(job, result, None, time.perf_counter() - start, False)
+        except Exception as e:
+            return FetchOutcome(job, None, e, time.perf_counter() - start, False)
+
+    @staticmethod
+    def _outcome_for(job, future):
+        outcome = future.result()
+        if outcome.job is job:
+            return outcome
+        # Fan a shared route result back out to a duplicate row
+        return outcome._replace(job=job, elapsed=0.0, deduplicated=True)
+
+    def _retry_at(self, outcome, parked_at, now):
+        """When to retry a failed job, or None once retrying won't help or the park budget is spent"""
+        if outcome.error is None:
+            return None
+        delay = retry_delay_for(outcome.error)
+        if delay is None or now - parked_at + delay > self.max_park_seconds:
+            return None
+        return now + delay
+
+    def fetch_ordered(self, jobs, key_fn=None):
+        """
+        Yield a FetchOutcome per job, in input order, keeping at most a small window in flight.
+        Jobs that map to the same key_fn value share a single fetch. Parked jobs are the
+        exception to the ordering: at most max_parked of them wait at once, and intake
+        pauses while the limit is reached.
+        """
+        window = self.max_workers * 2
+        shared = {}
+        parked = []  # heap of (retry_at, tiebreak, job, key, parked_at)
+        retrying = []  # (job, key, future, parked_at)
+        tiebreak = itertools.count()
+        logger.info(f"🚀 Fetching with {self.max_workers} workers")
+
+        def settle(job, key, future, parked_at=None):
+            """The job's final outcome, its parked notice, or None when a retry is parked again"""
+            outcome = self._outcome_for(job, future)
+            now = time.monotonic()
+            first_park = parked_at is None
+            if first_park:
+                parked_at = now
+            retry_at = self._retry_at(outcome, parked_at, now)
+            if retry_at is None:
+                return outcome
+            if key is not None and shared.get(key) is future:
+                # Rows for this route seen from now on fetch afresh
+                del shared[key]
+            heapq.heappush(parked, (retry_at, next(tiebreak), job, key, parked_at))
+            if not first_park:
+                return None
+            self.parked_jobs += 1
+            logger.debug(f"🅿️ Job parked for {retry_at - now:.1f}s: {outcome.error}")
+            return outcome._replace(parked=True)
+
+        def drain_parked(block=False):
+            """Re-submit parked jobs that are due and yield the retries that have settled"""
+            if block:
+                timeout = max(0.0, parked[0][0] - time.monotonic()) if parked else None
+                if retrying:
+                    wait([future for _, _, future, _ in retrying], timeout=timeout, return_when=FIRST_COMPLETED)
+                else:
+                    time.sleep(timeout)
+            now = time.monotonic()
+            while parked and parked[0][0] <= now:
+                _, _, job, key, parked_at = heapq.heappop(parked)
+                future = shared.get(key) if key is not None else None
+                if future is None:
+                    future = executor.submit(self._run, job)
+                    if key is not None:
+                        shared[key] = future
+                retrying.append((job, key, future, parked_at))
+            for item in [item for item in retrying if item[2].done()]:
+                retrying.remove(item)
+                outcome = settle(*item)
+                if outcome is not None:
+                    yield outcome
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='icao-fetch') as executor:
+            pending = deque()
+            for job in jobs:
+                while len(parked) + len(retrying) >= self.max_parked:
+                    yield from drain_parked(block=True)
+                self.total_jobs += 1
+                key = key_fn(job) if key_fn else None
+                future = None
+                if key is not None:
+                    self.keyed_jobs += 1
+                    future = shared.get(key)
+                if future is None:
+                    future = executor.submit(self._run, job)
+                    if key is not None:
+                        shared[key] = future
+                        self.unique_fetches += 1
+                pending.append((job, key, future))
+                if len(pending) >= window:
+                    yield settle(*pending.popleft())
+                    yield from drain_parked()
+            while pending:
+                yield settle(*pending.popleft())
+                yield from drain_parked()
+            while parked or retrying:
+                yield from drain_parked(block=True)
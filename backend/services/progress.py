@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import deque
+
+# Minimum spacing between published updates while a batch is running
+PUBLISH_INTERVAL_SECONDS = 0.25
+# Recent ICAO request latencies kept for percentiles
+LATENCY_WINDOW = 1000
+TERMINAL_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+def idle_state():
+    return {
+        'status': 'idle',
+        'message': 'Ready for processing',
+        'current_row': 0,
+        'total_rows': 0,
+        'processed_rows': 0,
+        'error_rows': 0,
+        'progress_percent': 0
+    }
+
+
+class ProgressTracker:
+    """
+    Thread-safe batch progress shared by every batch service instance.
+    Row-level updates are cheap; subscribers are woken at most every
+    PUBLISH_INTERVAL_SECONDS, except for status changes which publish at once.
+    on_publish, if given, is called after each publish outside the lock.
+    """
+
+    def __init__(self, publish_interval=PUBLISH_INTERVAL_SECONDS, on_publish=None):
+        self.publish_interval = publish_interval
+        self.on_publish = on_publish
+        self._changed = threading.Condition()
+        self._state = idle_state()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._started_at = None
+        self._finished_at = None
+        self._last_publish = 0.0
+        self._dirty = False
+        self.version = 0
+
+    def _publish(self):
+        self.version += 1
+        self._dirty = False
+        self._last_publish = time.monotonic()
+        self._changed.notify_all()
+
+    def reset(self):
+        with self._changed:
+            self._state = idle_state()
+            self._latencies.clear()
+            self._started_at = None
+            self._finished_at = None
+            self._publish()
+
+    def update(self, **fields):
+        """Merge known progress fields and publish, throttled unless the status changed"""
+        with self._changed:
+            previous_status = self._state['status']
+            for key, value in fields.items():
+                if key in self._state:
+                    self._state[key] = value
+
+            # Rows are moving, so the batch is processing even if no status was given
+            if 'status' not in fields and self._state['current_row'] and self._state['status'] == 'idle':
+                self._state['status'] = 'processing'
+
+            status = self._state['status']
+            if status == 'processing' and self._started_at is None:
+                self._started_at = time.monotonic()
+            if status in TERMINAL_STATUSES and self._finished_at is None:
+                self._finished_at = time.monotonic()
+
+            published = status != previous_status or time.monotonic() - self._last_publish >= self.publish_interval
+            if published:
+                self._publish()
+            else:
+                self._dirty = True
+
+        if published and self.on_publish:
+            self.on_publish()
+
+    def counts(self):
+        """Status and row counters without the derived metrics"""
+        with self._changed:
+            return {key: self._state[key] for key in ('status', 'current_row', 'total_rows', 'processed_rows', 'error_rows')}
+
+    def record_latency(self, seconds):
+        with self._changed:
+            self._latencies.append(seconds)
+
+    def _latency_percentiles(self):
+        if not self._latencies:
+            return None
+        import numpy as np
+
+        p50, p90, p99 = np.percentile(np.fromiter(self._latencies, dtype=float), [50, 90, 99])
+        return {
+            'p50_ms': round(float(p50) * 1000, 1),
+            'p90_ms': round(float(p90) * 1000, 1),
+            'p99_ms': round(float(p99) * 1000, 1),
+            'samples': len(self._latencies)
+        }
+
+    def _snapshot(self):
+        snapshot = dict(self._state)
+        snapshot['version'] = self.version
+
+        elapsed = None
+        if self._started_at is not None:
+            elapsed = (self._finished_at or time.monotonic()) - self._started_at
+        done = snapshot['processed_rows'] + snapshot['error_rows']
+        rate = done / elapsed if elapsed else 0.0
+        remaining = max(snapshot['total_rows'] - done, 0)
+
+        snapshot['elapsed_seconds'] = round(elapsed, 1) if elapsed is not None else None
+        snapshot['rows_per_second'] = round(rate, 2)
+        snapshot['eta_seconds'] = round(remaining / rate, 1) if rate and snapshot['status'] == 'processing' else None
+        snapshot['icao_latency'] = self._latency_percentiles()
+        return snapshot
+
+    def snapshot(self):
+        """Current progress with rows/sec, ETA and ICAO latency percentiles"""
+        with self._changed:
+            if self._dirty:
+                self._publish()
+            return self._snapshot()
+
+    def wait_for_change(self, version, timeout):
+        """Block until a version newer than `version` is published or the timeout passes"""
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while self.version == version:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._changed.wait(min(remaining, self.publish_interval))
+                # Throttled updates are flushed once the interval has passed
+                if self._dirty and time.monotonic() - self._last_publish >= self.publish_interval:
+                    self._publish()
+            return self._snapshot()
+
+
+_progress_tracker = None
+_progress_tracker_lock = threading.Lock()
+
+
+def get_progress_tracker():
+    """Process-wide progress tracker"""
+    global _progress_tracker
+    if _progress_tracker is None:
+        with _progress_tracker_lock:
+            if _progress_tracker is None:
+                _progress_tracker = ProgressTracker()
+    return _progress_tracker
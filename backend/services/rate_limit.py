@@ -0,0 +1,178 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket used to cap requests per second against a host"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until a token is available"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def set_rate(self, rate: float):
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+            self.capacity = max(1.0, self.rate)
+            self.tokens = min(self.tokens, self.capacity)
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """
+    Token bucket whose rate follows the server: additive increase while calls
+    succeed quickly, multiplicative decrease on throttling or slow answers
+    """
+
+    def __init__(self, rate: float, min_rate: float, max_rate: float, latency_target: float,
+                 increase_step: float = 0.1, decrease_factor: float = 0.5):
+        super().__init__(rate)
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, min_rate)
+        self.latency_target = latency_target
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.throttle_count = 0
+
+    def _adjust(self, rate):
+        self.set_rate(min(self.max_rate, max(self.min_rate, rate)))
+
+    def on_success(self, latency: float):
+        if latency > self.latency_target:
+            # Slow answers are the first sign of an overloaded server
+            self._adjust(self.rate * (1 + self.decrease_factor) / 2)
+        else:
+            self._adjust(self.rate + self.increase_step)
+
+    def on_throttle(self):
+        self.throttle_count += 1
+        self._adjust(self.rate * self.decrease_factor)
+
+    def stats(self):
+        return {
+            'current_rps': round(self.rate, 2),
+            'min_rps': self.min_rate,
+            'max_rps': self.max_rate,
+            'throttle_events': self.throttle_count
+        }
+
+
+CIRCUIT_CLOSED = 'closed'
+CIRCUIT_OPEN = 'open'
+CIRCUIT_HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Opens after consecutive failures so callers stop waiting on a dead host.
+    After the cooldown one probe is let through (half-open); its result closes
+    the circuit or reopens it with a doubled cooldown.
+    """
+
+    def __init__(self, failure_threshold: int, cooldown_seconds: float, max_cooldown_seconds: float = None):
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_cooldown = cooldown_seconds
+        self.max_cooldown = max_cooldown_seconds or cooldown_seconds * 16
+        self.cooldown = cooldown_seconds
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.open_count = 0
+        self.probe_in_flight = False
+        self.lock = threading.Lock()
+
+    def _retry_after(self, now):
+        return max(0.0, self.opened_at + self.cooldown - now)
+
+    def allow(self):
+        """(allowed, retry_after_seconds) for a call about to be made"""
+        with self.lock:
+            if self.state == CIRCUIT_CLOSED:
+                return True, 0.0
+            now = time.monotonic()
+            if self.state == CIRCUIT_OPEN:
+                retry_after = self._retry_after(now)
+                if retry_after > 0:
+                    return False, retry_after
+                self.state = CIRCUIT_HALF_OPEN
+            if self.probe_in_flight:
+                return False, min(self.cooldown, 1.0)
+            self.probe_in_flight = True
+            return True, 0.0
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.probe_in_flight = False
+            if self.state != CIRCUIT_CLOSED:
+                self.state = CIRCUIT_CLOSED
+                self.cooldown = self.base_cooldown
+
+    def record_failure(self, retry_after: float = None):
+        """Count a failure; retry_after from the server extends the cooldown"""
+        with self.lock:
+            self.failures += 1
+            self.probe_in_flight = False
+            if self.state == CIRCUIT_HALF_OPEN:
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            elif self.state == CIRCUIT_CLOSED and self.failures < self.failure_threshold:
+                return
+            if retry_after:
+                self.cooldown = min(max(self.cooldown, retry_after), self.max_cooldown)
+            if self.state != CIRCUIT_OPEN:
+                self.open_count += 1
+            self.state = CIRCUIT_OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'cooldown_seconds': self.cooldown,
+                'retry_after_seconds': round(self._retry_after(time.monotonic()), 1) if self.state == CIRCUIT_OPEN else 0,
+                'times_opened': self.open_count
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(host: str, rate: float = None):
+    """Return the shared limiter for a host, creating it on first use"""
+    limiter = _limiters.get(host)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(host)
+            if limiter is None:
+                from config import config
+                limiter = AdaptiveRateLimiter(
+                    rate if rate is not None else config.icao.requests_per_second,
+                    min_rate=config.icao.min_requests_per_second,
+                    max_rate=config.icao.max_requests_per_second,
+                    latency_target=config.icao.latency_target_seconds
+                )
+                _limiters[host] = limiter
+    return limiter
@@ -0,0 +1,158 @@
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import (
+    Column, DateTime, Integer, MetaData, String, Table, create_engine, insert, inspect, select
+)
+from sqlalchemy.engine import make_url
+
+from config import config
+from database.models import Airport, Base, FlightCalculation, utc_now
+
+logger = logging.getLogger(__name__)
+
+# Airports go first so calculation foreign keys resolve on the target
+REPLICATED_TABLES = (Airport.__table__, FlightCalculation.__table__)
+
+# Lives only on the target, so it is kept out of the shared Base metadata
+state_metadata = MetaData()
+replication_state = Table(
+    'replication_state', state_metadata,
+    Column('table_name', String(100), primary_key=True),
+    Column('last_id', Integer, nullable=False, default=0),
+    Column('last_created_at', DateTime, nullable=True),
+    Column('rows_copied', Integer, nullable=False, default=0),
+    Column('updated_at', DateTime, nullable=True)
+)
+
+
+def create_target_engine(target_url: str):
+    """Engine for the replication target, with fast_executemany on SQL Server"""
+    options = {}
+    if make_url(target_url).get_backend_name() == 'mssql':
+        options['fast_executemany'] = True
+    return create_engine(target_url, **options)
+
+
+def read_high_water_marks(target_engine):
+    """Replication state per table on the target, keyed by table name"""
+    if not inspect(target_engine).has_table(replication_state.name):
+        return {}
+    with target_engine.connect() as conn:
+        return {row.table_name: row._asdict() for row in conn.execute(select(replication_state))}
+
+
+def _save_high_water_mark(conn, table_name, last_id, last_created_at, rows_copied, exists):
+    values = {
+        'last_id': last_id,
+        'last_created_at': last_created_at,
+        'rows_copied': rows_copied,
+        'updated_at': utc_now()
+    }
+    if exists:
+        conn.execute(
+            replication_state.update().where(replication_state.c.table_name == table_name).values(**values)
+        )
+    else:
+        conn.execute(replication_state.insert().values(table_name=table_name, **values))
+
+
+def _replicate_table(source_conn, target_engine, table, state, chunk_size):
+    """Copy rows above the table's high-water mark in id order, one transaction per chunk"""
+    source_columns = {column['name'] for column in inspect(source_conn).get_columns(table.name)}
+    columns = [column for column in table.columns if column.name in source_columns]
+
+    last_id = state.get('last_id', 0) if state else 0
+    last_created_at = state.get('last_created_at') if state else None
+    rows_copied = state.get('rows_copied', 0) if state else 0
+    exists = state is not None
+    copied = 0
+
+    statement = insert(table)
+    while True:
+        rows = source_conn.execute(
+            select(*columns).where(table.c.id > last_id).order_by(table.c.id).limit(chunk_size)
+        ).mappings().all()
+        if not rows:
+            break
+
+        created = [row['created_at'] for row in rows if row.get('created_at') is not None]
+        last_id = rows[-1]['id']
+        if created:
+            last_created_at = max([last_created_at, *created] if last_created_at else created)
+        rows_copied += len(rows)
+        copied += len(rows)
+
+        # The rows and the new mark commit together, so a failed run resumes cleanly
+        with target_engine.begin() as target_conn:
+            target_conn.execute(statement, [dict(row) for row in rows])
+            _save_high_water_mark(target_conn, table.name, last_id, last_created_at, rows_copied, exists)
+        exists = True
+
+        logger.info(f"📤 Replicated {copied} {table.name} rows (up to id {last_id})")
+
+    return {
+        'rows_copied': copied,
+        'last_id': last_id,
+        'last_created_at': last_created_at.isoformat() if last_created_at else None,
+        'total_rows_copied': rows_copied
+    }
+
+
+def replicate(target_url: str = None, source_path: str = None, chunk_size: int = None):
+    """
+    Copy new airports and flight calculations from the local SQLite database
+    to the target. Only rows above the stored high-water mark are read, so
+    repeated runs are incremental. Returns per-table statistics.
+    """
+    target_url = target_url or config.replication.target_url
+    source_path = source_path or config.replication.source_path
+    chunk_size = max(1, chunk_size or config.replication.chunk_size)
+    if not target_url:
+        raise ValueError("No replication target configured (set REPLICATION_TARGET_URL)")
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(f"SQLite database not found: {source_path}")
+
+    started = time.time()
+    source_engine = create_engine(f"sqlite:///{source_path}")
+    target_engine = create_target_engine(target_url)
+    try:
+        Base.metadata.create_all(target_engine, tables=list(REPLICATED_TABLES))
+        state_metadata.create_all(target_engine)
+        marks = read_high_water_marks(target_engine)
+
+        tables = {}
+        with source_engine.connect() as source_conn:
+            for table in REPLICATED_TABLES:
+                tables[table.name] = _replicate_table(
+                    source_conn, target_engine, table, marks.get(table.name), chunk_size
+                )
+    finally:
+        source_engine.dispose()
+        target_engine.dispose()
+
+    elapsed = time.time() - started
+    logger.info(f"✅ Replication finished in {elapsed:.1f}s: " +
+                ", ".join(f"{name}={stats['rows_copied']}" for name, stats in tables.items()))
+    return {
+        'source': source_path,
+        'target': make_url(target_url).render_as_string(hide_password=True),
+        'chunk_size': chunk_size,
+        'elapsed_seconds': round(elapsed, 2),
+        'tables': tables
+    }
+
+
+_replication_lock = threading.Lock()
+
+
+def replicate_exclusive(**kwargs):
+    """Run replicate() unless another run is in progress; returns None when busy"""
+    if not _replication_lock.acquire(blocking=False):
+        return None
+    try:
+        return replicate(**kwargs)
+    finally:
+        _replication_lock.release()
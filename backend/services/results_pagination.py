@@ -0,0 +1,57 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+from database.models import FlightCalculation
+
+RESULTS_DEFAULT_PAGE_SIZE = 100
+RESULTS_MAX_PAGE_SIZE = 1000
+
+
+def encode_results_cursor(calculation):
+    """Opaque keyset cursor pointing just past a calculation"""
+    created_at = calculation.created_at.isoformat() if calculation.created_at else None
+    payload = json.dumps([created_at, calculation.id]).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+
+def decode_results_cursor(cursor):
+    """Return (created_at, id) from a cursor, raising ValueError if it is malformed"""
+    try:
+        created_at, calculation_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return (datetime.fromisoformat(created_at) if created_at else None), int(calculation_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def apply_results_cursor(query, cursor):
+    """Keyset filter for rows that sort after the cursor in (created_at desc, id desc) order"""
+    created_at, calculation_id = decode_results_cursor(cursor)
+    model = FlightCalculation
+    if created_at is None:
+        # NULL timestamps sort last, so only lower ids among them remain
+        return query.filter(and_(model.created_at.is_(None), model.id < calculation_id))
+    return query.filter(or_(
+        model.created_at < created_at,
+        and_(model.created_at == created_at, model.id < calculation_id),
+        model.created_at.is_(None)
+    ))
+
+
+def fetch_results_page(query, limit=None, cursor=None):
+    """
+    One page of a (created_at desc, id desc) ordered query as
+    (calculations, limit, next_cursor); next_cursor is None on the last page.
+    Raises ValueError for a malformed cursor.
+    """
+    limit = max(1, min(limit or RESULTS_DEFAULT_PAGE_SIZE, RESULTS_MAX_PAGE_SIZE))
+    if cursor:
+        query = apply_results_cursor(query, cursor)
+
+    # One extra row tells us whether another page exists
+    calculations = query.limit(limit + 1).all()
+    has_more = len(calculations) > limit
+    calculations = calculations[:limit]
+    return calculations, limit, encode_results_cursor(calculations[-1]) if has_more else None
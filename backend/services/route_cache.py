@@ -0,0 +1,163 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+class RouteEmissionsCache:
+    """
+    Disk-backed cache of per-passenger ICAO results keyed on
+    (departure, destination, cabin class, round trip)
+    """
+
+    def __init__(self, db_path: str = None, ttl_days: int = None):
+        self.db_path = db_path or config.icao.cache_path
+        ttl_days = config.icao.cache_ttl_days if ttl_days is None else ttl_days
+        self.ttl_seconds = ttl_days * 86400 if ttl_days and ttl_days > 0 else None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS route_emissions (
+                departure TEXT NOT NULL,
+                destination TEXT NOT NULL,
+                cabin_class TEXT NOT NULL,
+                round_trip INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (departure, destination, cabin_class, round_trip)
+            )
+        """)
+        self.conn.commit()
+        self.purge_expired()
+
+        logger.info(f"Route cache opened at {self.db_path}")
+
+    @staticmethod
+    def _key(departure, destination, cabin_class, round_trip):
+        return (
+            departure.strip().upper(),
+            destination.strip().upper(),
+            (cabin_class or 'economy').lower(),
+            1 if round_trip else 0
+        )
+
+    def _is_expired(self, created_at, now=None):
+        if self.ttl_seconds is None:
+            return False
+        return (now or time.time()) - created_at > self.ttl_seconds
+
+    def get(self, departure, destination, cabin_class, round_trip):
+        """Return the cached per-passenger summary for a route, or None"""
+        key = self._key(departure, destination, cabin_class, round_trip)
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT payload, created_at FROM route_emissions "
+                "WHERE departure = ? AND destination = ? AND cabin_class = ? AND round_trip = ?",
+                key
+            ).fetchone()
+
+            if row and self._is_expired(row[1]):
+                self.conn.execute(
+                    "DELETE FROM route_emissions "
+                    "WHERE departure = ? AND destination = ? AND cabin_class = ? AND round_trip = ?",
+                    key
+                )
+                self.conn.commit()
+                self.evictions += 1
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, departure, destination, cabin_class, round_trip, summary: dict):
+        """Store the per-passenger summary for a route"""
+        key = self._key(departure, destination, cabin_class, round_trip)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO route_emissions "
+                "(departure, destination, cabin_class, round_trip, payload, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                key + (json.dumps(summary), time.time())
+            )
+            self.conn.commit()
+
+    def entries(self):
+        """Every unexpired (departure, destination, cabin_class, round_trip, summary) entry"""
+        cutoff = time.time() - self.ttl_seconds if self.ttl_seconds else 0
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT departure, destination, cabin_class, round_trip, payload FROM route_emissions "
+                "WHERE created_at >= ?",
+                (cutoff,)
+            ).fetchall()
+        return [(departure, destination, cabin_class, bool(round_trip), json.loads(payload))
+                for departure, destination, cabin_class, round_trip, payload in rows]
+
+    def purge_expired(self):
+        """Delete every entry older than the TTL"""
+        if self.ttl_seconds is None:
+            return 0
+        with self.lock:
+            cursor = self.conn.execute(
+                "DELETE FROM route_emissions WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,)
+            )
+            self.conn.commit()
+            self.evictions += cursor.rowcount
+            return cursor.rowcount
+
+    def clear(self):
+        """Remove all cached routes"""
+        with self.lock:
+            cursor = self.conn.execute("DELETE FROM route_emissions")
+            self.conn.commit()
+            return cursor.rowcount
+
+    def stats(self):
+        """Hit/miss counters and size for status endpoints"""
+        with self.lock:
+            size = self.conn.execute("SELECT COUNT(*) FROM route_emissions").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups * 100, 1) if lookups else 0,
+            'evictions': self.evictions,
+            'size': size,
+            'ttl_days': self.ttl_seconds / 86400 if self.ttl_seconds else None,
+            'path': self.db_path
+        }
+
+
+_route_cache = None
+_route_cache_lock = threading.Lock()
+
+
+def get_route_cache():
+    """Return the process-wide route cache, opening it on first use"""
+    global _route_cache
+    if _route_cache is None:
+        with _route_cache_lock:
+            if _route_cache is None:
+                _route_cache = RouteEmissionsCache()
+    return _route_cache
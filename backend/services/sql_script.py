@@ -0,0 +1,95 @@
+import math
+from datetime import date, datetime
+from itertools import islice
+
+# SQL Server accepts at most 1000 row value expressions per INSERT
+SQL_BATCH_ROWS = 1000
+
+
+def format_sql_value(value):
+    """Render a single Python value as a SQL Server literal"""
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return "NULL" if math.isnan(value) or math.isinf(value) else repr(value)
+    if isinstance(value, (datetime, date)):
+        return f"'{value.isoformat()}'"
+    if hasattr(value, 'item'):
+        # numpy scalars
+        return format_sql_value(value.item())
+    escaped_value = str(value).replace("'", "''")
+    return f"'{escaped_value}'"
+
+
+def _quote_strings(values):
+    return ["'" + value.replace("'", "''") + "'" for value in values]
+
+
+def _format_floats(values):
+    return ["NULL" if value != value or value in (math.inf, -math.inf) else repr(value) for value in values]
+
+
+def format_sql_column(values):
+    """
+    Render one column of values as SQL literals. Columns holding a single
+    type (the common case) are escaped in one pass without per-value dispatch.
+    """
+    kinds = set(map(type, values))
+    if kinds == {str}:
+        return _quote_strings(values)
+    if kinds == {int}:
+        return list(map(str, values))
+    if kinds == {float}:
+        return _format_floats(values)
+    return [format_sql_value(value) for value in values]
+
+
+def iter_insert_blocks(table, columns, rows, batch_rows=SQL_BATCH_ROWS):
+    """Yield multi-row INSERT ... VALUES blocks, each terminated by GO"""
+    column_list = ", ".join(f"[{column}]" for column in columns)
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, batch_rows))
+        if not chunk:
+            return
+        formatted = [format_sql_column(column) for column in zip(*chunk)]
+        values = ",\n".join("(" + ", ".join(row) + ")" for row in zip(*formatted))
+        yield f"INSERT INTO [{table}] ({column_list}) VALUES\n{values};\nGO\n"
+
+
+def iter_sql_script(table, columns, rows, header="", footer="", identity_insert=False, batch_rows=SQL_BATCH_ROWS):
+    """
+    Yield a complete SQL Server script in pieces: header, optional
+    IDENTITY_INSERT toggles around the INSERT blocks, then footer.
+    """
+    if header:
+        yield header
+    if identity_insert:
+        yield f"-- Enable identity insert to preserve original IDs\nSET IDENTITY_INSERT [{table}] ON;\nGO\n\n"
+    yield from iter_insert_blocks(table, columns, rows, batch_rows)
+    if identity_insert:
+        yield f"\n-- Disable identity insert after import\nSET IDENTITY_INSERT [{table}] OFF;\nGO\n"
+    if footer:
+        yield footer
+
+
+def iter_cursor_rows(cursor, fetch_size=SQL_BATCH_ROWS):
+    """Iterate a DB-API cursor in fetchmany() chunks"""
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def write_sql_script(path, pieces):
+    """Write script pieces to a file, returning the number of characters written"""
+    written = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for piece in pieces:
+            written += f.write(piece)
+    return written
@@ -1,5 +1,5 @@
 """
-Shared airports data
+Shared airports data - generated from data/airports.bin by build_airports.py
 """
 
 airports = [
@@ -3959,4 +3959,4 @@ airports = [
   { "code": "ZYI", "name": "Zunyi Xihzhou Airport", "city": "Zunyi Xihzhou", "country": "China", "search": "Zunyi Xihzhou, China (Zunyi Xihzhou - ZYI)" },
   { "code": "ZYL", "name": "Sylhet Airport", "city": "Sylhet", "country": "Bangladesh", "search": "Sylhet, Bangladesh (Sylhet - ZYL)" },
   { "code": "ZZO", "name": "Zonalnoye Airport", "city": "Zonalnoye", "country": "Russian Federation", "search": "Zonalnoye, Russian Federation (Zonalnoye Airport - ZZO)" },
-]
\ No newline at end of file
+]
@@ -0,0 +1,73 @@
+import pytest
+
+from services.airport_registry import AirportRecord
+from services.airport_search import (
+    RANK_CITY_PREFIX, RANK_CODE_EXACT, RANK_CODE_PREFIX, RANK_SUBSTRING, AirportSearchIndex, normalize
+)
+
+AIRPORTS = [
+    ('LHR', 'EGLL', 'Heathrow Airport', 'London', 'United Kingdom'),
+    ('LGW', 'EGKK', 'Gatwick Airport', 'London', 'United Kingdom'),
+    ('LCY', 'EGLC', 'London City Airport', 'London', 'United Kingdom'),
+    ('YXU', 'CYXU', 'London International Airport', 'London', 'Canada'),
+    ('LIS', 'LPPT', 'Humberto Delgado Airport', 'Lisbon', 'Portugal'),
+    ('NCE', 'LFMN', "Nice Côte d'Azur Airport", 'Nice', 'France'),
+    ('JFK', 'KJFK', 'John F Kennedy International Airport', 'New York', 'United States'),
+]
+
+
+@pytest.fixture(scope='module')
+def index():
+    records = [
+        AirportRecord(i, iata, icao, name, city, country, None, None, f"{city} ({iata})")
+        for i, (iata, icao, name, city, country) in enumerate(AIRPORTS, start=1)
+    ]
+    return AirportSearchIndex(records)
+
+
+def _codes(index, query, limit=20):
+    return [record.iata_code for _, record in index.search(query, limit)]
+
+
+def test_exact_code_ranks_first(index):
+    results = index.search('lhr')
+
+    assert results[0][0] == RANK_CODE_EXACT
+    assert results[0][1].iata_code == 'LHR'
+
+
+def test_icao_code_prefix_matches(index):
+    ranked = index.search('egl')
+
+    assert {record.iata_code for _, record in ranked} == {'LHR', 'LCY'}
+    assert all(rank == RANK_CODE_PREFIX for rank, _ in ranked)
+
+
+def test_city_prefix_outranks_substring(index):
+    ranked = index.search('lon')
+    codes = [record.iata_code for _, record in ranked]
+
+    assert set(codes) == {'LHR', 'LGW', 'LCY', 'YXU'}
+    assert all(rank == RANK_CITY_PREFIX for rank, _ in ranked)
+    assert index.search('athrow')[0][0] == RANK_SUBSTRING
+
+
+def test_every_query_word_must_match(index):
+    assert _codes(index, 'london canada') == ['YXU']
+    assert _codes(index, 'london portugal') == []
+
+
+def test_accents_and_case_are_ignored(index):
+    assert _codes(index, 'COTE') == ['NCE']
+    assert normalize('Côte') == 'cote'
+
+
+def test_stopwords_do_not_match_everything(index):
+    assert _codes(index, 'airport') == []
+    assert _codes(index, 'international airport new') == ['JFK']
+
+
+def test_limit_and_unknown_queries(index):
+    assert len(index.search('london', limit=2)) == 2
+    assert index.search('zzzz') == []
+    assert index.search('  ') == []
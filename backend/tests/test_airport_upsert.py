@@ -0,0 +1,74 @@
+import pytest
+
+from database.models import Airport
+from services.airport_upsert import upsert_airports
+
+
+def _airport(code, **fields):
+    return dict({'iata_code': code, 'icao_code': f"E{code}", 'name': f"{code} Airport", 'city': code,
+                 'country': 'Testland', 'latitude': 1.0, 'longitude': 2.0}, **fields)
+
+
+@pytest.fixture(params=['sqlite', 'generic'])
+def dialect(request, db, monkeypatch):
+    if request.param == 'generic':
+        # Dialects without a native upsert take the diff-driven insert/update path
+        monkeypatch.setattr(db.get_bind().dialect, 'name', 'postgresql')
+    return request.param
+
+
+def _by_code(db):
+    return {airport.iata_code: airport for airport in db.query(Airport).all()}
+
+
+def test_inserts_updates_and_skips_unchanged(db, dialect):
+    upsert_airports(db, [_airport('LHR'), _airport('JFK')])
+    db.commit()
+    unchanged_at = _by_code(db)['JFK'].updated_at
+
+    result = upsert_airports(db, [_airport('LHR', name='Heathrow'), _airport('JFK'), _airport('CDG')])
+    db.commit()
+    db.expire_all()
+
+    assert tuple(result) == (1, 1, 1)
+    airports = _by_code(db)
+    assert sorted(airports) == ['CDG', 'JFK', 'LHR']
+    assert airports['LHR'].name == 'Heathrow'
+    assert airports['JFK'].updated_at == unchanged_at
+
+
+def test_update_columns_limit_what_an_existing_airport_may_change(db, dialect):
+    upsert_airports(db, [_airport('LHR')])
+    db.commit()
+
+    result = upsert_airports(db, [_airport('LHR', name='Heathrow', latitude=51.47)], update_columns=('latitude',))
+    db.commit()
+    db.expire_all()
+
+    assert result.updated == 1
+    airport = _by_code(db)['LHR']
+    assert (airport.name, airport.latitude) == ('LHR Airport', 51.47)
+
+
+def test_rows_are_normalized(db, dialect):
+    result = upsert_airports(db, [
+        _airport(' lhr ', icao_code=''),
+        _airport('jfk', icao_code='', latitude=float('nan')),
+        _airport('', name='No code')
+    ])
+    db.commit()
+
+    assert result.created == 2
+    airports = _by_code(db)
+    assert sorted(airports) == ['JFK', 'LHR']
+    # Empty ICAO codes become NULL so the unique index allows more than one
+    assert airports['LHR'].icao_code is None and airports['JFK'].icao_code is None
+    assert airports['JFK'].latitude is None
+
+
+def test_last_duplicate_in_one_call_wins(db, dialect):
+    result = upsert_airports(db, [_airport('LHR', name='First'), _airport('LHR', name='Second')])
+    db.commit()
+
+    assert result.created == 1
+    assert _by_code(db)['LHR'].name == 'Second'
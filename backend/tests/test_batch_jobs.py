@@ -0,0 +1,183 @@
+import os
+
+import pytest
+
+from database.models import Airport, BatchJob, FlightCalculation
+from services.airport_registry import get_airport_registry
+from services.batch_jobs import JOB_COMPLETED, JOB_RUNNING, BatchJobStore, file_fingerprint
+from services.batch_service import DirectBatchService
+from services.icao_client import ICAOUnavailable
+
+AIRPORTS = ['LHR', 'JFK', 'CDG', 'FRA', 'AMS', 'MAD', 'FCO']
+BATCH_PARAMS = {'passengers': 1, 'cabinClass': 'economy', 'roundTrip': False, 'calculationMode': 'icao'}
+
+
+class WorkerCrash(BaseException):
+    """Stands in for the process dying mid-file; escapes the per-row error handling"""
+
+
+def _fake_emissions(job):
+    return {
+        'distance_km': 1000,
+        'distance_miles': 621,
+        'fuel_burn_kg': 30,
+        'total_co2_kg': 95,
+        'co2_per_passenger_kg': 95,
+        'co2_tonnes': 0.095,
+        'data_source': 'ICAO_API'
+    }
+
+
+@pytest.fixture
+def flights_csv(tmp_path, db):
+    for code in AIRPORTS:
+        db.add(Airport(iata_code=code, name=f"{code} Airport", city=code, country='Testland'))
+    db.commit()
+    get_airport_registry().load(db)
+
+    # Distinct routes, so every row is its own fetch
+    routes = list(zip(AIRPORTS, AIRPORTS[1:]))
+    path = tmp_path / 'flights.csv'
+    path.write_text('departure_iata,destination_iata\n' + ''.join(f"{a},{b}\n" for a, b in routes))
+    return str(path), len(routes)
+
+
+def test_interrupted_job_resumes_without_duplicate_rows(session_factory, db, flights_csv):
+    file_path, data_rows = flights_csv
+    crash_row = 5
+
+    def crashing_fetch(job):
+        if job['row'] == crash_row:
+            raise WorkerCrash()
+        return _fake_emissions(job)
+
+    service = DirectBatchService(db)
+    service._fetch_row_emissions = crashing_fetch
+    with pytest.raises(WorkerCrash):
+        service.process_flight_csv(file_path, batch_size=2, batch_params=BATCH_PARAMS, max_workers=1)
+    db.close()
+
+    resumed_db = session_factory()
+    job = resumed_db.query(BatchJob).one()
+    assert job.status == JOB_RUNNING
+    checkpoint = job.last_committed_row
+    assert checkpoint < crash_row
+    assert resumed_db.query(FlightCalculation).count() == checkpoint - 1
+
+    fetched_rows = []
+
+    def fetch(job):
+        fetched_rows.append(job['row'])
+        return _fake_emissions(job)
+
+    service = DirectBatchService(resumed_db)
+    service._fetch_row_emissions = fetch
+    result = service.process_flight_csv(file_path, batch_size=2, batch_params=BATCH_PARAMS, max_workers=1)
+
+    assert result['success'] is True
+    assert result['resumed'] is True
+    assert result['job_id'] == job.id
+    assert result['processed_rows'] == data_rows
+    assert sorted(fetched_rows) == list(range(checkpoint + 1, data_rows + 2))
+    assert resumed_db.query(FlightCalculation).count() == data_rows
+
+    resumed_db.refresh(job)
+    assert job.status == JOB_COMPLETED
+    assert job.resume_count == 1
+    resumed_db.close()
+
+
+def test_row_by_row_fallback_checkpoints_each_committed_row(db, flights_csv, monkeypatch):
+    file_path, data_rows = flights_csv
+    rejected_row = 4
+    staged = []
+    checkpoint = BatchJobStore.checkpoint
+
+    def record_checkpoint(store, job, last_row, processed_rows, error_rows, deferred_rows=None):
+        staged.append((last_row, processed_rows, error_rows))
+        checkpoint(store, job, last_row, processed_rows, error_rows, deferred_rows)
+
+    def fetch(job):
+        emissions = _fake_emissions(job)
+        if job['row'] == rejected_row:
+            # SQLite stores NaN as NULL and distance_km is NOT NULL,
+            # so this row breaks the bulk insert
+            emissions['distance_km'] = float('nan')
+        return emissions
+
+    monkeypatch.setattr(BatchJobStore, 'checkpoint', record_checkpoint)
+    service = DirectBatchService(db)
+    service._fetch_row_emissions = fetch
+    result = service.process_flight_csv(file_path, batch_size=10, batch_params=BATCH_PARAMS, max_workers=1)
+
+    last_row = data_rows + 1
+    assert result['processed_rows'] == data_rows - 1
+    assert result['error_rows'] == 1
+    # One mark per committed row, each counting only the rows up to it
+    assert staged[:-2] == [(row, row - 1 - (row > rejected_row), int(row > rejected_row))
+                           for row in range(2, last_row + 1) if row != rejected_row]
+    # Flush close-out, then the finish mark
+    assert staged[-2:] == [(last_row, data_rows - 1, 1)] * 2
+
+
+def test_fingerprint_tracks_size_mtime_and_first_block(tmp_path):
+    path = tmp_path / 'flights.csv'
+    path.write_text('departure_iata,destination_iata\nLHR,JFK\n')
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+    fingerprint = file_fingerprint(path)
+
+    copy = tmp_path / 'renamed.csv'
+    copy.write_bytes(path.read_bytes())
+    os.utime(copy, ns=(1_000_000_000, 1_000_000_000))
+    assert file_fingerprint(copy) == fingerprint
+
+    # Same size and mtime, different content
+    path.write_text('departure_iata,destination_iata\nLHR,CDG\n')
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+    assert file_fingerprint(path) != fingerprint
+
+    os.utime(copy, ns=(2_000_000_000, 2_000_000_000))
+    assert file_fingerprint(copy) != fingerprint
+
+
+def test_parked_row_survives_a_crash_after_the_checkpoint_moves_past_it(session_factory, db, flights_csv):
+    file_path, data_rows = flights_csv
+    parked_row, crash_row = 3, 6
+
+    def crashing_fetch(job):
+        if job['row'] == parked_row:
+            raise ICAOUnavailable("ICAO is throttling requests", retry_after=60)
+        if job['row'] == crash_row:
+            raise WorkerCrash()
+        return _fake_emissions(job)
+
+    service = DirectBatchService(db)
+    service._fetch_row_emissions = crashing_fetch
+    with pytest.raises(WorkerCrash):
+        service.process_flight_csv(file_path, batch_size=2, batch_params=BATCH_PARAMS, max_workers=1)
+    db.close()
+
+    resumed_db = session_factory()
+    job = resumed_db.query(BatchJob).one()
+    checkpoint = job.last_committed_row
+    # Rows 2 and 4 were written while row 3 waited out its park
+    assert checkpoint == 4
+    assert job.deferred_rows == [parked_row]
+    assert resumed_db.query(FlightCalculation).count() == 2
+
+    fetched_rows = []
+
+    def fetch(job):
+        fetched_rows.append(job['row'])
+        return _fake_emissions(job)
+
+    service = DirectBatchService(resumed_db)
+    service._fetch_row_emissions = fetch
+    result = service.process_flight_csv(file_path, batch_size=2, batch_params=BATCH_PARAMS, max_workers=1)
+
+    assert result['processed_rows'] == data_rows
+    assert sorted(fetched_rows) == [parked_row] + list(range(checkpoint + 1, data_rows + 2))
+    assert resumed_db.query(FlightCalculation).count() == data_rows
+    resumed_db.refresh(job)
+    assert job.deferred_rows is None
+    resumed_db.close()
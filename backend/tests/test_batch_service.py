@@ -0,0 +1,35 @@
+from database.models import Airport, FlightCalculation
+from services.airport_registry import get_airport_registry
+from services.batch_service import DirectBatchService
+
+BATCH_PARAMS = {'passengers': 1, 'cabinClass': 'economy', 'roundTrip': False, 'calculationMode': 'icao'}
+
+
+def test_unknown_airport_fails_before_any_fetch(db, tmp_path):
+    for code in ('LHR', 'JFK', 'CDG'):
+        db.add(Airport(iata_code=code, name=f"{code} Airport", city=code, country='Testland'))
+    db.commit()
+    get_airport_registry().load(db)
+
+    path = tmp_path / 'flights.csv'
+    path.write_text('departure_iata,destination_iata\nLHR,JFK\nXXX,JFK\nCDG,LHR\n')
+
+    fetched = []
+
+    def fetch(job):
+        if job['error']:
+            return None
+        fetched.append((job['departure'], job['destination']))
+        return {'distance_km': 1000, 'distance_miles': 621, 'fuel_burn_kg': 30, 'total_co2_kg': 95,
+                'co2_per_passenger_kg': 95, 'co2_tonnes': 0.095, 'data_source': 'ICAO_API'}
+
+    service = DirectBatchService(db)
+    service._fetch_row_emissions = fetch
+    result = service.process_flight_csv(str(path), batch_params=BATCH_PARAMS, max_workers=1)
+
+    assert sorted(fetched) == [('CDG', 'LHR'), ('LHR', 'JFK')]
+    assert result['processed_rows'] == 2
+    assert result['error_rows'] == 1
+    failed = [row for row in result['results'] if not row['success']]
+    assert failed == [{'row': 3, 'success': False, 'error': 'Airport not found in database: XXX'}]
+    assert db.query(FlightCalculation).count() == 2
@@ -0,0 +1,61 @@
+from database.models import CalculationChange, FlightCalculation
+from services.calculation_writer import CalculationWriter
+
+
+def _row(distance_km=1000.0):
+    return {
+        'departure_airport_id': 1,
+        'destination_airport_id': 2,
+        'passengers': 1,
+        'round_trip': False,
+        'cabin_class': 'economy',
+        'distance_km': distance_km,
+        'distance_miles': 621.0,
+        'fuel_burn_kg': 30.0,
+        'total_co2_kg': 95.0,
+        'co2_per_passenger_kg': 95.0,
+        'co2_tonnes': 0.095
+    }
+
+
+def _recorder(db, committed):
+    def on_commit(failed_count, token=None):
+        # Rows staged in this transaction are visible here but not yet committed
+        committed.append((failed_count, token, db.query(FlightCalculation).count()))
+    return on_commit
+
+
+def test_failed_bulk_insert_falls_back_to_row_by_row(db):
+    committed = []
+    writer = CalculationWriter(db, flush_size=10, on_commit=_recorder(db, committed))
+
+    writer.add(_row(), token='first')
+    # distance_km is NOT NULL, so this row breaks the bulk insert
+    writer.add(_row(distance_km=None), token='broken')
+    writer.add(_row(), token='last')
+    result = writer.flush()
+
+    assert [token for token, _ in result.written] == ['first', 'last']
+    assert [token for token, _ in result.failed] == ['broken']
+    assert writer.rows_written == 2
+    assert writer.rows_failed == 1
+    # Each row commits together with its own checkpoint, then the flush closes out
+    assert committed == [(0, 'first', 1), (1, 'last', 2), (1, None, 2)]
+
+    ids = sorted(calculation_id for _, calculation_id in result.written)
+    assert sorted(row.id for row in db.query(FlightCalculation).all()) == ids
+    changes = db.query(CalculationChange).order_by(CalculationChange.seq).all()
+    assert [(change.calculation_id, change.change_type) for change in changes] == [(i, 'insert') for i in ids]
+
+
+def test_clean_flush_writes_everything_in_one_commit(db):
+    committed = []
+    writer = CalculationWriter(db, flush_size=2, on_commit=_recorder(db, committed))
+
+    assert writer.add(_row(), token=1) is None
+    result = writer.add(_row(), token=2)
+
+    assert [token for token, _ in result.written] == [1, 2]
+    assert result.failed == []
+    assert committed == [(0, None, 2)]
+    assert db.query(FlightCalculation).count() == 2
@@ -0,0 +1,143 @@
+from datetime import timedelta
+
+from sqlalchemy import insert
+
+from database.models import CalculationChange, utc_now
+from services import change_feed
+from services.change_feed import (
+    CHANGE_DELETE, CHANGE_INSERT, CHANGE_RESET, CursorTracker, current_sequence, prune_changes, read_changes,
+    record_changes
+)
+
+changes = CalculationChange.__table__
+
+
+def _add(db, seq, calculation_id, change_type=CHANGE_INSERT, age_seconds=0):
+    db.execute(insert(changes).values(
+        seq=seq, calculation_id=calculation_id, change_type=change_type,
+        created_at=utc_now() - timedelta(seconds=age_seconds)
+    ))
+    db.commit()
+
+
+def test_net_changes_cancel_rows_added_and_removed_in_the_window(db):
+    record_changes(db, [1, 2, 3], CHANGE_INSERT)
+    record_changes(db, [2, 9], CHANGE_DELETE)
+    db.commit()
+
+    feed = read_changes(db, 0)
+
+    assert feed['inserted'] == [1, 3]
+    assert feed['deleted'] == [9]
+    assert (feed['seq'], feed['reset'], feed['has_more']) == (5, False, False)
+    assert read_changes(db, feed['seq'])['inserted'] == []
+
+
+def test_reset_clears_earlier_changes(db):
+    record_changes(db, [1, 2], CHANGE_INSERT)
+    record_changes(db, [], CHANGE_RESET)
+    record_changes(db, [3], CHANGE_INSERT)
+    db.commit()
+
+    feed = read_changes(db, 0)
+
+    assert feed['reset'] is True
+    assert feed['inserted'] == [3]
+
+
+def test_limit_pages_through_the_feed(db):
+    record_changes(db, list(range(1, 6)), CHANGE_INSERT)
+    db.commit()
+
+    first = read_changes(db, 0, limit=3)
+    second = read_changes(db, first['seq'], limit=3)
+
+    assert (first['inserted'], first['has_more']) == ([1, 2, 3], True)
+    assert (second['inserted'], second['has_more']) == ([4, 5], False)
+
+
+def test_reader_waits_at_a_recent_gap(db):
+    _add(db, 1, 101)
+    _add(db, 2, 102)
+    # seq 3 is still inside an open transaction on another connection
+    _add(db, 4, 104)
+
+    feed = read_changes(db, 0)
+
+    assert (feed['seq'], feed['inserted'], feed['has_more']) == (2, [101, 102], False)
+    assert read_changes(db, 2)['seq'] == 2
+
+    _add(db, 3, 103)
+    assert read_changes(db, 2)['inserted'] == [103, 104]
+
+
+def test_settled_gap_is_skipped(db):
+    _add(db, 1, 101, age_seconds=120)
+    _add(db, 3, 103, age_seconds=60)
+
+    feed = read_changes(db, 0)
+
+    assert (feed['seq'], feed['inserted']) == (3, [101, 103])
+
+
+def test_current_sequence_stays_behind_unsettled_changes_off_sqlite(db, monkeypatch):
+    _add(db, 1, 101, age_seconds=120)
+    _add(db, 2, 102, age_seconds=60)
+    _add(db, 4, 104)
+    assert current_sequence(db) == 4
+
+    monkeypatch.setattr(db.get_bind().dialect, 'name', 'mssql')
+    assert current_sequence(db) == 2
+
+
+def test_prune_keeps_unread_and_newest_rows(db):
+    for seq in range(1, 6):
+        _add(db, seq, 100 + seq, age_seconds=3600)
+    cutoff = utc_now() - timedelta(minutes=30)
+
+    assert prune_changes(db, cutoff, oldest_cursor=2) == 2
+    db.commit()
+    assert prune_changes(db, cutoff) == 2
+    db.commit()
+
+    # The newest row stays so the sequence never goes back
+    assert current_sequence(db) == 5
+    assert read_changes(db, 5) == {'since': 5, 'seq': 5, 'inserted': [], 'deleted': [], 'reset': False, 'has_more': False}
+
+
+def test_prune_skips_rows_inside_the_retention_window(db):
+    _add(db, 1, 101, age_seconds=3600)
+    _add(db, 2, 102)
+    _add(db, 3, 103)
+
+    assert prune_changes(db, utc_now() - timedelta(minutes=30)) == 1
+
+
+def test_reader_behind_pruned_rows_is_told_to_reset(db):
+    for seq in range(1, 5):
+        _add(db, seq, 100 + seq, age_seconds=3600)
+    prune_changes(db, utc_now())
+    db.commit()
+
+    feed = read_changes(db, 1)
+
+    assert feed['reset'] is True
+    assert feed['seq'] == 4
+
+
+def test_cursor_tracker_forgets_idle_clients(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(change_feed.time, 'monotonic', lambda: now[0])
+    tracker = CursorTracker(idle_seconds=60)
+
+    tracker.touch('a', 5)
+    now[0] += 30
+    tracker.touch('b', 9)
+    assert tracker.oldest() == 5
+
+    now[0] += 45
+    assert tracker.oldest() == 9
+    assert len(tracker) == 1
+
+    tracker.release('b')
+    assert tracker.oldest() is None
@@ -0,0 +1,92 @@
+import gzip
+
+import pytest
+from flask import Flask, request
+
+from services import http_cache
+from services.http_cache import VersionedPayloadCache
+
+BODY = b'{"airports": ["LHR", "JFK"]}' * 50
+
+
+@pytest.fixture
+def cache():
+    return VersionedPayloadCache('test')
+
+
+@pytest.fixture
+def client(cache):
+    app = Flask(__name__)
+    state = {'version': 1, 'builds': 0}
+
+    def build():
+        state['builds'] += 1
+        return BODY + str(state['version']).encode()
+
+    @app.route('/airports')
+    def airports():
+        return cache.get(state['version'], build).respond(request, max_age=60)
+
+    client = app.test_client()
+    client.state = state
+    return client
+
+
+def test_first_request_sends_body_with_strong_etag(client):
+    response = client.get('/airports')
+
+    assert response.status_code == 200
+    assert response.get_data() == BODY + b'1'
+    assert response.headers['ETag'].startswith('"') and not response.headers['ETag'].startswith('W/')
+    assert response.headers['Cache-Control'] == 'public, max-age=60, must-revalidate'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+
+
+def test_matching_etag_gets_304_without_rebuilding(client):
+    etag = client.get('/airports').headers['ETag']
+
+    response = client.get('/airports', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.headers['ETag'] == etag
+    assert client.state['builds'] == 1
+
+
+def test_gzip_variant_has_its_own_etag_and_still_revalidates(client):
+    plain_etag = client.get('/airports').headers['ETag']
+    response = client.get('/airports', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()) == BODY + b'1'
+    assert response.headers['ETag'] != plain_etag
+    assert client.get('/airports', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+
+@pytest.mark.skipif(http_cache.brotli is None, reason="brotli is optional")
+def test_brotli_is_preferred_when_accepted(client):
+    response = client.get('/airports', headers={'Accept-Encoding': 'gzip, br'})
+
+    assert response.headers['Content-Encoding'] == 'br'
+    assert http_cache.brotli.decompress(response.get_data()) == BODY + b'1'
+
+
+def test_new_version_rebuilds_and_old_etag_no_longer_matches(client, cache):
+    etag = client.get('/airports').headers['ETag']
+    client.state['version'] = 2
+
+    response = client.get('/airports', headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.get_data() == BODY + b'2'
+    assert client.state['builds'] == 2
+    assert cache.stats()['version'] == 2
+
+
+def test_invalidate_forces_a_rebuild(client, cache):
+    client.get('/airports')
+    cache.invalidate()
+    client.get('/airports')
+
+    assert client.state['builds'] == 2
+    assert (cache.hits, cache.misses) == (0, 2)
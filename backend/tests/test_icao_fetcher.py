@@ -0,0 +1,116 @@
+import threading
+import time
+
+from services.icao_client import ICAOUnavailable
+from services.icao_fetcher import ConcurrentICAOFetcher
+
+
+def test_outcomes_follow_input_order_when_fetches_finish_out_of_order():
+    completed = []
+    lock = threading.Lock()
+
+    def fetch(job):
+        # Earlier jobs sleep longest, so the pool finishes them last
+        time.sleep(0.02 * (5 - job))
+        with lock:
+            completed.append(job)
+        return job * 10
+
+    fetcher = ConcurrentICAOFetcher(fetch, max_workers=5)
+    outcomes = list(fetcher.fetch_ordered(range(5)))
+
+    assert completed != sorted(completed)
+    assert [outcome.job for outcome in outcomes] == [0, 1, 2, 3, 4]
+    assert [outcome.result for outcome in outcomes] == [0, 10, 20, 30, 40]
+    assert fetcher.total_jobs == 5
+
+
+def test_duplicate_keys_share_one_fetch():
+    calls = []
+    lock = threading.Lock()
+
+    def fetch(job):
+        with lock:
+            calls.append(job['route'])
+        time.sleep(0.01)
+        return {'route': job['route']}
+
+    jobs = [{'row': row, 'route': route} for row, route in enumerate(['LHR-JFK', 'CDG-FRA', 'LHR-JFK', 'LHR-JFK'])]
+    fetcher = ConcurrentICAOFetcher(fetch, max_workers=4)
+    outcomes = list(fetcher.fetch_ordered(jobs, key_fn=lambda job: job['route']))
+
+    assert sorted(calls) == ['CDG-FRA', 'LHR-JFK']
+    assert [outcome.job['row'] for outcome in outcomes] == [0, 1, 2, 3]
+    assert [outcome.deduplicated for outcome in outcomes] == [False, False, True, True]
+    assert outcomes[2].result is outcomes[0].result
+    assert fetcher.keyed_jobs == 4
+    assert fetcher.unique_fetches == 2
+
+
+def test_a_failing_fetch_does_not_stop_the_rest():
+    def fetch(job):
+        if job == 1:
+            raise RuntimeError("ICAO API returned status 500")
+        return job
+
+    outcomes = list(ConcurrentICAOFetcher(fetch, max_workers=2).fetch_ordered(range(4)))
+
+    assert [outcome.result for outcome in outcomes] == [0, None, 2, 3]
+    assert isinstance(outcomes[1].error, RuntimeError)
+    assert all(outcome.error is None for i, outcome in enumerate(outcomes) if i != 1)
+
+
+def test_parked_job_is_retried_after_the_rest_move_on():
+    attempts = []
+
+    def fetch(job):
+        attempts.append(job)
+        if job == 1 and attempts.count(1) == 1:
+            raise ICAOUnavailable("ICAO is throttling requests", retry_after=0.05)
+        return job
+
+    fetcher = ConcurrentICAOFetcher(fetch, max_workers=2, max_park_seconds=5)
+    outcomes = [(outcome.job, outcome.result, outcome.parked) for outcome in fetcher.fetch_ordered(range(4))]
+
+    assert outcomes == [(0, 0, False), (1, None, True), (2, 2, False), (3, 3, False), (1, 1, False)]
+    assert attempts.count(1) == 2
+    assert fetcher.parked_jobs == 1
+
+
+def test_parked_job_fails_once_the_park_budget_is_spent():
+    def fetch(job):
+        raise ICAOUnavailable("circuit open", retry_after=0.05)
+
+    fetcher = ConcurrentICAOFetcher(fetch, max_workers=1, max_park_seconds=0.2)
+    outcomes = list(fetcher.fetch_ordered(['LHR-JFK']))
+
+    assert [outcome.parked for outcome in outcomes] == [True, False]
+    assert isinstance(outcomes[-1].error, ICAOUnavailable)
+
+
+def test_errors_that_retrying_cannot_fix_are_not_parked():
+    def fetch(job):
+        raise ValueError("Airport not found")
+
+    fetcher = ConcurrentICAOFetcher(fetch, max_workers=1, max_park_seconds=5)
+    outcomes = list(fetcher.fetch_ordered(range(2)))
+
+    assert [outcome.parked for outcome in outcomes] == [False, False]
+    assert fetcher.parked_jobs == 0
+
+
+def test_intake_waits_while_too_many_jobs_are_parked():
+    retried = set()
+
+    def fetch(job):
+        if job < 2 and job not in retried:
+            retried.add(job)
+            raise ICAOUnavailable("ICAO is throttling requests", retry_after=0.05)
+        return job
+
+    fetcher = ConcurrentICAOFetcher(fetch, max_workers=1, max_park_seconds=5, max_parked=1)
+    outcomes = [(outcome.job, outcome.parked) for outcome in fetcher.fetch_ordered(range(4))]
+
+    # Job 1 could not be parked until job 0 came back from the park
+    assert outcomes.index((0, False)) < outcomes.index((1, True))
+    assert sorted(job for job, parked in outcomes if not parked) == [0, 1, 2, 3]
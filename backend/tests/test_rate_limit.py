@@ -0,0 +1,115 @@
+import pytest
+
+from services import rate_limit
+from services.rate_limit import (
+    CIRCUIT_CLOSED, CIRCUIT_HALF_OPEN, CIRCUIT_OPEN, AdaptiveRateLimiter, CircuitBreaker
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, 'monotonic', clock)
+    return clock
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=10)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow() == (True, 0.0)
+    breaker.record_failure()
+
+    assert breaker.state == CIRCUIT_OPEN
+    clock.now += 4
+    assert breaker.allow() == (False, 6.0)
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=10)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CIRCUIT_CLOSED
+
+
+def test_half_open_lets_one_probe_through_and_closes_on_success(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=10)
+    breaker.record_failure()
+    clock.now += 10
+
+    assert breaker.allow() == (True, 0.0)
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    allowed, _ = breaker.allow()
+    assert not allowed
+
+    breaker.record_success()
+    assert breaker.state == CIRCUIT_CLOSED
+    assert breaker.allow() == (True, 0.0)
+
+
+def test_failed_probe_reopens_with_doubled_cooldown(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=10)
+    breaker.record_failure()
+    clock.now += 10
+    breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == CIRCUIT_OPEN
+    assert breaker.cooldown == 20
+    assert breaker.allow() == (False, 20.0)
+    assert breaker.open_count == 2
+
+
+def test_server_retry_after_extends_the_cooldown(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=10, max_cooldown_seconds=60)
+
+    breaker.record_failure(retry_after=45)
+    assert breaker.allow() == (False, 45.0)
+
+    breaker.cooldown = 10
+    breaker.record_failure(retry_after=500)
+    assert breaker.cooldown == 60
+
+
+def test_limiter_increases_additively_and_halves_on_throttle():
+    limiter = AdaptiveRateLimiter(4.0, min_rate=0.5, max_rate=8.0, latency_target=5.0)
+
+    limiter.on_success(0.2)
+    assert limiter.rate == pytest.approx(4.1)
+
+    limiter.on_throttle()
+    assert limiter.rate == pytest.approx(2.05)
+    assert limiter.throttle_count == 1
+
+
+def test_limiter_backs_off_on_slow_answers():
+    limiter = AdaptiveRateLimiter(4.0, min_rate=0.5, max_rate=8.0, latency_target=5.0)
+
+    limiter.on_success(9.0)
+
+    assert limiter.rate == pytest.approx(3.0)
+
+
+def test_limiter_stays_within_its_bounds():
+    limiter = AdaptiveRateLimiter(1.0, min_rate=0.5, max_rate=1.2, latency_target=5.0)
+
+    for _ in range(10):
+        limiter.on_throttle()
+    assert limiter.rate == 0.5
+
+    for _ in range(20):
+        limiter.on_success(0.1)
+    assert limiter.rate == 1.2
@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from database.models import Airport, FlightCalculation
+from services import replication
+from services.replication import read_high_water_marks, replicate, replicate_exclusive
+
+START = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def source_path(tmp_path, db):
+    # The db fixture creates the schema in this file
+    return str(tmp_path / 'test.db')
+
+
+@pytest.fixture
+def target(tmp_path):
+    url = f"sqlite:///{tmp_path / 'target.db'}"
+    engine = create_engine(url)
+    yield url, engine
+    engine.dispose()
+
+
+def _add_calculations(db, count, offset=0):
+    for i in range(offset, offset + count):
+        db.add(FlightCalculation(
+            departure_airport_id=1, destination_airport_id=2, passengers=1, round_trip=False,
+            cabin_class='economy', distance_km=1000 + i, distance_miles=621, fuel_burn_kg=30,
+            total_co2_kg=95, co2_per_passenger_kg=95, co2_tonnes=0.095, created_at=START + timedelta(minutes=i)
+        ))
+    db.commit()
+
+
+@pytest.fixture
+def seeded(db):
+    db.add_all([Airport(iata_code='LHR', name='Heathrow', city='London', country='UK'),
+                Airport(iata_code='JFK', name='JFK', city='New York', country='US')])
+    db.commit()
+    _add_calculations(db, 5)
+    return db
+
+
+def _count(engine, model):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(model.__table__)).scalar()
+
+
+def test_first_run_copies_everything_in_chunks(seeded, source_path, target):
+    url, engine = target
+
+    stats = replicate(target_url=url, source_path=source_path, chunk_size=2)
+
+    assert stats['tables']['airports']['rows_copied'] == 2
+    assert stats['tables']['flight_calculations']['rows_copied'] == 5
+    assert _count(engine, FlightCalculation) == 5
+    marks = read_high_water_marks(engine)
+    assert marks['flight_calculations']['last_id'] == 5
+    assert marks['flight_calculations']['last_created_at'] == START + timedelta(minutes=4)
+
+
+def test_later_runs_copy_only_new_rows(seeded, source_path, target):
+    url, engine = target
+    replicate(target_url=url, source_path=source_path)
+    _add_calculations(seeded, 3, offset=5)
+
+    stats = replicate(target_url=url, source_path=source_path)
+
+    assert stats['tables']['airports']['rows_copied'] == 0
+    assert stats['tables']['flight_calculations']['rows_copied'] == 3
+    assert stats['tables']['flight_calculations']['total_rows_copied'] == 8
+    assert _count(engine, FlightCalculation) == 8
+    with engine.connect() as conn:
+        distances = conn.execute(select(FlightCalculation.distance_km).order_by(FlightCalculation.id)).scalars().all()
+    assert distances == [1000 + i for i in range(8)]
+
+
+def test_failed_chunk_resumes_without_duplicates(seeded, source_path, target, monkeypatch):
+    url, engine = target
+    save_mark = replication._save_high_water_mark
+    calls = []
+
+    def failing_save(conn, table_name, *args):
+        calls.append(table_name)
+        if table_name == 'flight_calculations' and calls.count(table_name) == 2:
+            raise RuntimeError("connection lost")
+        return save_mark(conn, table_name, *args)
+
+    monkeypatch.setattr(replication, '_save_high_water_mark', failing_save)
+    with pytest.raises(RuntimeError):
+        replicate(target_url=url, source_path=source_path, chunk_size=2)
+
+    # The failed chunk rolled back with its mark; only the first chunk landed
+    assert _count(engine, FlightCalculation) == 2
+    assert read_high_water_marks(engine)['flight_calculations']['last_id'] == 2
+
+    monkeypatch.setattr(replication, '_save_high_water_mark', save_mark)
+    stats = replicate(target_url=url, source_path=source_path, chunk_size=2)
+
+    assert stats['tables']['flight_calculations']['rows_copied'] == 3
+    assert _count(engine, FlightCalculation) == 5
+
+
+def test_missing_target_or_source_is_an_error(source_path, target, tmp_path):
+    url, _ = target
+    with pytest.raises(ValueError):
+        replicate(target_url='', source_path=source_path)
+    with pytest.raises(FileNotFoundError):
+        replicate(target_url=url, source_path=str(tmp_path / 'missing.db'))
+
+
+def test_exclusive_run_returns_none_while_busy(source_path, target):
+    url, _ = target
+    with replication._replication_lock:
+        assert replicate_exclusive(target_url=url, source_path=source_path) is None
+    assert replicate_exclusive(target_url=url, source_path=source_path) is not None
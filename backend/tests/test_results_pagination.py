@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.models import FlightCalculation
+from services.results_pagination import decode_results_cursor, encode_results_cursor, fetch_results_page
+
+START = datetime(2026, 1, 1)
+
+
+def _calculation(created_at):
+    return FlightCalculation(
+        departure_airport_id=1, destination_airport_id=2, passengers=1, round_trip=False,
+        cabin_class='economy', distance_km=1000, distance_miles=621, fuel_burn_kg=30,
+        total_co2_kg=95, co2_per_passenger_kg=95, co2_tonnes=0.095, created_at=created_at
+    )
+
+
+def _newest_first(db):
+    return db.query(FlightCalculation).order_by(FlightCalculation.created_at.desc(), FlightCalculation.id.desc())
+
+
+def _all_pages(db, limit):
+    pages = []
+    cursor = None
+    while True:
+        calculations, _, cursor = fetch_results_page(_newest_first(db), limit, cursor)
+        pages.append([calculation.id for calculation in calculations])
+        if cursor is None:
+            return pages
+
+
+def test_pages_cover_every_row_once_in_order(db):
+    # Several rows share a timestamp, so the id tie-breaker has to carry the cursor
+    for minute in (0, 0, 0, 1, 2, 2, 3):
+        db.add(_calculation(START + timedelta(minutes=minute)))
+    db.commit()
+
+    pages = _all_pages(db, limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert sum(pages, []) == [row.id for row in _newest_first(db)]
+
+
+def test_rows_inserted_after_the_first_page_do_not_shift_later_pages(db):
+    for minute in range(6):
+        db.add(_calculation(START + timedelta(minutes=minute)))
+    db.commit()
+
+    first, _, cursor = fetch_results_page(_newest_first(db), 3)
+    db.add(_calculation(START + timedelta(hours=1)))
+    db.commit()
+    second, _, cursor = fetch_results_page(_newest_first(db), 3, cursor)
+
+    assert [row.created_at.minute for row in first] == [5, 4, 3]
+    assert [row.created_at.minute for row in second] == [2, 1, 0]
+    assert cursor is None
+
+
+def test_null_timestamps_sort_last_and_page_by_id(db):
+    for created_at in (START, None, None, None):
+        db.add(_calculation(created_at))
+    db.commit()
+    # created_at has a Python-side default, so clear it after the insert
+    db.query(FlightCalculation).filter(FlightCalculation.id > 1).update({'created_at': None})
+    db.commit()
+
+    assert _all_pages(db, limit=2) == [[1, 4], [3, 2]]
+
+
+def test_limit_is_capped_and_defaulted(db):
+    db.add(_calculation(START))
+    db.commit()
+
+    assert fetch_results_page(_newest_first(db))[1] == 100
+    assert fetch_results_page(_newest_first(db), 5000)[1] == 1000
+    assert fetch_results_page(_newest_first(db), -3)[1] == 1
+
+
+def test_cursor_round_trip_and_malformed_cursor():
+    calculation = _calculation(START)
+    calculation.id = 42
+
+    assert decode_results_cursor(encode_results_cursor(calculation)) == (START, 42)
+    with pytest.raises(ValueError):
+        decode_results_cursor('not-a-cursor')
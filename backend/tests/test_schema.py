@@ -0,0 +1,15 @@
+from sqlalchemy import create_engine, inspect, text
+
+from database.models import Base, BatchJob
+from database.schema import add_missing_columns
+
+
+def test_add_missing_columns_upgrades_existing_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE batch_jobs DROP COLUMN deferred_rows"))
+
+    assert add_missing_columns(engine, Base.metadata.sorted_tables) == ['batch_jobs.deferred_rows']
+    assert 'deferred_rows' in {column['name'] for column in inspect(engine).get_columns('batch_jobs')}
+    assert add_missing_columns(engine, [BatchJob.__table__]) == []
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 
 // Import the new components (make sure these files exist in your components folder)
 import ExportControls from './ExportControls';
@@ -6,8 +6,25 @@ import DeleteControls from './DeleteControls';
 import BatchParameterControls from './BatchParameterControls';
 import FileUploadControls from './FileUploadControls';
 
+// Rows per request; the backend caps pages at 1000
+const RESULTS_PAGE_SIZE = 500;
+
+const fetchResultsPage = async (cursor) => {
+  const params = new URLSearchParams({ limit: RESULTS_PAGE_SIZE });
+  if (cursor) params.set('cursor', cursor);
+  const response = await fetch(`/api/v2/automation/results?${params}`);
+  if (!response.ok) {
+    throw new Error(`Results request failed with status ${response.status}`);
+  }
+  return response.json();
+};
+
 function AutomationResults() {
   const [results, setResults] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  // How many rows a refresh reloads, so pages loaded with "Load more" survive it
+  const loadedRowsTarget = useRef(RESULTS_PAGE_SIZE);
   const [loading, setLoading] = useState(false);
   const [status, setStatus] = useState({});
   const [currentPage, setCurrentPage] = useState(1);
@@ -26,7 +43,8 @@ function AutomationResults() {
   const [batchParams, setBatchParams] = useState({
     passengers: 1,
     cabinClass: 'economy',
-    roundTrip: false
+    roundTrip: false,
+    calculationMode: 'icao'
   });
 
   // NEW STATE: Row selection for deletion
@@ -46,20 +64,23 @@ function AutomationResults() {
   const fetchResults = useCallback(async () => {
     try {
       console.log('🔄 FETCHING RESULTS...');
-      const response = await fetch('/api/v2/automation/results');
-      if (response.ok) {
-        const data = await response.json();
-        setResults(data);
-        setLastUpdated(new Date());
-        console.log('✅ RESULTS FETCHED:', data.length, 'items');
-        setDebugInfo(prev => ({ 
-          ...prev, 
-          apiCalls: prev.apiCalls + 1,
-          lastResultsCount: data.length
-        }));
-      } else {
-        console.error('❌ RESULTS FETCH FAILED:', response.status);
-      }
+      // Reload from the newest row, following next_cursor until as many rows as before are loaded
+      let data = [];
+      let cursor = null;
+      do {
+        const page = await fetchResultsPage(cursor);
+        data = data.concat(page.results);
+        cursor = page.next_cursor;
+      } while (cursor && data.length < loadedRowsTarget.current);
+      setResults(data);
+      setNextCursor(cursor);
+      setLastUpdated(new Date());
+      console.log('✅ RESULTS FETCHED:', data.length, 'items');
+      setDebugInfo(prev => ({ 
+        ...prev, 
+        apiCalls: prev.apiCalls + 1,
+        lastResultsCount: data.length
+      }));
     } catch (err) {
       console.error('❌ Error fetching results:', err);
       setDebugInfo(prev => ({ 
@@ -69,6 +90,40 @@ function AutomationResults() {
     }
   }, []);
 
+  const loadMoreResults = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchResultsPage(nextCursor);
+      loadedRowsTarget.current += RESULTS_PAGE_SIZE;
+      setResults(prev => prev.concat(page.results));
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      console.error('❌ Error loading more results:', err);
+      setDebugInfo(prev => ({ 
+        ...prev, 
+        errors: [...prev.errors, `Results error: ${err.message}`]
+      }));
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // Follow next_cursor to the end so exports cover every row, not only the loaded pages
+  const loadAllResults = async () => {
+    let data = results;
+    let cursor = nextCursor;
+    while (cursor) {
+      const page = await fetchResultsPage(cursor);
+      data = data.concat(page.results);
+      cursor = page.next_cursor;
+    }
+    loadedRowsTarget.current = Math.max(data.length, RESULTS_PAGE_SIZE);
+    setResults(data);
+    setNextCursor(null);
+    return data.filter(matchesFilters);
+  };
+
   const fetchStatus = useCallback(async () => {
     try {
       console.log('🔄 FETCHING STATUS...');
@@ -218,77 +273,72 @@ function AutomationResults() {
     loadData();
   }, [fetchResults, fetchStatus]);
 
-  // Auto-refresh
+  // Auto-refresh: results reload only when the change feed reports inserts or deletes
   useEffect(() => {
     if (!autoRefresh) return;
 
-    const interval = setInterval(async () => {
-      if (!isProcessing) { // Only auto-refresh when not processing
-        console.log('🔄 Auto-refresh triggered');
+    let refreshTimer = null;
+    const changeSource = new EventSource('/api/check-updates/stream');
+    changeSource.addEventListener('changes', () => {
+      if (isProcessing || refreshTimer) return; // Only auto-refresh when not processing
+      // A running batch reports changes every second; coalesce them into one reload
+      refreshTimer = setTimeout(async () => {
+        refreshTimer = null;
+        console.log('🔄 Auto-refresh triggered by change feed');
         await fetchResults();
+      }, 2000);
+    });
+
+    const interval = setInterval(async () => {
+      if (!isProcessing) {
         await fetchStatus();
       }
     }, 5000);
 
-    return () => clearInterval(interval);
+    return () => {
+      changeSource.close();
+      clearTimeout(refreshTimer);
+      clearInterval(interval);
+    };
   }, [autoRefresh, fetchResults, fetchStatus, isProcessing]);
 
-  // IMPROVED Progress polling with fallback completion detection
+  // Progress is pushed over Server-Sent Events, with fallback completion detection
   useEffect(() => {
-    let progressInterval;
+    let progressSource;
     let fallbackTimeout;
     
     if (isProcessing) {
-      console.log('🚀 STARTING PROGRESS POLLING');
+      console.log('🚀 OPENING PROGRESS STREAM');
       
-      progressInterval = setInterval(async () => {
-        console.log('🔄 Polling progress...');
-        const progress = await fetchBatchProgress();
+      progressSource = new EventSource('/api/v2/automation/progress/stream');
+      progressSource.addEventListener('progress', async (event) => {
+        const progress = JSON.parse(event.data);
+        setBatchProgress(progress);
+        setShowProgress(true);
         
-        if (progress) {
-          console.log('📊 Progress data:', progress);
-          setBatchProgress(progress);
+        // Check completion based on status field
+        if (progress.status === 'completed' || progress.status === 'failed') {
+          console.log('🎯 PROCESSING COMPLETED DETECTED:', progress.status);
+          progressSource.close();
+          setIsProcessing(false);
           setShowProgress(true);
           
-          // Check completion based on status field
-          if (progress.status === 'completed' || progress.status === 'failed') {
-            console.log('🎯 PROCESSING COMPLETED DETECTED:', progress.status);
-            setIsProcessing(false);
-            setShowProgress(true);
-            
-            // Refresh final data
-            await fetchResults();
-            await fetchStatus();
-          }
-          
-          // If progress says "idle" but we're processing, check if files are done
-          if (progress.status === 'idle' && isProcessing) {
-            console.log('⚠️ Progress says idle but we think we are processing - checking status');
-            const currentStatus = await fetchStatus();
-            if (currentStatus.scheduled_files === 0) {
-              console.log('✅ No scheduled files - processing must be complete');
-              setIsProcessing(false);
-              setBatchProgress({
-                status: 'completed',
-                message: 'Processing completed successfully!',
-                progress_percent: 100,
-                processed_rows: 5, // You might want to get this from results count
-                error_rows: 0
-              });
-              await fetchResults();
-            }
-          }
-        } else {
-          console.log('⚠️ No progress data received');
+          // Refresh final data
+          await fetchResults();
+          await fetchStatus();
         }
-      }, 2000);
+      });
+      progressSource.onerror = () => {
+        // EventSource reconnects on its own; this is only informational
+        console.log('⚠️ Progress stream interrupted, reconnecting...');
+      };
       
       // Fallback: if no progress updates after 30 seconds, check status
       fallbackTimeout = setTimeout(async () => {
         if (isProcessing) {
           console.log('⏰ Fallback timeout - checking if processing is done');
           const currentStatus = await fetchStatus();
-          if (currentStatus.scheduled_files === 0) {
+          if (currentStatus && currentStatus.scheduled_files === 0) {
             console.log('✅ Fallback: No scheduled files - marking as complete');
             setIsProcessing(false);
             setBatchProgress(prev => ({
@@ -305,20 +355,20 @@ function AutomationResults() {
       }, 30000); // 30 seconds fallback
       
     } else {
-      console.log('🛑 STOPPED PROGRESS POLLING');
+      console.log('🛑 PROGRESS STREAM CLOSED');
     }
 
     return () => {
-      if (progressInterval) {
-        console.log('🧹 Cleaning up progress interval');
-        clearInterval(progressInterval);
+      if (progressSource) {
+        console.log('🧹 Closing progress stream');
+        progressSource.close();
       }
       if (fallbackTimeout) {
         console.log('🧹 Cleaning up fallback timeout');
         clearTimeout(fallbackTimeout);
       }
     };
-  }, [isProcessing, fetchBatchProgress, fetchResults, fetchStatus]);
+  }, [isProcessing, fetchResults, fetchStatus]);
 
   // UPDATED triggerProcessing to include batch parameters
   const triggerProcessing = async () => {
@@ -439,7 +489,7 @@ function AutomationResults() {
   };
 
   // Filter results
-  const filteredResults = results.filter(result => {
+  const matchesFilters = (result) => {
     return (
       (!filters.route || `${result.departure}→${result.destination}`.toLowerCase().includes(filters.route.toLowerCase())) &&
       (!filters.passengers || result.passengers.toString().includes(filters.passengers)) &&
@@ -449,7 +499,9 @@ function AutomationResults() {
       (!filters.data_source || result.data_source.toLowerCase().includes(filters.data_source.toLowerCase())) &&
       (!filters.date || formatDate(result.created_at).toLowerCase().includes(filters.date.toLowerCase()))
     );
-  });
+  };
+  const filteredResults = results.filter(matchesFilters);
+  const hasActiveFilters = Object.values(filters).some(filter => filter !== '');
 
   // Pagination
   const indexOfLastItem = currentPage * itemsPerPage;
@@ -941,6 +993,9 @@ function AutomationResults() {
         results={filteredResults}
         filters={filters}
         batchParams={batchParams}
+        hasMoreResults={Boolean(nextCursor)}
+        hasActiveFilters={hasActiveFilters}
+        loadAllResults={loadAllResults}
       />
 
       {/* NEW: Delete Controls */}
@@ -1072,6 +1127,24 @@ function AutomationResults() {
                 <div style={styles.progressLabel}>Errors</div>
               </div>
             )}
+            {batchProgress.rows_per_second > 0 && (
+              <div style={styles.progressItem}>
+                <div style={styles.progressValue}>{batchProgress.rows_per_second}</div>
+                <div style={styles.progressLabel}>Rows/sec</div>
+              </div>
+            )}
+            {batchProgress.eta_seconds !== null && batchProgress.eta_seconds !== undefined && (
+              <div style={styles.progressItem}>
+                <div style={styles.progressValue}>{Math.ceil(batchProgress.eta_seconds)}s</div>
+                <div style={styles.progressLabel}>ETA</div>
+              </div>
+            )}
+            {batchProgress.icao_latency && (
+              <div style={styles.progressItem}>
+                <div style={styles.progressValue}>{batchProgress.icao_latency.p50_ms} / {batchProgress.icao_latency.p99_ms} ms</div>
+                <div style={styles.progressLabel}>ICAO p50 / p99</div>
+              </div>
+            )}
           </div>
           
           {/* Show completion summary */}
@@ -1322,7 +1395,20 @@ function AutomationResults() {
           <div style={styles.pagination}>
             <div style={styles.pageInfo}>
               Showing {indexOfFirstItem + 1}-{Math.min(indexOfLastItem, filteredResults.length)} of {filteredResults.length} calculations
-              {filteredResults.length !== results.length && ` (filtered from ${results.length} total)`}
+              {filteredResults.length !== results.length && ` (filtered from ${results.length} loaded)`}
+              {nextCursor && (
+                <button
+                  onClick={loadMoreResults}
+                  disabled={loadingMore}
+                  style={{
+                    ...styles.pageButton,
+                    marginLeft: '10px',
+                    opacity: loadingMore ? 0.5 : 1
+                  }}
+                >
+                  {loadingMore ? 'Loading...' : `Load ${RESULTS_PAGE_SIZE} more`}
+                </button>
+              )}
             </div>
             
             <div style={styles.paginationControls}>
@@ -5,6 +5,17 @@ const BatchParameterControls = ({ batchParams, setBatchParams, isProcessing }) =
     return cabin.charAt(0).toUpperCase() + cabin.slice(1).replace('_', ' ');
   };
 
+  const calculationModes = [
+    { value: 'icao', label: 'ICAO API (strict)' },
+    { value: 'hybrid', label: 'ICAO, model if unavailable' },
+    { value: 'model', label: 'Offline model only' }
+  ];
+
+  const formatCalculationMode = (mode) => {
+    const match = calculationModes.find((option) => option.value === (mode || 'icao'));
+    return match ? match.label : mode;
+  };
+
   return (
     <div style={{
       background: 'linear-gradient(135deg, #f8fafc 0%, #f1f5f9 100%)',
@@ -177,6 +188,39 @@ const BatchParameterControls = ({ batchParams, setBatchParams, isProcessing }) =
           </button>
         </div>
 
+        {/* Calculation Mode Selection */}
+        <div>
+          <label style={{
+            display: 'block',
+            marginBottom: '8px',
+            fontWeight: '600',
+            color: '#374151',
+            fontSize: '0.9rem'
+          }}>
+            🧮 Calculation Mode
+          </label>
+          <select
+            value={batchParams.calculationMode || 'icao'}
+            onChange={(e) => setBatchParams(prev => ({
+              ...prev,
+              calculationMode: e.target.value
+            }))}
+            disabled={isProcessing}
+            style={{
+              width: '100%',
+              padding: '10px 12px',
+              border: '2px solid #d1d5db',
+              borderRadius: '8px',
+              fontSize: '1rem',
+              background: 'white'
+            }}
+          >
+            {calculationModes.map((mode) => (
+              <option key={mode.value} value={mode.value}>{mode.label}</option>
+            ))}
+          </select>
+        </div>
+
         {/* Current Parameters Display */}
         <div style={{
           padding: '12px',
@@ -198,7 +242,8 @@ const BatchParameterControls = ({ batchParams, setBatchParams, isProcessing }) =
           }}>
             {batchParams.passengers} passenger{batchParams.passengers !== 1 ? 's' : ''} • 
             {formatCabinClass(batchParams.cabinClass)} • 
-            {batchParams.roundTrip ? 'Round Trip' : 'One Way'}
+            {batchParams.roundTrip ? 'Round Trip' : 'One Way'} • 
+            {formatCalculationMode(batchParams.calculationMode)}
           </div>
         </div>
       </div>
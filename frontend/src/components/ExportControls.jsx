@@ -1,6 +1,6 @@
 import React, { useState } from 'react';
 
-const ExportControls = ({ results, filters, batchParams }) => {
+const ExportControls = ({ results, filters, batchParams, hasMoreResults = false, hasActiveFilters = false, loadAllResults }) => {
   const [exporting, setExporting] = useState(false);
   const [exportFormat, setExportFormat] = useState('csv');
 
@@ -13,30 +13,32 @@ const ExportControls = ({ results, filters, batchParams }) => {
 
     setExporting(true);
     try {
+      let payload;
+      if (hasMoreResults && format === 'csv' && !hasActiveFilters) {
+        // Unfiltered CSV streams every row straight from the database
+        payload = { format, mode: 'server', filters: {} };
+      } else {
+        // Only some pages are loaded; fetch the rest so the export is complete
+        const rows = hasMoreResults && loadAllResults ? await loadAllResults() : results;
+        payload = { format, data: rows, filters };
+      }
+
       const response = await fetch('/api/v2/automation/export', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
         },
         body: JSON.stringify({
-          format: format, // Use the passed format, not the state
-          data: results,
-          filters: filters,
+          ...payload,
           batchParams: batchParams,
           timestamp: new Date().toISOString()
         })
       });
 
       if (response.ok) {
-        if (format === 'sql') {
-          // For SQL, we get a JSON response with the SQL content
-          const sqlData = await response.json();
-          downloadSQLFile(sqlData);
-        } else {
-          // For other formats, we get a file blob
-          const blob = await response.blob();
-          downloadFile(blob, format); // Use the passed format
-        }
+        // Every format, including the streamed SQL script, comes back as a file blob
+        const blob = await response.blob();
+        downloadFile(blob, format); // Use the passed format
       } else {
         throw new Error('Export failed');
       }
@@ -63,7 +65,8 @@ const ExportControls = ({ results, filters, batchParams }) => {
     const extensions = {
       'csv': 'csv',
       'excel': 'xlsx',
-      'pdf': 'pdf'
+      'pdf': 'pdf',
+      'sql': 'sql'
     };
     const filename = `flight_emissions_${timestamp}.${extensions[format]}`;
     a.download = filename;
@@ -74,20 +77,6 @@ const ExportControls = ({ results, filters, batchParams }) => {
     document.body.removeChild(a);
   };
 
-  const downloadSQLFile = (sqlData) => {
-    const blob = new Blob([sqlData.sql_content], { type: 'text/plain' });
-    const url = window.URL.createObjectURL(blob);
-    const a = document.createElement('a');
-    a.style.display = 'none';
-    a.href = url;
-    a.download = sqlData.filename;
-    
-    document.body.appendChild(a);
-    a.click();
-    window.URL.revokeObjectURL(url);
-    document.body.removeChild(a);
-  };
-
   const exportOptions = [
     { value: 'csv', label: 'CSV', icon: '📊' },
     { value: 'excel', label: 'Excel', icon: '📈' },
@@ -184,7 +173,7 @@ const ExportControls = ({ results, filters, batchParams }) => {
             fontSize: '0.75rem',
             color: '#374151'
           }}>
-            {results.length} records • {exportFormat.toUpperCase()} format
+            {hasMoreResults ? `${results.length}+ records (all pages are exported)` : `${results.length} records`} • {exportFormat.toUpperCase()} format
             {exportFormat === 'sql' && ' • INSERT statements'}
           </div>
         </div>
@@ -1,3 +1,4 @@
+// Generated from backend/data/airports.bin by backend/build_airports.py
 export const airports = [
   { code: "AAA", name: "Anaa Airport", city: "Anaa", country: "French Polynesia", search: "Anaa, French Polynesia (Anaa - AAA)" },
   { code: "AAD", name: "Adado Airport", city: "Adado", country: "Somalia", search: "Adado, Somalia (Adado Airport - AAD)" },